@@ -1,26 +1,100 @@
-from smolagents import LiteLLMModel, CodeAgent
+from smolagents import CodeAgent, Tool
+from app.agents.memory_compaction import MemoryCompactor
+from app.agents.rate_limited_model import RateLimitedLiteLLMModel
 from app.tools.web_search_tool import WebSearchTool
 from app.tools.web_crawler_tool import WebCrawlerTool
+from app.tools.web_crawler_batch_tool import WebCrawlerBatchTool
 from app.tools.news_search_tool import NewsSearchTool
-from typing import List, Optional
+from app.tools.local_corpus_search_tool import LocalCorpusSearchTool
+from app.utils import config, metrics
+from app.utils.cache import get_search_cache
+from app.utils.corpus_index import get_corpus_index
+from app.utils.page_store import get_page_store
+from typing import Any, List, Optional
+import time
 
 
+def _instrument(tool: Tool) -> Tool:
+    """
+    Record the latency, output size and status of every call to a tool's `forward`.
+
+    Tools report failures as text starting with "Error", so such outputs count as errors.
+
+    Args:
+        tool (Tool): The tool to instrument.
+
+    Returns:
+        Tool: The same tool.
+    """
+    forward = tool.forward
+
+    def timed_forward(*args: Any, **kwargs: Any) -> Any:
+        started = time.monotonic()
+        status = "exception"
+        try:
+            output = forward(*args, **kwargs)
+            status = "error" if isinstance(output, str) and output.startswith("Error") else "ok"
+            metrics.TOOL_OUTPUT_BYTES.labels(tool=tool.name).observe(len(str(output).encode("utf-8")))
+            return output
+        finally:
+            metrics.TOOL_SECONDS.labels(tool=tool.name, status=status).observe(time.monotonic() - started)
+            if status != "ok":
+                metrics.ERRORS.labels(stage=f"tool:{tool.name}").inc()
+
+    tool.forward = timed_forward
+    return tool
+
+
+def create_research_model(
+        model_name: str,
+        temperature: float,
+        api_key: Optional[str] = None,
+        api_base: Optional[str] = None,
+        max_tokens: int = 8000
+) -> RateLimitedLiteLLMModel:
+    """
+    Create the model driving a research agent.
+
+    Args:
+        model_name (str): The LiteLLM model id, e.g. "gemini/gemini-2.0-flash".
+        temperature (float): The sampling temperature.
+        api_key (Optional[str]): The API key for the model, if it requires one.
+        api_base (Optional[str]): Base URL of the endpoint serving the model, if not the
+            provider's default.
+        max_tokens (int): Completion token limit of each call.
+
+    Returns:
+        RateLimitedLiteLLMModel: The model; calls share the model's rate limit and retry
+            transient errors
+    """
+    return RateLimitedLiteLLMModel(
+        model_id=model_name,
+        temperature=temperature,
+        api_key=api_key,
+        api_base=api_base,
+        max_tokens=max_tokens
+    )
+
 
 def create_research_agent(
         model_name: str,
         temperature: float,
         serper_api_key: str,
         api_key: Optional[str] = None,
+        api_base: Optional[str] = None,
         max_token: int = 8000,
         verbosity_level: int = 2,
         max_steps: int = 10
 ) -> CodeAgent:
     """
-    Create a research agent with web search, crawling, and news search capabilities.
+    Create a research agent with web search, crawling, batch crawling, and news search capabilities.
 
-    The research agent is a CodeAgent that uses a LiteLLMModel to generate code based on human instructions.
-    It is configured with a web search tool, a web crawler tool, and a news search tool.
+    The research agent is a CodeAgent that uses a rate-limited LiteLLMModel to generate code based on human instructions.
+    It is configured with a web search tool, a web crawler tool, a batch web crawler tool, and a news search tool,
+    plus a local corpus search tool over previously fetched content when the corpus index is enabled.
     The agent is designed to be used for research and information gathering tasks.
+    A `MemoryCompactor` step callback keeps earlier tool observations within a token budget and logs
+    per-step token usage and latency.
 
     Args:
         model_name (str): The name of the LLM model to use. For example, "codegen-350M-mono".
@@ -30,6 +104,8 @@ def create_research_agent(
             web crawler, and news search tools.
         api_key (Optional[str]): The API key for the LLM model. This is only required if the model requires
             an API key.
+        api_base (Optional[str]): Base URL of the endpoint serving the model, if not the provider's
+            default; e.g. a local stand-in during benchmarks.
         max_token (int): The maximum number of tokens that the LLM can generate. This is useful for limiting
             the amount of code that the agent can generate.
         verbosity_level (int): The level of verbosity for the agent. This can be one of the following values:
@@ -42,18 +118,20 @@ def create_research_agent(
     Returns:
         CodeAgent: A configured research agent
     """
-    # Initialize the LLM model
-    model = LiteLLMModel(
-        model_id=model_name,
-        temperature=temperature,
-        api_key=api_key,
-        max_token=max_token
-    )
+    # Initialize the LLM model; calls share the model's rate limit and retry transient errors
+    model = create_research_model(model_name, temperature, api_key=api_key, api_base=api_base, max_tokens=max_token)
 
-    # Initialize the tools
-    web_search = WebSearchTool(api_key=serper_api_key)
-    web_crawler = WebCrawlerTool(api_key=serper_api_key)
-    news_search = NewsSearchTool(api_key=serper_api_key)
+    # Initialize the tools; search tools share one result cache across all agents, and every
+    # fetched page and search result is added to the shared local corpus index
+    search_cache = get_search_cache()
+    corpus = get_corpus_index()
+    web_search = WebSearchTool(api_key=serper_api_key, cache=search_cache, corpus=corpus)
+    web_crawler = WebCrawlerTool(api_key=serper_api_key, page_store=get_page_store(), corpus=corpus)
+    web_crawler_batch = WebCrawlerBatchTool(crawler=web_crawler)
+    news_search = NewsSearchTool(api_key=serper_api_key, cache=search_cache, corpus=corpus)
+    tools = [web_search, web_crawler, web_crawler_batch, news_search]
+    if corpus is not None:
+        tools.insert(0, LocalCorpusSearchTool(corpus=corpus))
 
     # List of additional authorized imports
     additional_imports = [
@@ -65,9 +143,14 @@ def create_research_agent(
     # Create and return the research agent
     return CodeAgent(
         model=model,
-        tools=[web_search, web_crawler, news_search],
+        tools=[_instrument(tool) for tool in tools],
         name="research_agent",
         verbosity_level=verbosity_level,
         max_steps=max_steps,
-        additional_authorized_imports=additional_imports
+        additional_authorized_imports=additional_imports,
+        step_callbacks=[MemoryCompactor(
+            max_tokens=config.AGENT_MEMORY_MAX_TOKENS,
+            keep_recent=config.AGENT_MEMORY_KEEP_RECENT,
+            summary_tokens=config.AGENT_MEMORY_SUMMARY_TOKENS
+        )]
     )
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Agent memory compaction.
+
+A `CodeAgent` resends the observations of every earlier step to the model on each new step, so
+prompt size and step latency grow as a research run goes on. `MemoryCompactor` is a step
+callback that keeps the agent's memory within a token budget: once the observations held in
+memory pass `max_tokens`, older observations are replaced by a short extract of their passages
+most relevant to the research query, followed by the URLs they mentioned so the agent can
+fetch the full content again (crawled pages are served from the page store). The task and the
+most recent observations are always kept verbatim.
+
+The callback also logs the prompt tokens, output tokens and duration of every step.
+
+Example:
+
+    >>> agent = CodeAgent(..., step_callbacks=[MemoryCompactor(max_tokens=6000)])
+"""
+
+import logging
+import re
+from typing import Any, List
+
+from smolagents.memory import ActionStep
+
+from app.utils.run_context import current_run
+from app.utils.text_extract import count_tokens, extract_relevant
+
+logger = logging.getLogger(__name__)
+
+# Prefix marking an observation that was already compacted
+COMPACTED_PREFIX = "[Compacted observation"
+
+_URL = re.compile(r"https?://[^\s\"'<>()\[\]{},]+")
+
+
+def compact_observation(observation: str, query: str, summary_tokens: int, max_urls: int = 10) -> str:
+    """
+    Replace an observation by an extract of its most relevant passages and its URLs.
+
+    Args:
+        observation (str): The observation text.
+        query (str): The research query used to pick passages.
+        summary_tokens (int): Token budget for the extract.
+        max_urls (int): Maximum number of URLs listed.
+
+    Returns:
+        str: The compacted observation.
+    """
+    urls: List[str] = []
+    for url in _URL.findall(observation):
+        url = url.rstrip(".;:")
+        if url not in urls:
+            urls.append(url)
+
+    lines = [f"{COMPACTED_PREFIX}, originally {count_tokens(observation)} tokens]"]
+    lines.append(extract_relevant(observation, query, summary_tokens))
+    if urls:
+        lines.append("Sources (crawl again for full content): " + ", ".join(urls[:max_urls]))
+    return "\n".join(lines)
+
+
+class MemoryCompactor:
+    """
+    Step callback that logs step usage and compacts old observations in agent memory.
+
+    Attributes:
+        max_tokens (int): Observation tokens allowed in memory before compacting; 0 disables it.
+        keep_recent (int): Number of most recent action steps whose observations stay verbatim.
+        summary_tokens (int): Token budget for each compacted observation's extract.
+    """
+
+    def __init__(self, max_tokens: int, keep_recent: int = 2, summary_tokens: int = 200) -> None:
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+
+    def __call__(self, step: Any, agent: Any) -> None:
+        """
+        Log the finished step and compact the agent's memory if it is over budget.
+
+        Args:
+            step (Any): The memory step that just finished.
+            agent (Any): The agent running the step.
+        """
+        if not isinstance(step, ActionStep):
+            return
+
+        compacted = 0
+        memory_tokens = self.memory_tokens(agent)
+        if self.max_tokens > 0 and memory_tokens > self.max_tokens:
+            compacted = self.compact(agent)
+            memory_tokens = self.memory_tokens(agent)
+
+        logger.info(
+            f"Agent step {step.step_number}: {step.duration or 0:.2f}s, "
+            f"prompt tokens {getattr(agent.model, 'last_input_token_count', None)}, "
+            f"output tokens {getattr(agent.model, 'last_output_token_count', None)}, "
+            f"observation tokens in memory {memory_tokens}"
+            + (f", compacted {compacted} observations" if compacted else "")
+        )
+
+    @staticmethod
+    def memory_tokens(agent: Any) -> int:
+        """
+        Count the observation tokens held in an agent's memory.
+
+        Args:
+            agent (Any): The agent.
+
+        Returns:
+            int: The number of tokens across all action step observations.
+        """
+        return sum(
+            count_tokens(step.observations)
+            for step in agent.memory.steps
+            if isinstance(step, ActionStep) and step.observations
+        )
+
+    def compact(self, agent: Any) -> int:
+        """
+        Compact the observations of all but the most recent action steps.
+
+        Args:
+            agent (Any): The agent whose memory is compacted.
+
+        Returns:
+            int: The number of observations compacted.
+        """
+        run = current_run()
+        query = run.query if run is not None else ""
+        action_steps = [step for step in agent.memory.steps if isinstance(step, ActionStep)]
+        older = action_steps[:-self.keep_recent] if self.keep_recent > 0 else action_steps
+
+        compacted = 0
+        for step in older:
+            if not step.observations or step.observations.startswith(COMPACTED_PREFIX):
+                continue
+            if count_tokens(step.observations) <= self.summary_tokens:
+                continue
+            step.observations = compact_observation(step.observations, query, self.summary_tokens)
+            compacted += 1
+        return compacted
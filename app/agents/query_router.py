@@ -0,0 +1,294 @@
+"""
+Query complexity routing.
+
+Research queries range from a single fact ("capital of France") to a multi-faceted market
+analysis. Giving all of them the largest step budget and a prompt asking for a 2000-word report
+makes simple questions slow and costly. `QueryRouter` classifies each query locally, without a
+model call, into a `QueryTier` that sets:
+
+* the model and its completion token limit
+* the agent's step budget
+* the `AgentPrompt` variant, i.e. how long and structured the answer must be
+* the sources after which the agent stops researching and answers (early exit)
+
+The classifier extracts a few features from the query (length, named entities, question type,
+analytic wording, number of parts) and applies rules in order; the first rule naming a tier
+wins, and queries no rule matches get the default tier, the full research of the "deep" tier.
+Rules are plain functions and can be added to a router:
+
+    >>> router = QueryRouter(default_tiers())
+    >>> router.add_rule(lambda features: "deep" if "legal" in features.words else None)
+    >>> router.route("capital of France").name
+    'simple'
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.utils import config
+
+# Words opening a question that asks for a single fact
+FACTOID_OPENERS = (
+    "who", "when", "where", "how many", "how much", "how old", "how tall", "how far", "how long",
+)
+# Words opening any direct question; "what" questions are factoid only in the forms of
+# `_WHAT_FACT`, and yes/no questions usually need the evidence weighed
+QUESTION_OPENERS = FACTOID_OPENERS + (
+    "what", "what's", "which", "how", "why", "define", "is", "are", "was", "were", "does", "did", "do",
+    "can", "should", "could", "would", "will",
+)
+# Wording that asks for causes or explanations, which a single fact does not answer
+EXPLANATORY_TERMS = (
+    "why", "cause", "caused", "causes", "reason", "reasons", "led", "explain", "meaning", "purpose",
+    "role", "effect", "effects", "significance", "history", "work", "works", "happen", "happened",
+)
+# Wording that asks for analysis rather than a fact
+ANALYTIC_TERMS = (
+    "analysis", "analyze", "analyse", "compare", "comparison", "versus", "vs", "impact", "trend",
+    "trends", "forecast", "outlook", "market", "landscape", "strategy", "strategies",
+    "implications", "pros and cons", "advantages and disadvantages", "in-depth", "comprehensive",
+    "report", "review", "overview", "evaluate", "assessment", "state of",
+)
+
+_WORD = re.compile(r"[\w'-]+")
+# "What is the <attribute> of <entity>" and "what year/date ..." questions
+_WHAT_FACT = re.compile(
+    r"^what(?:'s|\s+(?:is|was|are|were))\s+the\s+(?:\w+\s+){1,2}of\s|^what\s+(?:year|date|day|time|age)\b",
+    re.IGNORECASE,
+)
+_ENTITY = re.compile(r"\b(?:[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*|\d[\d,.]*%?)")
+_PARTS = re.compile(r"[;?]|,|\band\b|\balso\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class QueryTier:
+    """
+    Research settings for a class of queries.
+
+    Attributes:
+        name (str): Tier name, e.g. "simple".
+        model (str): LiteLLM model id of the research agent.
+        max_steps (int): Maximum number of agent steps.
+        max_tokens (int): Completion token limit of each model call.
+        prompt_variant (str): `AgentPrompt` variant: "brief", "focused" or "comprehensive".
+        min_sources (int): Distinct sources returned by the search tools after which the
+            agent answers; 0 disables the early exit.
+        min_pages (int): Pages crawled before the early exit applies.
+    """
+    name: str
+    model: str
+    max_steps: int
+    max_tokens: int
+    prompt_variant: str
+    min_sources: int = 0
+    min_pages: int = 0
+
+    def satisfied(self, sources: int, pages: int) -> bool:
+        """
+        Check whether a run has gathered enough to answer.
+
+        Args:
+            sources (int): Distinct URLs returned to the agent so far.
+            pages (int): Pages crawled so far.
+
+        Returns:
+            bool: True if the tier has an early exit and both thresholds are met.
+        """
+        return self.min_sources > 0 and sources >= self.min_sources and pages >= self.min_pages
+
+
+@dataclass(frozen=True)
+class QueryFeatures:
+    """
+    Features of a query used by the routing rules.
+
+    Attributes:
+        text (str): The query, stripped.
+        words (Tuple[str, ...]): Lower-cased words of the query.
+        entities (int): Capitalized names and numbers after the first word.
+        question (Optional[str]): "factoid" or "open" for a direct question, else None.
+        analytic (bool): Whether the query asks for analysis, comparison or a report.
+        explanatory (bool): Whether the query asks for causes or explanations.
+        parts (int): Number of clauses or sub-questions.
+    """
+    text: str
+    words: Tuple[str, ...]
+    entities: int
+    question: Optional[str]
+    analytic: bool
+    explanatory: bool
+    parts: int
+
+
+Rule = Callable[[QueryFeatures], Optional[str]]
+
+
+def extract_features(query: str) -> QueryFeatures:
+    """
+    Extract the routing features of a query.
+
+    Args:
+        query (str): The research query.
+
+    Returns:
+        QueryFeatures: The features.
+    """
+    text = query.strip()
+    lowered = text.lower()
+    words = tuple(word.lower() for word in _WORD.findall(text))
+    first = _WORD.search(text)
+    # The first word is capitalized in any sentence; only later names count as entities
+    entities = len(_ENTITY.findall(text[first.end():] if first else text))
+
+    padded = f" {' '.join(words)} "
+    analytic = any(f" {term} " in padded for term in ANALYTIC_TERMS)
+    explanatory = any(word in EXPLANATORY_TERMS for word in words)
+
+    question = None
+    factoid = lowered.startswith(tuple(f"{opener} " for opener in FACTOID_OPENERS)) or _WHAT_FACT.match(text)
+    if factoid and not explanatory:
+        question = "factoid"
+    elif text.endswith("?") or lowered.startswith(tuple(f"{opener} " for opener in QUESTION_OPENERS)):
+        question = "open"
+
+    parts = 1 + len(_PARTS.findall(text.rstrip("?")))
+    return QueryFeatures(
+        text=text, words=words, entities=entities, question=question, analytic=analytic,
+        explanatory=explanatory, parts=parts,
+    )
+
+
+def analytic_rule(features: QueryFeatures) -> Optional[str]:
+    """Analysis, comparisons and reports need the full research."""
+    return "deep" if features.analytic else None
+
+
+def multi_part_rule(features: QueryFeatures) -> Optional[str]:
+    """Queries with several parts or many words need the full research."""
+    return "deep" if features.parts >= 3 or len(features.words) > 25 else None
+
+
+def factoid_rule(features: QueryFeatures) -> Optional[str]:
+    """A short who/when/where/how-many question, or "what is the <attribute> of <entity>",
+    about one or two named things asks for a single fact."""
+    if features.question == "factoid" and len(features.words) <= 12 and features.entities <= 2 and features.parts <= 2:
+        return "simple"
+    return None
+
+
+def lookup_rule(features: QueryFeatures) -> Optional[str]:
+    """A few words naming one fact of one thing, e.g. "capital of France", ask for that fact."""
+    if features.question is None and not features.explanatory and len(features.words) <= 5 \
+            and " of " in f" {' '.join(features.words)} " and features.entities >= 1:
+        return "simple"
+    return None
+
+
+def question_rule(features: QueryFeatures) -> Optional[str]:
+    """Other direct questions need a focused answer, not a report."""
+    return "standard" if features.question is not None and len(features.words) <= 25 else None
+
+
+# Applied in order; the first rule returning a tier name wins
+DEFAULT_RULES: Tuple[Rule, ...] = (analytic_rule, multi_part_rule, factoid_rule, lookup_rule, question_rule)
+
+
+class QueryRouter:
+    """
+    Picks the tier of each research query with local heuristics.
+
+    Attributes:
+        tiers (Dict[str, QueryTier]): The tiers by name.
+        rules (List[Rule]): Rules applied in order; each returns a tier name or None.
+        default (str): Tier of queries no rule matches.
+    """
+
+    def __init__(
+            self,
+            tiers: Sequence[QueryTier],
+            rules: Sequence[Rule] = DEFAULT_RULES,
+            default: str = "deep"
+    ) -> None:
+        self.tiers: Dict[str, QueryTier] = {tier.name: tier for tier in tiers}
+        if default not in self.tiers:
+            raise ValueError(f"Default query tier '{default}' is not defined")
+        self.rules: List[Rule] = list(rules)
+        self.default = default
+
+    def add_rule(self, rule: Rule, index: int = 0) -> None:
+        """
+        Add a routing rule.
+
+        Args:
+            rule (Rule): Function of the query features returning a tier name or None.
+            index (int): Position among the rules; by default it is applied first.
+        """
+        self.rules.insert(index, rule)
+
+    def route(self, query: str) -> QueryTier:
+        """
+        Pick the tier of a query.
+
+        Args:
+            query (str): The research query.
+
+        Returns:
+            QueryTier: The tier of the first matching rule, or the default tier. A rule naming
+                an unknown tier is ignored.
+        """
+        features = extract_features(query)
+        for rule in self.rules:
+            name = rule(features)
+            if name is not None and name in self.tiers:
+                return self.tiers[name]
+        return self.tiers[self.default]
+
+
+def default_tiers() -> List[QueryTier]:
+    """
+    Get the tiers configured in `app.utils.config`.
+
+    Returns:
+        List[QueryTier]: The "simple", "standard" and "deep" tiers.
+    """
+    return [
+        QueryTier(
+            name="simple",
+            model=config.QUERY_TIER_SIMPLE_MODEL,
+            max_steps=config.QUERY_TIER_SIMPLE_MAX_STEPS,
+            max_tokens=config.QUERY_TIER_SIMPLE_MAX_TOKENS,
+            prompt_variant="brief",
+            min_sources=3,
+        ),
+        QueryTier(
+            name="standard",
+            model=config.QUERY_TIER_STANDARD_MODEL,
+            max_steps=config.QUERY_TIER_STANDARD_MAX_STEPS,
+            max_tokens=config.QUERY_TIER_STANDARD_MAX_TOKENS,
+            prompt_variant="focused",
+            min_sources=5,
+            min_pages=2,
+        ),
+        QueryTier(
+            name="deep",
+            model=config.QUERY_TIER_DEEP_MODEL,
+            max_steps=config.QUERY_TIER_DEEP_MAX_STEPS,
+            max_tokens=config.QUERY_TIER_DEEP_MAX_TOKENS,
+            prompt_variant="comprehensive",
+        ),
+    ]
+
+
+@lru_cache()
+def get_query_router() -> Optional[QueryRouter]:
+    """
+    Get the process-wide query router.
+
+    Returns:
+        Optional[QueryRouter]: The router, or None when `config.QUERY_ROUTING_ENABLED` is off.
+    """
+    if not config.QUERY_ROUTING_ENABLED:
+        return None
+    return QueryRouter(default_tiers())
@@ -0,0 +1,108 @@
+"""
+Rate-limited LiteLLM model.
+
+`RateLimitedLiteLLMModel` is a `LiteLLMModel` whose completion calls go through the shared
+rate limiter of the model and API key. Calls wait for the configured quota, and rate-limit
+(429), server (5xx), timeout and connection errors are retried with backoff, honouring the
+provider's `Retry-After`. An agent step therefore no longer fails on a transient throttle.
+
+Inside a research run with a deadline, every attempt's timeout is capped to the time the run
+has left.
+
+Example:
+
+    >>> model = RateLimitedLiteLLMModel(model_id="gemini/gemini-2.0-flash", api_key=key)
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import litellm
+from smolagents import LiteLLMModel
+from smolagents.models import ChatMessage
+
+from app.utils import metrics, rate_limit
+from app.utils.run_context import current_run
+
+# Provider errors worth retrying; everything else (bad request, auth, ...) fails immediately
+RETRYABLE_ERRORS = (
+    litellm.RateLimitError,
+    litellm.ServiceUnavailableError,
+    litellm.InternalServerError,
+    litellm.APIConnectionError,
+    litellm.Timeout,
+)
+
+
+def classify_error(result: Optional[Any], error: Optional[BaseException]) -> Tuple[bool, bool, Optional[float]]:
+    """
+    Decide whether a completion attempt should be retried.
+
+    Args:
+        result (Optional[Any]): The completion, if the call succeeded.
+        error (Optional[BaseException]): The exception, if the call failed.
+
+    Returns:
+        Tuple[bool, bool, Optional[float]]: Whether to retry, whether the provider throttled
+            the call, and the seconds requested by its `Retry-After` header.
+    """
+    if error is None or not isinstance(error, RETRYABLE_ERRORS):
+        return False, False, None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        retry_after = rate_limit.parse_retry_after(headers.get("retry-after"))
+    except Exception:
+        retry_after = None
+    return True, isinstance(error, litellm.RateLimitError), retry_after
+
+
+class RateLimitedLiteLLMModel(LiteLLMModel):
+    """
+    LiteLLM model that waits for its rate limit and retries transient provider errors.
+
+    Attributes:
+        limiter (RateLimiter): Shared rate limiter and retry policy for the model and API key.
+    """
+
+    def __init__(self, model_id: Optional[str] = None, api_key: Optional[str] = None, **kwargs):
+        super().__init__(model_id=model_id, api_key=api_key, **kwargs)
+        self.limiter = rate_limit.get_limiter("llm", self.model_id, api_key)
+
+    def __call__(self, messages: List[Dict[str, str]], **kwargs) -> ChatMessage:
+        """
+        Generate a completion within the rate limit, retrying transient errors.
+
+        Args:
+            messages (List[Dict[str, str]]): The conversation sent to the model.
+            **kwargs: Arguments passed on to `LiteLLMModel.__call__`.
+
+        Returns:
+            ChatMessage: The model's reply.
+
+        Raises:
+            DeadlineExceededError: If the research run's deadline has passed.
+            RunCancelledError: If the research run was cancelled.
+        """
+        run = current_run()
+
+        def _complete() -> ChatMessage:
+            options = dict(kwargs)
+            if run is not None:
+                timeout = run.timeout(options.get("timeout"))
+                if timeout is not None:
+                    options["timeout"] = timeout
+            return super(RateLimitedLiteLLMModel, self).__call__(messages, **options)
+
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            message = rate_limit.call_with_retries(_complete, self.limiter, classify_error)
+            outcome = "ok"
+        finally:
+            metrics.LLM_SECONDS.labels(model=self.model_id, outcome=outcome).observe(time.monotonic() - started)
+            if outcome == "error":
+                metrics.ERRORS.labels(stage="llm").inc()
+        metrics.LLM_TOKENS.labels(model=self.model_id, kind="prompt").inc(self.last_input_token_count or 0)
+        metrics.LLM_TOKENS.labels(model=self.model_id, kind="completion").inc(self.last_output_token_count or 0)
+        return message
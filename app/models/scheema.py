@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class ResearchRequest(BaseModel):
@@ -8,8 +8,16 @@ class ResearchRequest(BaseModel):
 
         Attributes:
             query (str): The research question or topic to investigate
+            cache_control (Optional[str]): Cache directives, like the `Cache-Control` header.
+                "no-cache" skips the cached response and refreshes it, "no-store" skips the
+                cache entirely. Takes precedence over the request header.
+            deadline_seconds (Optional[float]): Time limit for the research run in seconds,
+                like the `X-Request-Timeout` header. Takes precedence over the header; capped
+                by the server.
         """
     query: str
+    cache_control: Optional[str] = None
+    deadline_seconds: Optional[float] = Field(None, gt=0)
 
 
 class ResearchResponse(BaseModel):
@@ -43,4 +51,52 @@ class FormatRequest(BaseModel):
         Attributes:
             prompt (str): The text to be formatted
     """
-    prompt: str
\ No newline at end of file
+    prompt: str
+
+
+class FormatBatchRequest(BaseModel):
+    """
+        Request model for formatting many texts at once.
+
+        Attributes:
+            requests (List[FormatRequest]): The texts to be formatted
+    """
+    requests: List[FormatRequest]
+
+
+class FormatBatchResult(BaseModel):
+    """
+        Response model for one item of a formatting batch.
+
+        Attributes:
+            index (int): Position of the item in the batch request
+            result (Optional[Format]): The formatted text, if formatting succeeded
+            error (Optional[str]): The error message, if formatting failed
+    """
+    index: int
+    result: Optional[Format] = None
+    error: Optional[str] = None
+
+
+class ResearchJob(BaseModel):
+    """
+        Response model for asynchronous research jobs.
+
+        Attributes:
+            id (str): The job identifier
+            query (str): The research question or topic
+            status (str): One of "queued", "running", "succeeded", "failed" or "cancelled"
+            attempts (int): Number of times the job has been started
+            result (Optional[ResearchResponse]): The research results once the job succeeded
+            error (Optional[str]): The last error, if an attempt failed
+            created_at (float): Unix time the job was created
+            updated_at (float): Unix time the job last changed
+    """
+    id: str
+    query: str
+    status: str
+    attempts: int
+    result: Optional[ResearchResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
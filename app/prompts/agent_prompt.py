@@ -16,9 +16,18 @@ Example:
     >>> print(prompt)
 
 This will output a comprehensive research prompt with detailed instructions for
-conducting research on the provided topic.
+conducting research on the provided topic. Search results fetched before the agent started
+can be passed as `prefetched`; they are appended to the prompt. The `variant` sets how much
+research and how long an answer the prompt asks for: "comprehensive" (a full report),
+"focused" (a sourced answer of a few paragraphs) or "brief" (a short factual answer).
 
 """
+from typing import Optional
+
+# Prompt variants, from the most to the least research asked for
+VARIANTS = ("comprehensive", "focused", "brief")
+
+
 class AgentPrompt:
     """
         A class that generates comprehensive research prompts for LLM agents.
@@ -30,15 +39,24 @@ class AgentPrompt:
 
         Attributes:
             query (str): The research topic or question to investigate.
+            prefetched (Optional[str]): Web and news search results for the query, fetched
+                before the agent started, or None.
+            variant (str): "comprehensive", "focused" or "brief".
         """
-    def __init__(self , query) -> None:
+    def __init__(self , query, prefetched: Optional[str] = None, variant: str = "comprehensive") -> None:
         """
                 Initialize the Agent_Prompt with a research query.
 
                 Args:
                     query (str): The topic or question to research.
+                    prefetched (Optional[str]): JSON search results already fetched for the query.
+                    variant (str): "comprehensive", "focused" or "brief".
         """
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown prompt variant '{variant}', expected one of {', '.join(VARIANTS)}")
         self.query = query
+        self.prefetched = prefetched
+        self.variant = variant
 
     def get_prompt(self) -> str:
         """
@@ -53,6 +71,9 @@ class AgentPrompt:
                 Returns:
                     str: A detailed research prompt with methodology and output requirements.
         """
+        if self.variant != "comprehensive":
+            return self._with_prefetched(self._get_short_prompt())
+
         prompt = f"""Act as an advanced research agent investigating '{self.query}'.
 
                 ## OBJECTIVE:
@@ -61,6 +82,7 @@ class AgentPrompt:
 
                 ## RESEARCH METHODOLOGY:
                 1. INITIAL SEARCH:
+                   - If the local_corpus_search tool is available, check it first to reuse material fetched by earlier research, and search the web for what it does not cover or when recent information matters
                    - Conduct systematic web searches to identify authoritative sources
                    - Locate precise URLs of relevant web pages (minimum 3-5 high-quality sources)
                    - Prioritize academic, governmental, established news, and expert resources
@@ -68,6 +90,10 @@ class AgentPrompt:
 
                 2. DATA EXTRACTION PROCESS:
                    - Extract primary content from each URL via web crawling
+                   - Crawl all selected URLs together in one web_crawler_batch call instead of one web_crawler call per URL
+                   - Pass a focused query to the crawler tools so they return the passages relevant to your research
+                   - Search results leave out URLs already returned earlier in this research; an empty list means there is nothing new for that query
+                   - Do not crawl results marked duplicate_of; they repeat a source you already have
                    - Document key data points, statistics, and factual information
                    - Preserve chronology and context of events/developments
                    - Note contradictions or disagreements between sources
@@ -101,4 +127,64 @@ class AgentPrompt:
                 - Ensure all responses are matched to the research topic
                 """
 
-        return prompt
\ No newline at end of file
+        return self._with_prefetched(prompt)
+
+    def _get_short_prompt(self) -> str:
+        """
+                Generate the prompt of the "focused" and "brief" variants, which ask for an answer
+                rather than a report and let the agent stop once the answer is established.
+
+                Returns:
+                    str: A research prompt sized to the variant.
+        """
+        if self.variant == "brief":
+            method = """- Search the web; the snippets of reliable sources are often enough, so crawl a page only when they disagree or lack the answer
+                   - Cross-check the answer against at least two independent sources
+                   - Stop researching as soon as the answer is established"""
+            output = """- Lead with the direct answer, then add only the context needed to understand it
+                - Keep it to 1-3 short paragraphs (at most 250 words)
+                - Mention the sources the answer rests on"""
+        else:
+            method = """- Search the web, and recent news when the question concerns current events, for 3-5 authoritative sources
+                   - Crawl the selected URLs together in one web_crawler_batch call, with a focused query
+                   - Stop researching once the sources answer every part of the question"""
+            output = """- Begin with a direct answer of 2-3 sentences
+                - Follow with 4-6 paragraphs (500-900 words) presenting the evidence, with headings where useful
+                - Note disagreements between sources and the limits of what is known
+                - Attribute every claim to its source"""
+
+        return f"""Act as a research agent answering '{self.query}'.
+
+                ## OBJECTIVE:
+                Give an accurate, well-sourced answer to the question. If no question is given, answer
+                'No Topic Mentioned'.
+
+                ## RESEARCH METHODOLOGY:
+                   - If the local_corpus_search tool is available, check it first to reuse material fetched by earlier research
+                   {method}
+                   - Search results leave out URLs already returned earlier in this research; an empty list means there is nothing new for that query
+                   - Do not crawl results marked duplicate_of; they repeat a source you already have
+
+                ## OUTPUT REQUIREMENTS:
+                {output}
+                - Maintain a neutral, objective tone
+                """
+
+    def _with_prefetched(self, prompt: str) -> str:
+        """
+                Append the prefetched search results, if any, to a prompt.
+
+                Args:
+                    prompt (str): The research prompt.
+
+                Returns:
+                    str: The prompt, followed by the prefetched results.
+        """
+        if not self.prefetched:
+            return prompt
+        return prompt + f"""
+                ## PREFETCHED SEARCH RESULTS:
+                The web_search and news_search results for the topic itself were fetched before you started. Do not repeat
+                those two searches; start from these results, and crawl or search further only for what they do not cover:
+                {self.prefetched}
+                """
\ No newline at end of file
@@ -1,26 +1,39 @@
 """
 Formatter Router
 
-This module provides an API endpoint for generating formatted text with summary and references.
+This module provides API endpoints for generating formatted text with summary and references.
 It utilizes the LLM capabilities to process the input prompt and return a structured response.
 
 The router is defined with a prefix and tags for better organization within the FastAPI application.
-It includes a single POST endpoint that accepts a request body containing the content to format.
+It includes a POST endpoint that formats a single piece of content and a batch endpoint that
+formats many pieces of content concurrently.
+
+A single Gemini client is created on first use, or by the startup warm-up, and reused across
+requests. The Gemini SDK is imported along with it, so importing the router stays cheap.
+Generation uses the client's async API so the event loop is never blocked.
 
 Environment variables are loaded using dotenv for configuration purposes.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from google import genai
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response
 from dotenv import load_dotenv
-from app.models.scheema import FormatRequest, Format
-from app.utils import config
-import os
+from app.models.scheema import FormatBatchRequest, FormatBatchResult, FormatRequest, Format
+from app.utils import config, metrics, profiler
+
+if TYPE_CHECKING:
+    from google import genai
 
 # Load environment variables from a .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize the API router with prefix and tags
 router = APIRouter(
     prefix="/api/formater",
@@ -28,50 +41,62 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.post("/generate")
-async def generate_recipes(request: FormatRequest):
-    """
-    Generate formatted text with summary and references from provided content.
-
-    This endpoint processes the input content, generates a summary, and provides references
-    using the LLM model. It returns a list of formatted data objects.
 
-    Args:
-        request (FormatRequest): Request object containing the prompt to format.
+@lru_cache()
+def get_genai_client() -> "genai.Client":
+    """
+    Get the process-wide Gemini client.
 
     Returns:
-        list[Format]: List of formatted data containing summary and references.
+        genai.Client: A client reused across requests, so connections are kept alive.
     """
-    # [Function logic goes here]
-    pass
-
-
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from google import genai
-from dotenv import load_dotenv
-from app.models.scheema import FormatRequest, Format
-from app.utils import config
-import os
+    from google import genai
 
-load_dotenv()
+    http_options = {"base_url": config.GEMINI_BASE_URL} if config.GEMINI_BASE_URL else None
+    return genai.Client(api_key=config.GEMINI_API_KEY, http_options=http_options)
 
-router = APIRouter(
-    prefix="/api/formater",
-    tags=["research"],
-    responses={404: {"description": "Not found"}},
-)
 
+async def _format(prompt: str) -> Format:
+    """
+    Format one piece of content with the Gemini model.
 
+    Args:
+        prompt (str): The content to format.
 
+    Returns:
+        Format: The formatted data containing summary and references.
+    """
+    started = time.monotonic()
+    outcome = "error"
+    try:
+        response = await get_genai_client().aio.models.generate_content(
+            model='gemini-2.0-flash',
+            contents='convert the given content to highly formatted text with the summary and references . - content to format - ' + prompt,
+            config={
+                'response_mime_type': 'application/json',
+                'response_schema': Format,
+            },
+        )
+        outcome = "ok"
+    finally:
+        metrics.FORMATTER_SECONDS.labels(outcome=outcome).observe(time.monotonic() - started)
+        if outcome == "error":
+            metrics.ERRORS.labels(stage="formatter").inc()
+    return response.parsed
 
 
 @router.post("/generate")
-async def generate_recipes(request: FormatRequest):
+async def generate_recipes(request: FormatRequest, response: Response, x_profile: Optional[str] = Header(None)):
     """Generate formatted text with summary and references from provided content.
 
+    A request carrying the admin profiling token in `X-Profile`, or drawn at the profiling
+    sampling rate, is profiled on the event loop thread; the id of its profile is returned in
+    `X-Profile-Id`.
+
     Args:
         request (FormatRequest): Request object containing the prompt to format.
+        response (Response): The response, used to return the profile id.
+        x_profile (Optional[str]): `X-Profile` request header with the admin profiling token.
 
     Returns:
         list[Format]: List of formatted data containing summary and references.
@@ -81,17 +106,46 @@ async def generate_recipes(request: FormatRequest):
                       and error details.
     """
     try:
-        client = genai.Client(api_key=config.GEMINI_API_KEY)
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents='convert the given content to highly formatted text with the summary and references . - content to format - ' + request.prompt,
-            config={
-                'response_mime_type': 'application/json',
-                'response_schema': Format,
-            },
-        )
-        format_data: list[Format] = response.parsed
-        print(format_data)
+        with profiler.profile_request("formatter", x_profile, watch_current=True) as profile:
+            if profile is not None:
+                response.headers["X-Profile-Id"] = profile.id
+            format_data: list[Format] = await _format(request.prompt)
         return format_data
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating recipes: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating recipes: {str(e)}")
+
+
+@router.post("/generate_batch", response_model=List[FormatBatchResult])
+async def generate_batch(request: FormatBatchRequest) -> List[FormatBatchResult]:
+    """Format many pieces of content concurrently.
+
+    At most `config.FORMATTER_BATCH_CONCURRENCY` Gemini calls run at the same time. A failing
+    item does not fail the batch; its error is reported in its result instead.
+
+    Args:
+        request (FormatBatchRequest): Request object containing the prompts to format.
+
+    Returns:
+        List[FormatBatchResult]: One result per prompt, in the order the prompts were given.
+
+    Raises:
+        HTTPException: 413 error if the batch holds more than `config.FORMATTER_BATCH_MAX_ITEMS`
+                      prompts.
+    """
+    if len(request.requests) > config.FORMATTER_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may hold at most {config.FORMATTER_BATCH_MAX_ITEMS} requests"
+        )
+
+    semaphore = asyncio.Semaphore(config.FORMATTER_BATCH_CONCURRENCY)
+
+    async def _format_item(index: int, item: FormatRequest) -> FormatBatchResult:
+        async with semaphore:
+            try:
+                return FormatBatchResult(index=index, result=await _format(item.prompt))
+            except Exception as e:
+                logger.error(f"Error formatting batch item {index}: {str(e)}")
+                return FormatBatchResult(index=index, error=f"Error generating recipes: {str(e)}")
+
+    return await asyncio.gather(*(_format_item(index, item) for index, item in enumerate(request.requests)))
@@ -0,0 +1,42 @@
+"""
+Health Router
+
+This module serves the probes used by orchestrators. `/health` answers as soon as the server
+accepts connections; `/ready` answers 200 only once the startup warm-up has built the research
+agents and API clients, so no request is routed to an instance that would still pay for them.
+"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+async def get_health() -> dict:
+    """
+    Liveness probe.
+
+    Returns:
+        dict: `{"status": "ok"}` while the server is running
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def get_ready(request: Request) -> JSONResponse:
+    """
+    Readiness probe.
+
+    Args:
+        request (Request): The request, giving access to the application's warm-up
+
+    Returns:
+        JSONResponse: The warm-up status with each step's duration; status code 200 once every
+            step has finished, 503 while warming up or after a step failed
+    """
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:
+        return JSONResponse({"status": "ready", "seconds": 0.0, "steps": {}})
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
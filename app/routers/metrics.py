@@ -0,0 +1,24 @@
+"""
+Metrics Router
+
+This module serves the process metrics in the Prometheus text exposition format, for scraping by
+Prometheus or any compatible collector.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Get the process metrics.
+
+    Returns:
+        PlainTextResponse: Latency histograms per stage, token, cache and error counters, and
+            the number of research runs in flight, in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
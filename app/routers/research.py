@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from app.services.agent_service import get_research_agent_service
-from app.models.scheema import ResearchRequest, ResearchResponse
-from typing import Dict, Any
+from app.services.agent_pool import PoolSaturatedError
+from app.services.job_queue import get_job_store
+from app.services.research_events import RunCancelledError
+from app.models.scheema import ResearchJob, ResearchRequest, ResearchResponse
+from app.utils import config, profiler
+from app.utils.run_context import DeadlineExceededError
+from typing import AsyncIterator, Dict, Any, Optional
+import json
 
 router = APIRouter(
     prefix="/api/research",
@@ -13,27 +20,211 @@ router = APIRouter(
 @router.post("/run", response_model=ResearchResponse)
 async def run_research_agent(
         request: ResearchRequest,
+        http_request: Request,
+        response: Response,
+        cache_control: Optional[str] = Header(None),
+        x_request_timeout: Optional[float] = Header(None, gt=0),
+        x_profile: Optional[str] = Header(None),
         agent_service=Depends(get_research_agent_service)
 ) -> ResearchResponse:
     """
     Run the research agent to investigate the provided query.
 
     This endpoint processes a research query and returns findings from the research agent.
+    The agent run executes on a pooled worker thread, so the event loop stays free while
+    the agent works. Recent responses for the same query are served from the cache unless
+    the request asks for "no-cache" or "no-store".
+
+    The run must finish within the request's deadline; when time runs short, the agent
+    answers from what it has found so far. If the client disconnects, the run is cancelled
+    unless other requests are waiting for it.
+
+    A request carrying the admin profiling token in `X-Profile`, or drawn at the profiling
+    sampling rate, is profiled; the id of its profile is returned in `X-Profile-Id`.
 
     Args:
         request (ResearchRequest): The request object containing the query
+        http_request (Request): The underlying HTTP request, used to detect disconnects
+        response (Response): The response, used to return the profile id
+        cache_control (Optional[str]): `Cache-Control` request header, used when the body
+            sets no `cache_control`
+        x_request_timeout (Optional[float]): `X-Request-Timeout` request header in seconds,
+            used when the body sets no `deadline_seconds`
+        x_profile (Optional[str]): `X-Profile` request header with the admin profiling token
         agent_service: Research agent service injected via dependency
 
     Returns:
         ResearchResponse: Research results including findings and resource links
 
     Raises:
-        HTTPException: 500 error if the research agent encounters any issues
+        HTTPException: 503 error if every agent is busy and the wait queue is full,
+            504 error if the deadline passed before the agent could answer,
+            499 error if the client disconnected,
+            500 error if the research agent encounters any issues
     """
     try:
-        # Run the research agent with the provided query
-        result: ResearchResponse = agent_service.run_research(request.query)
+        with profiler.profile_request("research", x_profile) as profile:
+            if profile is not None:
+                response.headers["X-Profile-Id"] = profile.id
+            # Run the research agent with the provided query
+            result: ResearchResponse = await agent_service.run_research_async(
+                request.query,
+                cache_control=request.cache_control or cache_control,
+                deadline_seconds=request.deadline_seconds or x_request_timeout,
+                is_disconnected=http_request.is_disconnected
+            )
         return result
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=f"Research agents are busy: {str(e)}")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=f"Research deadline exceeded: {str(e)}")
+    except RunCancelledError as e:
+        raise HTTPException(status_code=499, detail=f"Research run cancelled: {str(e)}")
     except Exception as e:
         # Raise a 500 error if the research agent encounters any issues
-        raise HTTPException(status_code=500, detail=f"Error running research agent: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error running research agent: {str(e)}")
+
+
+@router.post("/stream")
+async def stream_research_agent(
+        request: ResearchRequest,
+        http_request: Request,
+        cache_control: Optional[str] = Header(None),
+        x_request_timeout: Optional[float] = Header(None, gt=0),
+        agent_service=Depends(get_research_agent_service)
+) -> StreamingResponse:
+    """
+    Run the research agent and stream its progress as Server-Sent Events.
+
+    The stream emits "queued" and "started" events, then a "tool_call", "observation" and
+    "step" event for every agent step, and finally a "result" event carrying the
+    `ResearchResponse` fields. "heartbeat" events keep idle connections alive. When the
+    client disconnects, the agent stops after its current step. A "deadline" event reports
+    that the deadline cut the research short.
+
+    Args:
+        request (ResearchRequest): The request object containing the query
+        http_request (Request): The underlying HTTP request, used to detect disconnects
+        cache_control (Optional[str]): `Cache-Control` request header, used when the body
+            sets no `cache_control`
+        x_request_timeout (Optional[float]): `X-Request-Timeout` request header in seconds,
+            used when the body sets no `deadline_seconds`
+        agent_service: Research agent service injected via dependency
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response
+
+    Raises:
+        HTTPException: 503 error if every agent is busy and the wait queue is full
+    """
+    try:
+        events = await agent_service.open_stream(
+            request.query,
+            cache_control=request.cache_control or cache_control,
+            heartbeat_interval=config.STREAM_HEARTBEAT_INTERVAL,
+            deadline_seconds=request.deadline_seconds or x_request_timeout
+        )
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=f"Research agents are busy: {str(e)}")
+
+    async def _sse() -> AsyncIterator[str]:
+        try:
+            async for item in events:
+                if await http_request.is_disconnected():
+                    break
+                yield f"event: {item['event']}\ndata: {json.dumps(item['data'], default=str)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            # Closing the event iterator cancels the agent run
+            await events.aclose()
+
+    return StreamingResponse(
+        _sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# The job endpoints are plain functions: FastAPI runs them on its thread pool, so waiting
+# for a SQLite lock held by a job worker does not block the event loop
+@router.post("/jobs", response_model=ResearchJob, status_code=202)
+def create_research_job(
+        request: ResearchRequest,
+        cache_control: Optional[str] = Header(None),
+        job_store=Depends(get_job_store)
+) -> ResearchJob:
+    """
+    Queue a research run and return its job id immediately.
+
+    Jobs run with the server's default deadline (`RESEARCH_DEADLINE`) per attempt;
+    `deadline_seconds` only applies to `/run` and `/stream`.
+
+    Args:
+        request (ResearchRequest): The request object containing the query
+        cache_control (Optional[str]): `Cache-Control` request header, used when the body
+            sets no `cache_control`
+        job_store: Research job store injected via dependency
+
+    Returns:
+        ResearchJob: The queued job
+    """
+    return job_store.enqueue(request.query, request.cache_control or cache_control)
+
+
+@router.get("/jobs/{job_id}", response_model=ResearchJob)
+def get_research_job(job_id: str, job_store=Depends(get_job_store)) -> ResearchJob:
+    """
+    Get the status, and once finished the result, of a research job.
+
+    Args:
+        job_id (str): The job id returned when the job was created
+        job_store: Research job store injected via dependency
+
+    Returns:
+        ResearchJob: The job
+
+    Raises:
+        HTTPException: 404 error if the job does not exist
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Research job '{job_id}' not found")
+    return job
+
+
+@router.delete("/jobs/{job_id}", response_model=ResearchJob)
+def cancel_research_job(job_id: str, job_store=Depends(get_job_store)) -> ResearchJob:
+    """
+    Cancel a queued or running research job.
+
+    A running agent stops after its current step. Finished jobs are returned unchanged.
+
+    Args:
+        job_id (str): The job id returned when the job was created
+        job_store: Research job store injected via dependency
+
+    Returns:
+        ResearchJob: The job after cancellation
+
+    Raises:
+        HTTPException: 404 error if the job does not exist
+    """
+    job = job_store.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Research job '{job_id}' not found")
+    return job
+
+
+@router.get("/stats")
+async def research_stats(agent_service=Depends(get_research_agent_service)) -> Dict[str, Any]:
+    """
+    Get runtime counters for the research service.
+
+    Args:
+        agent_service: Research agent service injected via dependency
+
+    Returns:
+        Dict[str, Any]: Counters such as coalesced and leading research runs
+    """
+    return agent_service.stats()
\ No newline at end of file
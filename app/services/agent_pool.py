@@ -0,0 +1,124 @@
+"""
+Research Agent Pool
+
+This module provides a fixed-size pool of independent research agents.
+
+A `CodeAgent` keeps per-run memory on the instance, so a single agent must never serve two
+runs at the same time. The pool owns `size` agents and a worker thread per agent: a run checks
+out an agent, executes on a worker thread (never on the event loop), and returns the agent to
+the pool when it finishes.
+
+At most `max_queue` runs may wait for a free agent. Once that limit is reached, `submit`
+raises `PoolSaturatedError` immediately instead of letting the backlog grow without bound.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when every agent is busy and the wait queue is full."""
+
+
+class AgentPool:
+    """
+    A bounded pool of research agents executed on worker threads.
+
+    Attributes:
+        size (int): Number of agents (and worker threads) in the pool.
+        max_queue (int): Number of runs allowed to wait for a free agent.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int, max_queue: int) -> None:
+        """
+        Build the pool.
+
+        Args:
+            factory (Callable[[], Any]): Callable returning a new, independent agent.
+            size (int): Number of agents to build.
+            max_queue (int): Number of runs allowed to wait for a free agent.
+        """
+        if size < 1:
+            raise ValueError("Agent pool size must be at least 1")
+
+        self.size = size
+        self.max_queue = max(0, max_queue)
+        self._agents: "queue.Queue[Any]" = queue.Queue()
+        for _ in range(size):
+            self._agents.put(factory())
+
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="research-agent")
+        # One slot per running or waiting run
+        self._slots = threading.BoundedSemaphore(size + self.max_queue)
+
+    def submit(self, fn: Callable[[Any], T], on_accepted: Optional[Callable[[], None]] = None) -> "Future[T]":
+        """
+        Schedule `fn(agent)` on a worker thread with an exclusively checked-out agent.
+
+        Args:
+            fn (Callable[[Any], T]): Function receiving the agent for the duration of the run.
+            on_accepted (Optional[Callable[[], None]]): Called once the run has a place in the
+                pool, before it is scheduled; not called when the pool is saturated.
+
+        Returns:
+            Future[T]: Future resolved with the return value of `fn`.
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturatedError(
+                f"All {self.size} research agents are busy and {self.max_queue} runs are already waiting"
+            )
+
+        queued = time.monotonic()
+
+        def _run() -> T:
+            agent = self._agents.get()
+            metrics.QUEUE_SECONDS.observe(time.monotonic() - queued)
+            try:
+                return fn(agent)
+            finally:
+                self._agents.put(agent)
+
+        try:
+            if on_accepted is not None:
+                on_accepted()
+            future = self._executor.submit(_run)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn: Callable[[Any], T]) -> T:
+        """
+        Run `fn(agent)` on a worker thread and await its result without blocking the event loop.
+
+        Args:
+            fn (Callable[[Any], T]): Function receiving the agent for the duration of the run.
+
+        Returns:
+            T: The return value of `fn`.
+        """
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting work and release the worker threads.
+
+        Args:
+            wait (bool): Whether to wait for running work to finish.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
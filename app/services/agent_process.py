@@ -0,0 +1,354 @@
+"""
+Research Agent Worker Processes
+
+A research run does CPU work in the server process: the agent's model-generated Python runs in
+smolagents' local executor, and large tool outputs are parsed and compacted. That work holds
+the GIL and slows every other request of the worker. With `config.AGENT_EXECUTION_MODE` set to
+"process", runs execute in worker processes instead, so one server process can use every core.
+
+A `WorkerProcess` is the server-side handle of one worker process. The `AgentPool` holds the
+handles in place of agents: a run checks out a handle, and the handle sends the run to its
+process and waits for the answer on a thread of the server. Each worker process:
+
+* builds its own research agent once, when it starts, and reuses it for every run
+* executes one run at a time, through the same code path as thread mode, so deadlines, forced
+  answers, cancellation and progress events behave the same
+* may be capped to `memory_mb` of address space, and each run to `cpu_seconds` of CPU time.
+  Past the memory cap allocations fail with `MemoryError`, which the worker reports before
+  exiting; past the CPU cap the kernel sends SIGXCPU, which kills the worker. Either way the
+  run fails and the worker is restarted
+* is replaced by a fresh process after `max_runs` runs, so memory creep cannot accumulate
+
+Metrics recorded inside a run (model, tool and run timings) stay in the worker process and are
+not exported by the server's `/metrics`; the wait for a free worker is. A profiled request
+samples only the server thread waiting for its worker.
+
+Example:
+
+    >>> worker = WorkerProcess(max_runs=50)
+    >>> worker.wait_ready()
+    >>> worker.run("solar panel efficiency", deadline=time.monotonic() + 300)
+"""
+
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.run_context import RunCancelledError
+
+logger = logging.getLogger(__name__)
+
+# Worker processes are spawned: forking a server with running threads is unsafe
+_CONTEXT = multiprocessing.get_context("spawn")
+
+# Seconds between checks for cancellation and worker exit while a run is in flight
+POLL_INTERVAL = 0.1
+
+
+class WorkerExitedError(RuntimeError):
+    """Raised when a worker process exits during a run, e.g. after exceeding a resource limit."""
+
+
+class WorkerProcess:
+    """
+    Handle of one research worker process.
+
+    Attributes:
+        max_runs (int): Runs after which the process is replaced; 0 or less never replaces it.
+        memory_mb (int): Address space limit of the process in megabytes; 0 or less for none.
+        cpu_seconds (float): CPU time limit of each run in seconds; 0 or less for none.
+        start_timeout (float): Seconds allowed for a new process to build its agent.
+        agent_factory (Optional[Callable[[], Any]]): Picklable callable building the process's
+            agent; None for a research agent.
+        runs (int): Runs executed by the current process.
+        restarts (int): Processes replaced so far, recycled or crashed.
+    """
+
+    def __init__(
+            self,
+            max_runs: int = 50,
+            memory_mb: int = 0,
+            cpu_seconds: float = 0,
+            start_timeout: float = 120,
+            agent_factory: Optional[Callable[[], Any]] = None
+    ) -> None:
+        self.max_runs = max_runs
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.start_timeout = start_timeout
+        self.agent_factory = agent_factory
+        self.runs = 0
+        self.restarts = 0
+        self._process = None
+        self._conn = None
+        self._cancel = None
+        self._ready = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._spawn()
+
+    def _spawn(self) -> None:
+        """Start a new worker process; it builds its agent in the background."""
+        self._conn, child_conn = _CONTEXT.Pipe()
+        self._cancel = _CONTEXT.Event()
+        self._process = _CONTEXT.Process(
+            target=_worker_main,
+            args=(child_conn, self._cancel, self.memory_mb, self.agent_factory),
+            name="research-worker",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._ready = False
+        self.runs = 0
+
+    def _replace(self) -> None:
+        """Stop the current process and start a new one, unless the worker is closed."""
+        self._stop()
+        if self._closed:
+            return
+        self.restarts += 1
+        self._spawn()
+
+    def _stop(self, timeout: float = 5) -> None:
+        """Ask the current process to exit, killing it if it does not."""
+        try:
+            self._conn.send(("stop", None))
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+
+    def wait_ready(self) -> None:
+        """
+        Wait until the process has built its agent.
+
+        Raises:
+            WorkerExitedError: If the process exits or fails to start in time.
+        """
+        if self._closed:
+            raise WorkerExitedError("Research worker is closed")
+        if self._ready:
+            return
+        if not self._conn.poll(self.start_timeout):
+            raise WorkerExitedError(f"Research worker did not start within {self.start_timeout}s")
+        try:
+            kind, payload = self._conn.recv()
+        except EOFError:
+            self._process.join()
+            raise WorkerExitedError(f"Research worker exited while starting (exit code {self._process.exitcode})")
+        if kind != "ready":
+            raise WorkerExitedError(f"Research worker failed to start: {payload}")
+        self._ready = True
+
+    def run(
+            self,
+            query: str,
+            cache_key: Optional[str] = None,
+            cancel: Optional[threading.Event] = None,
+            deadline: Optional[float] = None,
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+            raise_errors: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Execute one research run in the worker process.
+
+        Args:
+            query (str): The topic to research
+            cache_key (Optional[str]): Key to cache the response under, or None
+            cancel (Optional[threading.Event]): When set, the run stops after the current step
+            deadline (Optional[float]): `time.monotonic()` value by which the answer is due
+            on_event (Optional[Callable]): Receives the run's progress events
+            raise_errors (bool): Raise agent errors instead of returning an error response
+
+        Returns:
+            Dict[str, Any]: Research results including research_data and resource_links
+
+        Raises:
+            Exception: The run's exception, as raised in the worker; `WorkerExitedError` if
+                the worker exited and `raise_errors` is set
+        """
+        with self._lock:
+            try:
+                self.wait_ready()
+                self._cancel.clear()
+                self._conn.send(("run", {
+                    "query": query,
+                    "cache_key": cache_key,
+                    # Monotonic clocks are not comparable across processes; send the time left
+                    "remaining": None if deadline is None else deadline - time.monotonic(),
+                    "stream": on_event is not None,
+                    "raise_errors": raise_errors,
+                    "cpu_seconds": self.cpu_seconds,
+                }))
+                kind, payload = self._receive(cancel, on_event)
+            except WorkerExitedError as e:
+                logger.error(f"Research worker failed: {str(e)}")
+                self._replace()
+                if raise_errors:
+                    raise
+                return {"research_data": f"Error running research agent: {str(e)}", "resource_links": []}
+
+            self.runs += 1
+            if self.max_runs > 0 and self.runs >= self.max_runs:
+                logger.info(f"Recycling research worker after {self.runs} runs")
+                self._replace()
+
+        if kind == "error":
+            raise payload
+        return payload
+
+    def _receive(
+            self,
+            cancel: Optional[threading.Event],
+            on_event: Optional[Callable[[Dict[str, Any]], None]]
+    ) -> Any:
+        """Relay progress events and cancellation until the run's outcome arrives."""
+        while True:
+            if cancel is not None and cancel.is_set():
+                self._cancel.set()
+            if not self._conn.poll(POLL_INTERVAL):
+                if not self._process.is_alive():
+                    raise WorkerExitedError(f"Research worker exited during the run (exit code {self._process.exitcode})")
+                continue
+            try:
+                kind, payload = self._conn.recv()
+            except EOFError:
+                self._process.join()
+                raise WorkerExitedError(f"Research worker exited during the run (exit code {self._process.exitcode})")
+            if kind == "event":
+                if on_event is not None:
+                    on_event(payload)
+                continue
+            if kind == "fatal":
+                self._process.join()
+                raise WorkerExitedError(f"Research worker exited during the run: {payload}")
+            return kind, payload
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the worker's counters.
+
+        Returns:
+            Dict[str, Any]: Process id, runs by the current process and processes replaced.
+        """
+        return {"pid": self._process.pid, "runs": self.runs, "restarts": self.restarts}
+
+    def close(self) -> None:
+        """Stop the worker process, cancelling the run in flight, if any."""
+        self._closed = True
+        self._cancel.set()
+        self._stop()
+
+
+def _picklable(error: BaseException) -> BaseException:
+    """Get an exception that can be sent to the server, falling back to its message."""
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {str(error)}")
+
+
+def _limit_memory(memory_mb: int) -> None:
+    """
+    Cap the address space of the current process, where the platform supports it.
+
+    Allocations beyond the cap fail with `MemoryError` instead of the process being killed.
+    """
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        logger.warning("Worker memory limits are not supported on this platform")
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+
+
+def _limit_cpu(cpu_seconds: float) -> None:
+    """
+    Allow the current process `cpu_seconds` more CPU time, where the platform supports it.
+
+    Past the limit the kernel sends SIGXCPU, whose default action terminates the process.
+    """
+    if cpu_seconds <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+
+def _worker_main(conn: Any, cancel: Any, memory_mb: int, agent_factory: Optional[Callable[[], Any]] = None) -> None:
+    """
+    Entry point of a worker process: build an agent, then execute runs until told to stop.
+
+    Args:
+        conn (Connection): Pipe to the server.
+        cancel (Event): Set by the server to cancel the run in flight.
+        memory_mb (int): Address space limit in megabytes; 0 or less for none.
+        agent_factory (Optional[Callable[[], Any]]): Builds the agent; None for a research agent.
+    """
+    try:
+        _serve(conn, cancel, memory_mb, agent_factory)
+    except (EOFError, OSError):
+        # The server closed the pipe, e.g. while shutting down
+        return
+
+
+def _serve(conn: Any, cancel: Any, memory_mb: int, agent_factory: Optional[Callable[[], Any]] = None) -> None:
+    """Build the worker's agent and execute the runs received through `conn`."""
+    from app.services.agent_service import ResearchAgentService
+
+    _limit_memory(memory_mb)
+    try:
+        service = ResearchAgentService(execution_mode="thread", pool_size=1, max_queue=0, agent_factory=agent_factory)
+    except Exception as e:
+        conn.send(("failed", f"{type(e).__name__}: {str(e)}"))
+        return
+    conn.send(("ready", None))
+
+    def emit(item: Dict[str, Any]) -> None:
+        conn.send(("event", item))
+
+    while True:
+        kind, payload = conn.recv()
+        if kind == "stop":
+            return
+
+        _limit_cpu(payload["cpu_seconds"])
+        deadline = None if payload["remaining"] is None else time.monotonic() + payload["remaining"]
+        try:
+            if cancel.is_set():
+                raise RunCancelledError("Research run cancelled")
+            result = service.pool.submit(
+                lambda agent: service._execute(
+                    agent,
+                    payload["query"],
+                    cache_key=payload["cache_key"],
+                    on_event=emit if payload["stream"] else None,
+                    cancel=cancel,
+                    deadline=deadline,
+                    raise_errors=payload["raise_errors"],
+                )
+            ).result()
+            conn.send(("result", result))
+        except MemoryError:
+            # The process may be left inconsistent; report the failure and exit to be replaced
+            conn.send(("fatal", "out of memory"))
+            return
+        except Exception as e:
+            conn.send(("error", _picklable(e)))
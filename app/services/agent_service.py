@@ -4,11 +4,13 @@ Research Agent Service
 This module provides a service for running a research agent to investigate a given query.
 
 The service is designed to be used as a singleton, with a single instance created and cached
-using the `lru_cache` decorator. This ensures that the agent is only created once, and that
-subsequent calls to the service will reuse the same instance.
+using the `lru_cache` decorator. The instance owns an `AgentPool` of independent research agents,
+so concurrent requests each get their own agent and never share agent memory.
 
-The service provides a single method, `run_research`, which takes a query string as input and
-returns a dictionary containing the research results. The dictionary will have two keys:
+The service provides `run_research`, which takes a query string as input and returns a dictionary
+containing the research results, and `run_research_async`, which does the same from a coroutine
+without blocking the event loop. `open_stream` runs the agent the same way and yields progress
+events for every step while it works. The result dictionary will have two keys:
 
 * `research_data`: a string containing the compiled research findings
 * `resource_links`: a list of strings containing links to sources used in the research
@@ -19,67 +21,617 @@ dictionary containing the research results.
 
 The service also provides some basic error handling, catching any exceptions raised by the agent
 and returning a structured error response.
+
+Every run has a deadline, `config.RESEARCH_DEADLINE` seconds unless the caller asks for another.
+The deadline caps the timeout of every tool request and model call made by the run. When the
+time left is too short for another agent step, the agent is made to answer from what it has
+gathered so far, within `config.RESEARCH_FINAL_ANSWER_RESERVE` seconds kept for that purpose.
+
+With `config.QUERY_ROUTING_ENABLED`, each query is classified into a tier
+(`app.agents.query_router`) that sets the run's model, step budget, token limit and prompt
+variant. Once a run has the sources its tier requires, the agent is told to answer.
+
+With `config.PREFETCH_ENABLED`, the web and news searches for the query start as soon as a run
+is submitted, and their results are written into the agent's task (`app.services.prefetch`).
+
+With `config.AGENT_EXECUTION_MODE` set to "process", the pool holds handles of worker processes
+(`app.services.agent_process`) instead of agents, and every run executes in a worker process.
 """
 
+import asyncio
 import json
+import logging
 import os
-from typing import Dict, Any, List
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple
 from functools import lru_cache
 from dotenv import load_dotenv
-from app.agents.agent_research import create_research_agent
+from app.agents.query_router import QueryTier, get_query_router
 from app.prompts.agent_prompt import AgentPrompt
-from app.utils import config
+from app.services.agent_pool import AgentPool
+from app.services.agent_process import WorkerProcess
+from app.services.coalescer import create_single_flight
+from app.services.prefetch import Prefetch, Prefetcher, create_prefetcher
+from app.services.research_events import RunCancelledError, event, step_events
+from app.utils import config, metrics, profiler, rate_limit, search_backends
+from app.utils.cache import cache_key, canonical_query, get_research_cache
+from app.utils.corpus_index import get_corpus_index
+from app.utils.run_context import DeadlineExceededError, current_run, run_scope
+
+if TYPE_CHECKING:
+    from smolagents import CodeAgent
 # Load environment variables
 load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
 class ResearchAgentService:
     """
-    A service for running a research agent to investigate a given query.
+    A service for running research agents to investigate a given query.
 
     The service is designed to be used as a singleton, with a single instance created and cached
-    using the `lru_cache` decorator. This ensures that the agent is only created once, and that
-    subsequent calls to the service will reuse the same instance.
+    using the `lru_cache` decorator. The instance owns a pool of `config.AGENT_POOL_SIZE`
+    independent agents; each run checks out one agent exclusively and executes on a worker thread,
+    or in a worker process in "process" execution mode. Concurrent requests for the same
+    normalized query share a single run, and finished responses are cached for
+    `config.RESEARCH_CACHE_TTL` seconds.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+            self,
+            execution_mode: Optional[str] = None,
+            pool_size: Optional[int] = None,
+            max_queue: Optional[int] = None,
+            agent_factory: Optional[Callable[[], Any]] = None
+    ) -> None:
         """
         Initialize the service.
 
-        This method is only called once, when the service is first created. It sets up the
-        research agent and caches it for subsequent use.
+        This method is only called once, when the service is first created. It builds the
+        pool of research agents and caches it for subsequent use.
+
+        Args:
+            execution_mode (Optional[str]): "thread" or "process"; defaults to
+                `config.AGENT_EXECUTION_MODE`
+            pool_size (Optional[int]): Number of agents; defaults to `config.AGENT_POOL_SIZE`
+            max_queue (Optional[int]): Runs allowed to wait for a free agent; defaults to
+                `config.AGENT_QUEUE_DEPTH`
+            agent_factory (Optional[Callable[[], Any]]): Builds the pooled agents, in the worker
+                processes in "process" mode, where it must be picklable; defaults to research
+                agents
         """
         # Get the API key from environment variables
         self.serper_api_key = config.SERPER_API_KEY
         self.openai_api_key = config.GEMINI_API_KEY
 
-        # Initialize the research agent
-        self.agent = create_research_agent(
-            model_name="gemini/gemini-2.0-flash",
+        self.execution_mode = execution_mode or config.AGENT_EXECUTION_MODE
+        if self.execution_mode not in ("thread", "process"):
+            raise ValueError(f"Unknown agent execution mode '{self.execution_mode}', expected 'thread' or 'process'")
+        self.agent_factory = agent_factory
+
+        # Query tiers, and each agent's model for every tier it has served
+        self.router = get_query_router()
+        self._tier_models: Dict[Tuple[int, str], Any] = {}
+        self._tier_models_lock = threading.Lock()
+
+        # Speculative searches run where the agents run, i.e. in the workers in process mode
+        self.prefetcher: Optional[Prefetcher] = None
+        if config.PREFETCH_ENABLED and self.execution_mode == "thread":
+            self.prefetcher = create_prefetcher(
+                self.serper_api_key,
+                crawl_top_k=config.PREFETCH_CRAWL_TOP_K,
+                timeout=config.PREFETCH_TIMEOUT
+            )
+
+        # Initialize the pool of research agents, or of the worker processes running them
+        self._workers: List[WorkerProcess] = []
+        self.pool = AgentPool(
+            factory=self._create_worker if self.execution_mode == "process" else (agent_factory or self._create_agent),
+            size=config.AGENT_POOL_SIZE if pool_size is None else pool_size,
+            max_queue=config.AGENT_QUEUE_DEPTH if max_queue is None else max_queue
+        )
+        # The workers build their agents in parallel; wait until all of them can take runs
+        for worker in self._workers:
+            worker.wait_ready()
+
+        # Coalesce identical queries that are in flight at the same time
+        self.single_flight = create_single_flight(
+            rule=config.COALESCE_KEY_RULE,
+            enabled=config.COALESCE_ENABLED
+        )
+
+        # Cache of finished research responses
+        self.cache = get_research_cache()
+        self.cache_ttl = config.RESEARCH_CACHE_TTL
+
+        # Cancellation events of the coalesced runs in flight
+        self._cancels: Dict[Future, threading.Event] = {}
+        self._cancels_lock = threading.Lock()
+
+    def _create_agent(self) -> "CodeAgent":
+        """
+        Build one independent research agent for the pool.
+
+        Returns:
+            CodeAgent: A configured research agent
+        """
+        # smolagents and LiteLLM take seconds to import; only load them once agents are built
+        from app.agents.agent_research import create_research_agent
+
+        return create_research_agent(
+            model_name=config.RESEARCH_MODEL,
             temperature=0.2,
             serper_api_key=self.serper_api_key,
+            api_base=config.LLM_API_BASE,
             max_token=8000
         )
 
-    def run_research(self, query: str) -> Dict[str, Any]:
+    def _create_worker(self) -> WorkerProcess:
+        """
+        Start one research worker process for the pool.
+
+        Returns:
+            WorkerProcess: Handle of the worker process, still building its agent
+        """
+        worker = WorkerProcess(
+            max_runs=config.AGENT_PROCESS_MAX_RUNS,
+            memory_mb=config.AGENT_PROCESS_MEMORY_MB,
+            cpu_seconds=config.AGENT_PROCESS_CPU_SECONDS,
+            start_timeout=config.AGENT_PROCESS_START_TIMEOUT,
+            agent_factory=self.agent_factory
+        )
+        self._workers.append(worker)
+        return worker
+
+    def run_research(
+            self,
+            query: str,
+            cache_control: Optional[str] = None,
+            deadline_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Run the research agent to investigate the provided query.
 
+        Blocks the calling thread until a pooled agent has finished the run. Use
+        `run_research_async` from a coroutine.
+
+        Args:
+            query (str): The topic to research
+            cache_control (Optional[str]): Cache directives ("no-cache", "no-store")
+            deadline_seconds (Optional[float]): Time limit for the run; defaults to
+                `config.RESEARCH_DEADLINE`
+
+        Returns:
+            Dict[str, Any]: Research results including research_data and resource_links
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+            DeadlineExceededError: If the deadline passed before the agent could answer
+        """
+        return self.submit(query, cache_control, deadline_seconds).result()
+
+    async def run_research_async(
+            self,
+            query: str,
+            cache_control: Optional[str] = None,
+            deadline_seconds: Optional[float] = None,
+            is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the research agent on a worker thread without blocking the event loop.
+
+        While waiting, the caller stops at its deadline, and every
+        `config.DISCONNECT_POLL_INTERVAL` seconds checks `is_disconnected`. A caller that stops
+        early leaves the run, and the run is cancelled once no caller waits for it anymore.
+
+        Args:
+            query (str): The topic to research
+            cache_control (Optional[str]): Cache directives ("no-cache", "no-store")
+            deadline_seconds (Optional[float]): Time limit for the run; defaults to
+                `config.RESEARCH_DEADLINE`
+            is_disconnected (Optional[Callable[[], Awaitable[bool]]]): Reports whether the
+                client went away, e.g. `Request.is_disconnected`
+
+        Returns:
+            Dict[str, Any]: Research results including research_data and resource_links
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+            DeadlineExceededError: If the deadline passed before the agent could answer
+            RunCancelledError: If the client disconnected
+        """
+        deadline = _deadline_at(deadline_seconds)
+        # A SQLite cache lookup is blocking I/O; keep it off the event loop
+        cached, store_key = await asyncio.to_thread(self._lookup_cache, query, cache_control)
+        if cached is not None:
+            return cached
+        future = self._join_or_start(query, store_key, deadline_seconds)
+        # asyncio.wait never cancels the shared run, which other callers may be waiting for
+        waiter = asyncio.wrap_future(future)
+        try:
+            while True:
+                timeout = config.DISCONNECT_POLL_INTERVAL
+                if deadline is not None:
+                    # Give the run a moment past the deadline to deliver its forced answer
+                    timeout = min(timeout, max(0.0, deadline + 1.0 - time.monotonic()))
+                done, _ = await asyncio.wait({waiter}, timeout=timeout)
+                if done:
+                    return waiter.result()
+                if deadline is not None and time.monotonic() >= deadline + 1.0:
+                    raise DeadlineExceededError("Research deadline exceeded")
+                if is_disconnected is not None and await is_disconnected():
+                    raise RunCancelledError("Client disconnected")
+        finally:
+            if not future.done():
+                # Nobody reads this caller's copy of the outcome anymore
+                waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+                self.leave(query, future)
+
+    def submit(
+            self,
+            query: str,
+            cache_control: Optional[str] = None,
+            deadline_seconds: Optional[float] = None
+    ) -> Future:
+        """
+        Serve a cached response, join an identical run already in flight, or start a new run.
+
+        A caller joining a run in flight shares the deadline of the caller that started it.
+
+        Args:
+            query (str): The topic to research
+            cache_control (Optional[str]): Cache directives. "no-cache" skips the cached
+                response and refreshes it; "no-store" neither reads nor writes the cache.
+            deadline_seconds (Optional[float]): Time limit for the run; defaults to
+                `config.RESEARCH_DEADLINE`
+
+        Returns:
+            Future: Future resolved with the research results
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+        """
+        cached, store_key = self._lookup_cache(query, cache_control)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        return self._join_or_start(query, store_key, deadline_seconds)
+
+    def _join_or_start(
+            self,
+            query: str,
+            store_key: Optional[str],
+            deadline_seconds: Optional[float]
+    ) -> Future:
+        """
+        Join an identical run already in flight, or start a new run.
+
+        Args:
+            query (str): The topic to research
+            store_key (Optional[str]): Cache key to store the response under, from
+                `_lookup_cache`
+            deadline_seconds (Optional[float]): Time limit for the run; defaults to
+                `config.RESEARCH_DEADLINE`
+
+        Returns:
+            Future: Future resolved with the research results
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+        """
+        deadline = _deadline_at(deadline_seconds)
+        # A profiled request has the pool thread running its agent sampled
+        profile = profiler.current_profile()
+
+        def start() -> Future:
+            cancel = threading.Event()
+            started = self._start(query, store_key, cancel, deadline, profile=profile)
+            with self._cancels_lock:
+                self._cancels[started] = cancel
+            started.add_done_callback(self._forget_cancel)
+            return started
+
+        return self.single_flight.submit(query, start)
+
+    def leave(self, query: str, future: Future) -> None:
+        """
+        Stop waiting for a run returned by `submit`, cancelling it if no caller is left.
+
+        Args:
+            query (str): The topic passed to `submit`
+            future (Future): The future returned by `submit`
+        """
+        if not self.single_flight.leave(query, future):
+            return
+        with self._cancels_lock:
+            cancel = self._cancels.get(future)
+        if cancel is not None:
+            logger.info("Cancelling research run: no caller is waiting for it")
+            cancel.set()
+        future.cancel()
+
+    def start_run(
+            self,
+            query: str,
+            cache_control: Optional[str] = None,
+            cancel: Optional[threading.Event] = None,
+            deadline_seconds: Optional[float] = None
+    ) -> Future:
+        """
+        Start a dedicated research run that its caller can cancel.
+
+        Unlike `submit`, the run is never shared with other callers, so setting `cancel` only
+        affects this caller, and agent errors propagate through the future instead of being
+        turned into an error response. Used by the job workers.
+
+        Args:
+            query (str): The topic to research
+            cache_control (Optional[str]): Cache directives ("no-cache", "no-store")
+            cancel (Optional[threading.Event]): When set, the run stops after the current step
+            deadline_seconds (Optional[float]): Time limit for the run; defaults to
+                `config.RESEARCH_DEADLINE`
+
+        Returns:
+            Future: Future resolved with the research results
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+        """
+        cached, store_key = self._lookup_cache(query, cache_control)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+
+        deadline = _deadline_at(deadline_seconds)
+        return self._start(query, store_key, cancel, deadline, raise_errors=True)
+
+    async def open_stream(
+            self,
+            query: str,
+            cache_control: Optional[str] = None,
+            heartbeat_interval: float = 15.0,
+            deadline_seconds: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Start a research run and stream its progress events.
+
+        The run is scheduled immediately, so a saturated pool is reported before any event
+        is sent. Streamed runs are not coalesced, because every caller needs its own events.
+        Closing the returned iterator (for example when the client disconnects) cancels the
+        run after its current step and returns the agent to the pool.
+
+        Args:
+            query (str): The topic to research
+            cache_control (Optional[str]): Cache directives ("no-cache", "no-store")
+            heartbeat_interval (float): Seconds without progress after which a "heartbeat"
+                event is emitted
+            deadline_seconds (Optional[float]): Time limit for the run; defaults to
+                `config.RESEARCH_DEADLINE`
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Progress events, ending with a "result" event
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+        """
+        cached, store_key = await asyncio.to_thread(self._lookup_cache, query, cache_control)
+        if cached is not None:
+            return _single_event(event("result", cached=True, **cached))
+
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        cancel = threading.Event()
+        deadline = _deadline_at(deadline_seconds)
+
+        def emit(item: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(events.put_nowait, item)
+
+        future = self._start(query, store_key, cancel, deadline, on_event=emit)
+        future.add_done_callback(lambda _: emit(_STREAM_END))
+
+        async def _events() -> AsyncIterator[Dict[str, Any]]:
+            try:
+                yield event("queued", query=query)
+                while True:
+                    try:
+                        item = await asyncio.wait_for(events.get(), timeout=heartbeat_interval)
+                    except asyncio.TimeoutError:
+                        yield event("heartbeat")
+                        continue
+                    if item is _STREAM_END:
+                        break
+                    yield item
+                yield event("result", cached=False, **future.result())
+            finally:
+                # Stop the agent after its current step if the consumer went away early
+                cancel.set()
+                future.cancel()
+
+        return _events()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get runtime counters for the service.
+
+        Returns:
+            Dict[str, Any]: Coalescing, response cache, rate limiter and search backend counters,
+                the local corpus size, and the worker processes in "process" execution mode
+        """
+        corpus = get_corpus_index()
+        return {
+            "execution_mode": self.execution_mode,
+            "workers": [worker.stats() for worker in self._workers],
+            "coalescing": self.single_flight.stats(),
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "corpus": corpus.stats() if corpus is not None else None,
+            "rate_limits": rate_limit.stats(),
+            "search_backends": search_backends.stats()
+        }
+
+    def _start(
+            self,
+            query: str,
+            cache_key: Optional[str],
+            cancel: Optional[threading.Event],
+            deadline: Optional[float],
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+            raise_errors: bool = False,
+            profile: Optional[profiler.Profile] = None
+    ) -> Future:
+        """
+        Schedule a research run on the pool, in the execution mode of the service.
+
         Args:
             query (str): The topic to research
+            cache_key (Optional[str]): Key to cache the response under, or None
+            cancel (Optional[threading.Event]): When set, the run stops after the current step
+            deadline (Optional[float]): `time.monotonic()` value by which the answer is due
+            on_event (Optional[Callable]): Receives the run's progress events
+            raise_errors (bool): Raise agent errors instead of returning an error response
+            profile (Optional[Profile]): Profile sampling the pool thread during the run
+
+        Returns:
+            Future: Future resolved with the research results
+
+        Raises:
+            PoolSaturatedError: If all agents are busy and the wait queue is full
+        """
+        # The searches run while the run waits for a free agent. They start only once the pool
+        # has accepted the run, so a rejected request spends no search quota
+        prefetches: List[Prefetch] = []
+
+        def start_prefetch() -> None:
+            prefetches.append(self.prefetcher.start(query))
+
+        def run(agent: Any) -> Dict[str, Any]:
+            with profiler.attach(profile):
+                if self.execution_mode == "process":
+                    return agent.run(
+                        query, cache_key=cache_key, cancel=cancel, deadline=deadline,
+                        on_event=on_event, raise_errors=raise_errors
+                    )
+                return self._execute(
+                    agent, query, cache_key=cache_key, on_event=on_event, cancel=cancel,
+                    deadline=deadline, raise_errors=raise_errors,
+                    prefetch=prefetches[0] if prefetches else None
+                )
+
+        return self.pool.submit(run, on_accepted=start_prefetch if self.prefetcher is not None else None)
+
+    def shutdown(self) -> None:
+        """Stop accepting runs and stop the worker processes, if any."""
+        self.pool.shutdown(wait=False)
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        for worker in self._workers:
+            worker.close()
+
+    def _lookup_cache(
+            self,
+            query: str,
+            cache_control: Optional[str]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Apply the cache directives of a request to the response cache.
+
+        Args:
+            query (str): The topic to research
+            cache_control (Optional[str]): Cache directives. "no-cache" skips the cached
+                response and refreshes it; "no-store" neither reads nor writes the cache.
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[str]]: The cached response or None, and
+                the key to store a fresh response under or None if it must not be stored
+        """
+        if self.cache is None:
+            return None, None
+
+        canonical = canonical_query(query)
+        if not canonical:
+            # A query without words would share one entry with every other such query
+            return None, None
+        directives = _cache_directives(cache_control)
+        key = cache_key("research", canonical)
+        if not directives & {"no-cache", "no-store"}:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, None
+        return None, (None if "no-store" in directives else key)
+
+    def _execute(
+            self,
+            agent: "CodeAgent",
+            query: str,
+            cache_key: Optional[str] = None,
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+            cancel: Optional[threading.Event] = None,
+            deadline: Optional[float] = None,
+            raise_errors: bool = False,
+            prefetch: Optional[Prefetch] = None
+    ) -> Dict[str, Any]:
+        """
+        Run one research task on an agent checked out from the pool.
+
+        Args:
+            agent (CodeAgent): The agent exclusively assigned to this run
+            query (str): The topic to research
+            cache_key (Optional[str]): Key under which a successful response is cached,
+                or None to skip caching
+            on_event (Optional[Callable]): Receives a progress event for every agent step
+            cancel (Optional[threading.Event]): When set, the run stops after the current step
+            deadline (Optional[float]): `time.monotonic()` value by which the response is due
+            raise_errors (bool): Re-raise agent errors instead of returning an error response
+            prefetch (Optional[Prefetch]): Searches started for the run when it was submitted;
+                started now when the service prefetches and none is given
 
         Returns:
             Dict[str, Any]: Research results including research_data and resource_links
 
         Raises:
-            Exception: If the agent raises an exception
+            RunCancelledError: If `cancel` was set before the run finished
+            DeadlineExceededError: If the deadline passed before the agent could answer
+            MemoryError: If the process ran out of memory
         """
-        # Run the research agent
-        prompt = AgentPrompt(query)
-        task = prompt.get_prompt()
+        if prefetch is None and self.prefetcher is not None:
+            prefetch = self.prefetcher.start(query)
+        tier = self.router.route(query) if self.router is not None else None
 
+        started = time.monotonic()
+        outcome = "ok"
+        metrics.RUNS_IN_FLIGHT.inc()
         try:
-            result = self.agent.run(json.dumps(task))
+            if deadline is not None and deadline <= time.monotonic():
+                raise DeadlineExceededError("Research deadline passed before the run started")
+            if tier is not None:
+                metrics.TIER_RUNS.labels(tier=tier.name).inc()
+                logger.info(f"Research query routed to the '{tier.name}' tier")
+            if on_event is not None:
+                on_event(event("started", query=query, **({"tier": tier.name} if tier is not None else {})))
+            # Tools read the query, the URLs already seen and the deadline from the run context
+            with run_scope(query, deadline=_work_deadline(deadline), cancel=cancel):
+                # Prefetched results are rendered in the run, so its later searches skip their URLs
+                prompt = AgentPrompt(
+                    query,
+                    prefetched=prefetch.results() if prefetch is not None else None,
+                    variant=tier.prompt_variant if tier is not None else "comprehensive"
+                )
+                task = prompt.get_prompt()
+                original_model = agent.model
+                if tier is not None:
+                    agent.model = self._tier_model(agent, tier)
+                try:
+                    result, forced = self._run_agent(agent, json.dumps(task), on_event, cancel, deadline, tier)
+                finally:
+                    agent.model = original_model
 
             # Process the result into the expected format
+            parse_started = time.monotonic()
             if isinstance(result, dict):
                 data = result
             else:
@@ -100,18 +652,306 @@ class ResearchAgentService:
             # Add missing keys with default values
             data.setdefault("research_data", "")
             data.setdefault("resource_links", [])
+            metrics.PARSE_SECONDS.observe(time.monotonic() - parse_started)
 
+            if forced:
+                outcome = "forced"
+            # An answer cut short by the deadline is not worth serving to later requests
+            if cache_key is not None and not forced:
+                self.cache.set(cache_key, data, self.cache_ttl)
             return data
 
+        except RunCancelledError:
+            outcome = "cancelled"
+            logger.info("Research run cancelled by its caller")
+            raise
+        except DeadlineExceededError:
+            outcome = "deadline"
+            metrics.ERRORS.labels(stage="research_deadline").inc()
+            logger.warning("Research run exceeded its deadline")
+            raise
+        except MemoryError:
+            # Not an agent error: a worker process capped by `memory_mb` must exit on it
+            outcome = "error"
+            metrics.ERRORS.labels(stage="research").inc()
+            raise
         except Exception as e:
+            outcome = "error"
+            metrics.ERRORS.labels(stage="research").inc()
             # Log the error for debugging
-            logging.error(f"Research agent error: {str(e)}", exc_info=True)
+            logger.error(f"Research agent error: {str(e)}", exc_info=True)
+            if raise_errors:
+                raise
 
             # Return a structured error response
             return {
                 "research_data": f"Error running research agent: {str(e)}",
                 "resource_links": []
             }
+        finally:
+            metrics.RUNS_IN_FLIGHT.dec()
+            metrics.RUN_SECONDS.labels(outcome=outcome).observe(time.monotonic() - started)
+
+    def _run_agent(
+            self,
+            agent: "CodeAgent",
+            task: str,
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+            cancel: Optional[threading.Event] = None,
+            deadline: Optional[float] = None,
+            tier: Optional[QueryTier] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Step through an agent run, reporting progress and honouring cancellation.
+
+        Before each step, the time left before the run's deadline is compared with the
+        duration of the previous step. When another step would not fit, the run stops and the
+        agent gives its final answer from the steps so far.
+
+        Once the run has gathered the sources its tier requires, the agent is told to answer in
+        its next step; if it researches on instead, it is made to answer from the steps so far.
+
+        Args:
+            agent (CodeAgent): The agent to run
+            task (str): The task passed to the agent
+            on_event (Optional[Callable]): Receives a progress event for every agent step
+            cancel (Optional[threading.Event]): When set, the run stops after the current step
+            deadline (Optional[float]): `time.monotonic()` value by which the answer is due
+            tier (Optional[QueryTier]): The query's tier, which sets the step budget and when
+                to answer early
+
+        Returns:
+            Tuple[Any, bool]: The agent's final answer, and whether the deadline forced it
+
+        Raises:
+            RunCancelledError: If `cancel` was set before the run finished
+            DeadlineExceededError: If the agent could not answer before the deadline
+        """
+        from smolagents.memory import ActionStep, FinalAnswerStep
+
+        run = current_run()
+        final_answer = None
+        out_of_time = False
+        told_to_answer = False
+        answer_early = False
+        previous_step = None
+        steps = agent.run(task, stream=True, max_steps=tier.max_steps if tier is not None else None)
+        try:
+            for step in steps:
+                # After the step budget runs out, smolagents yields the last step a second time
+                if step is previous_step:
+                    continue
+                previous_step = step
+                if isinstance(step, FinalAnswerStep):
+                    final_answer = step.final_answer
+                elif on_event is not None:
+                    for item in step_events(step, agent.tools):
+                        on_event(item)
+                if cancel is not None and cancel.is_set():
+                    raise RunCancelledError("Research run cancelled")
+                if tier is not None and run is not None and isinstance(step, ActionStep) and final_answer is None:
+                    if told_to_answer:
+                        # A step calling final_answer is followed by the FinalAnswerStep
+                        if step.error is None and _calls_final_answer(step):
+                            continue
+                        answer_early = True
+                        break
+                    if tier.satisfied(len(run.seen_urls), len(run.crawled_urls)):
+                        told_to_answer = True
+                        self._tell_to_answer(step, tier, on_event)
+                remaining = run.remaining() if run is not None else None
+                if (final_answer is None and remaining is not None and isinstance(step, ActionStep)
+                        and remaining < (step.duration or 0)):
+                    out_of_time = True
+                    break
+        except Exception:
+            if cancel is not None and cancel.is_set():
+                raise RunCancelledError("Research run cancelled")
+            # A model call cut off by the deadline fails the step; answer with what is known
+            remaining = run.remaining() if run is not None else None
+            if remaining is None or remaining > 0:
+                raise
+            out_of_time = True
+        finally:
+            steps.close()
+
+        if answer_early:
+            return self._answer_from_memory(agent, task), False
+        if not out_of_time:
+            return final_answer, False
+        return self._force_final_answer(agent, task, deadline, on_event), True
+
+    def _tell_to_answer(
+            self,
+            step: Any,
+            tier: QueryTier,
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> None:
+        """
+        Ask the agent to give its final answer in its next step.
+
+        The request is appended to the step's observations, which the model reads next.
+
+        Args:
+            step (ActionStep): The step after which the run has enough sources
+            tier (QueryTier): The query's tier
+            on_event (Optional[Callable]): Receives an "early_exit" progress event
+        """
+        logger.info(f"Research run has the sources its '{tier.name}' tier requires, asking for the answer")
+        metrics.EARLY_EXITS.labels(tier=tier.name).inc()
+        step.observations = (step.observations or "") + _ANSWER_NOW
+        if on_event is not None:
+            on_event(event("early_exit", tier=tier.name, step=step.step_number))
+
+    def _answer_from_memory(self, agent: "CodeAgent", task: str) -> str:
+        """
+        Make the agent answer from the steps so far, without further tool calls.
+
+        Args:
+            agent (CodeAgent): The agent
+            task (str): The task passed to the agent
+
+        Returns:
+            str: The agent's final answer
+
+        Raises:
+            RuntimeError: If the model could not answer
+        """
+        answer = agent.provide_final_answer(task)
+        # provide_final_answer reports model failures as text rather than raising
+        if answer is None or answer.startswith("Error in generating final LLM output"):
+            raise RuntimeError(f"Research agent could not answer: {answer}")
+        return _CODE_FENCE.sub("", answer).strip()
+
+    def _tier_model(self, agent: "CodeAgent", tier: QueryTier) -> Any:
+        """
+        Get an agent's model for a query tier, building it on first use.
+
+        Models keep the token counts of their last call, so every agent has its own.
+
+        Args:
+            agent (CodeAgent): The agent, checked out by the caller
+            tier (QueryTier): The tier
+
+        Returns:
+            RateLimitedLiteLLMModel: The model
+        """
+        key = (id(agent), tier.name)
+        with self._tier_models_lock:
+            model = self._tier_models.get(key)
+        if model is None:
+            from app.agents.agent_research import create_research_model
+
+            model = create_research_model(
+                tier.model, temperature=0.2, api_base=config.LLM_API_BASE, max_tokens=tier.max_tokens
+            )
+            with self._tier_models_lock:
+                self._tier_models[key] = model
+        return model
+
+    def _force_final_answer(
+            self,
+            agent: "CodeAgent",
+            task: str,
+            deadline: Optional[float] = None,
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """
+        Make the agent answer from the steps so far, within the final answer reserve.
+
+        Args:
+            agent (CodeAgent): The agent whose run was cut short
+            task (str): The task passed to the agent
+            deadline (Optional[float]): `time.monotonic()` value by which the answer is due
+            on_event (Optional[Callable]): Receives a "deadline" progress event
+
+        Returns:
+            str: The agent's final answer
+
+        Raises:
+            DeadlineExceededError: If the model could not answer in time
+        """
+        logger.warning("Research deadline nearly reached, forcing a final answer")
+        if on_event is not None:
+            on_event(event("deadline", steps=len(agent.memory.steps)))
+        run = current_run()
+        if run is not None:
+            run.deadline = deadline if deadline is not None else time.monotonic() + config.RESEARCH_FINAL_ANSWER_RESERVE
+        answer = agent.provide_final_answer(task)
+        # provide_final_answer reports model failures as text rather than raising
+        if answer is None or answer.startswith("Error in generating final LLM output"):
+            raise DeadlineExceededError(f"Research deadline exceeded: {answer}")
+        return _CODE_FENCE.sub("", answer).strip()
+
+    def _forget_cancel(self, future: Future) -> None:
+        """Drop the cancellation event of a finished run."""
+        with self._cancels_lock:
+            self._cancels.pop(future, None)
+
+
+# Marks the end of a stream's event queue
+_STREAM_END = object()
+
+# Appended to the observations of the step after which a run has the sources its tier requires
+_ANSWER_NOW = (
+    "\n\nYou have gathered enough sources to answer this question. Give your final answer in "
+    "your next step with final_answer, without further searches or crawls."
+)
+
+# Markdown code fence the model may wrap a forced JSON answer in
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?|```\s*$")
+
+
+def _calls_final_answer(step: Any) -> bool:
+    """Check whether the code of an agent step calls the final_answer tool."""
+    return any("final_answer(" in str(call.arguments) for call in step.tool_calls or [])
+
+
+def _deadline_at(deadline_seconds: Optional[float]) -> Optional[float]:
+    """
+    Turn a requested time limit into a deadline.
+
+    Args:
+        deadline_seconds (Optional[float]): Requested seconds; None uses
+            `config.RESEARCH_DEADLINE`, capped by `config.RESEARCH_MAX_DEADLINE`
+
+    Returns:
+        Optional[float]: `time.monotonic()` value of the deadline, or None without a limit
+    """
+    seconds = config.RESEARCH_DEADLINE if deadline_seconds is None else deadline_seconds
+    if seconds <= 0:
+        return None
+    if config.RESEARCH_MAX_DEADLINE > 0:
+        seconds = min(seconds, config.RESEARCH_MAX_DEADLINE)
+    return time.monotonic() + seconds
+
+
+def _work_deadline(deadline: Optional[float]) -> Optional[float]:
+    """Get the deadline for agent steps, keeping time for a forced final answer."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    return deadline - min(config.RESEARCH_FINAL_ANSWER_RESERVE, remaining / 2)
+
+
+async def _single_event(item: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Yield a single event; used to stream responses served from the cache."""
+    yield item
+
+
+def _cache_directives(cache_control: Optional[str]) -> Set[str]:
+    """
+    Parse a `Cache-Control`-style value into a set of lower-case directive names.
+
+    Args:
+        cache_control (Optional[str]): The raw value, e.g. "no-cache, max-age=0"
+
+    Returns:
+        Set[str]: The directive names, e.g. {"no-cache", "max-age"}
+    """
+    if not cache_control:
+        return set()
+    return {part.split("=", 1)[0].strip().lower() for part in cache_control.split(",") if part.strip()}
 
 
 @lru_cache()
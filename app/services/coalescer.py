@@ -0,0 +1,156 @@
+"""
+Single-flight request coalescing.
+
+When many identical research queries arrive at the same time, only the first one (the leader)
+starts an agent run. Every later request with the same key (a follower) receives the leader's
+future and shares its result. The key is derived from the query by a configurable
+normalization rule.
+
+Callers that stop waiting (for example because their client disconnected) call `leave`. Once
+every caller of an execution has left, `leave` reports it so the execution can be cancelled,
+and later calls start a fresh one instead of joining it.
+
+Example:
+
+    >>> flight = SingleFlight(key_fn=KEY_RULES["normalized"])
+    >>> future = flight.submit("AI news", lambda: pool.submit(run))
+    >>> same = flight.submit("ai  news", lambda: pool.submit(run))  # joins the first run
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.cache import canonical_query, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Query-to-key normalization rules selectable through configuration
+KEY_RULES: Dict[str, Callable[[str], str]] = {
+    "exact": lambda query: query,
+    "normalized": normalize_query,
+    # Queries without words fall back to their normalized text rather than sharing one key
+    "canonical": lambda query: canonical_query(query) or normalize_query(query),
+}
+
+
+class SingleFlight:
+    """
+    Share one in-flight execution between concurrent callers with the same key.
+
+    Attributes:
+        key_fn (Callable[[str], str]): Maps a query to its coalescing key.
+        enabled (bool): Whether coalescing is active; when False every call starts its own run.
+        leaders (int): Number of calls that started a new execution.
+        followers (int): Number of calls that joined an execution already in flight.
+    """
+
+    def __init__(self, key_fn: Callable[[str], str], enabled: bool = True) -> None:
+        self.key_fn = key_fn
+        self.enabled = enabled
+        self.leaders = 0
+        self.followers = 0
+        self._calls: Dict[str, Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, query: str, start: Callable[[], Future]) -> Future:
+        """
+        Join the execution in flight for `query`, or start one with `start`.
+
+        Args:
+            query (str): The raw query.
+            start (Callable[[], Future]): Starts a new execution and returns its future.
+
+        Returns:
+            Future: The future of the shared execution.
+        """
+        if not self.enabled:
+            return start()
+
+        key = self.key_fn(query)
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                self._waiters[key] += 1
+                logger.info("Coalesced research query into an in-flight run")
+                return future
+
+            future = start()
+            self.leaders += 1
+            self._calls[key] = future
+            self._waiters[key] = 1
+
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def leave(self, query: str, future: Future) -> bool:
+        """
+        Stop waiting for an execution returned by `submit`.
+
+        Args:
+            query (str): The raw query passed to `submit`.
+            future (Future): The future returned by `submit`.
+
+        Returns:
+            bool: True if no caller waits for the execution anymore, so it may be cancelled.
+        """
+        if not self.enabled:
+            return True
+
+        key = self.key_fn(query)
+        with self._lock:
+            if self._calls.get(key) is not future:
+                return False
+            self._waiters[key] -= 1
+            if self._waiters[key] > 0:
+                return False
+            del self._calls[key]
+            del self._waiters[key]
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the coalescing counters.
+
+        Returns:
+            Dict[str, Any]: Leaders, followers, in-flight executions and the coalescing ratio.
+        """
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                "enabled": self.enabled,
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "in_flight": len(self._calls),
+                "coalesced_ratio": self.followers / total if total else 0.0,
+            }
+
+    def _forget(self, key: str, done: Future) -> None:
+        """Drop a finished execution so later calls start a fresh one."""
+        with self._lock:
+            if self._calls.get(key) is done:
+                del self._calls[key]
+                del self._waiters[key]
+
+
+def create_single_flight(rule: str, enabled: bool = True) -> SingleFlight:
+    """
+    Create a `SingleFlight` from a configured key rule name.
+
+    Args:
+        rule (str): Name of an entry in `KEY_RULES`.
+        enabled (bool): Whether coalescing is active.
+
+    Returns:
+        SingleFlight: The coalescer.
+
+    Raises:
+        ValueError: If the rule is unknown.
+    """
+    key_fn: Optional[Callable[[str], str]] = KEY_RULES.get(rule)
+    if key_fn is None:
+        raise ValueError(f"Unknown coalescing key rule '{rule}', expected one of {sorted(KEY_RULES)}")
+    return SingleFlight(key_fn=key_fn, enabled=enabled)
@@ -0,0 +1,434 @@
+"""
+Research Job Queue
+
+This module provides an asynchronous job API backend for long research runs.
+
+Jobs are kept in a local SQLite database, so they survive restarts of both web and worker
+processes. A `JobWorkerPool` claims queued jobs and runs them through `ResearchAgentService`.
+
+Delivery follows visibility-timeout semantics:
+
+* claiming a job leases it to one worker for `visibility_timeout` seconds
+* the worker extends the lease with heartbeats while the agent runs
+* if the worker dies, the lease expires and another worker picks the job up again
+* failed runs are retried with exponential backoff until `max_attempts` is reached
+
+Workers normally run as separate processes, sized independently of the web tier and with
+their own agent pools, so queued jobs do not take agents from HTTP requests:
+
+    python -m app.services.job_queue --workers 4
+
+Setting `JOB_WORKERS` > 0 also starts that many workers inside each web process, sharing its
+agent pool.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.services.agent_pool import PoolSaturatedError
+from app.utils import config
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobStore:
+    """
+    Persistent research job queue backed by SQLite.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        visibility_timeout (float): Seconds a claimed job stays leased without a heartbeat.
+        max_attempts (int): Number of times a job is tried before it is marked failed.
+        retry_backoff (float): Base delay in seconds before a failed job is retried; doubles
+            with every attempt.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            visibility_timeout: float,
+            max_attempts: int,
+            retry_backoff: float
+    ) -> None:
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " cache_control TEXT,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " error TEXT,"
+            " lease_id TEXT,"
+            " visible_at REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, visible_at)")
+
+    def enqueue(self, query: str, cache_control: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a research job to the queue.
+
+        Args:
+            query (str): The topic to research.
+            cache_control (Optional[str]): Cache directives passed to the research run.
+
+        Returns:
+            Dict[str, Any]: The new job.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, query, cache_control, status, visible_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, query, cache_control, QUEUED, now, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job by id.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued or running job. Finished jobs are left unchanged.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job after cancellation, or None if it does not exist.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_id = NULL, updated_at = ?"
+                " WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+        return self.get(job_id)
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest job that is ready to run.
+
+        Ready jobs are queued jobs whose retry delay has passed and running jobs whose lease
+        expired because their worker stopped sending heartbeats. An expired job that already
+        used all its attempts is marked failed instead.
+
+        Returns:
+            Optional[Dict[str, Any]]: The claimed job including its `lease_id`, or None.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_id = NULL, updated_at = ?"
+                    " WHERE status = ? AND visible_at <= ? AND attempts >= ?",
+                    (FAILED, "Worker lease expired on the final attempt", now, RUNNING, now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status IN (?, ?) AND visible_at <= ?"
+                    " ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                lease_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_id = ?,"
+                    " visible_at = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, lease_id, now + self.visibility_timeout, now, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self.get(row["id"])
+        job["lease_id"] = lease_id
+        return job
+
+    def heartbeat(self, job_id: str, lease_id: str) -> bool:
+        """
+        Extend the lease of a running job.
+
+        Args:
+            job_id (str): The job id.
+            lease_id (str): The lease returned by `claim`.
+
+        Returns:
+            bool: False if the lease was lost, e.g. because the job was cancelled.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET visible_at = ?, updated_at = ? WHERE id = ? AND lease_id = ? AND status = ?",
+                (now + self.visibility_timeout, now, job_id, lease_id, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, lease_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store the result of a running job.
+
+        Args:
+            job_id (str): The job id.
+            lease_id (str): The lease returned by `claim`.
+            result (Dict[str, Any]): The research results.
+
+        Returns:
+            bool: False if the lease was lost and the result was discarded.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_id = NULL, updated_at = ?"
+                " WHERE id = ? AND lease_id = ? AND status = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id, lease_id, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, lease_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt, scheduling a retry while attempts remain.
+
+        Args:
+            job_id (str): The job id.
+            lease_id (str): The lease returned by `claim`.
+            error (str): Description of the failure.
+            retry (bool): Whether the job may be retried.
+
+        Returns:
+            bool: False if the lease was lost.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND lease_id = ? AND status = ?",
+                (job_id, lease_id, RUNNING),
+            ).fetchone()
+            if row is None:
+                return False
+            if retry and row["attempts"] < self.max_attempts:
+                delay = self.retry_backoff * (2 ** (row["attempts"] - 1))
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_id = NULL, visible_at = ?, updated_at = ?"
+                    " WHERE id = ?",
+                    (QUEUED, error, now + delay, now, job_id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_id = NULL, updated_at = ? WHERE id = ?",
+                    (FAILED, error, now, job_id),
+                )
+        return True
+
+    def release(self, job_id: str, lease_id: str, delay: float) -> bool:
+        """
+        Return a claimed job to the queue without counting the attempt.
+
+        Used when a worker cannot start the job right now, e.g. because every agent is busy.
+
+        Args:
+            job_id (str): The job id.
+            lease_id (str): The lease returned by `claim`.
+            delay (float): Seconds before the job becomes ready again.
+
+        Returns:
+            bool: False if the lease was lost.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, lease_id = NULL,"
+                " visible_at = ?, updated_at = ? WHERE id = ? AND lease_id = ? AND status = ?",
+                (QUEUED, now + delay, now, job_id, lease_id, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    """Convert a database row into a job dictionary."""
+    return {
+        "id": row["id"],
+        "query": row["query"],
+        "cache_control": row["cache_control"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+class JobWorkerPool:
+    """
+    Threads that claim research jobs and run them through the research service.
+
+    Attributes:
+        store (JobStore): The job queue.
+        service: The `ResearchAgentService` running the jobs.
+        workers (int): Number of worker threads.
+        poll_interval (float): Seconds an idle worker waits before polling the queue again.
+    """
+
+    def __init__(self, store: JobStore, service: Any, workers: int, poll_interval: float) -> None:
+        self.store = store
+        self.service = service
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"research-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} research job workers")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop claiming jobs and wait for the worker threads to exit.
+
+        Jobs still running are abandoned; their lease expires and another worker retries them.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for each thread.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _work(self) -> None:
+        """Claim and run jobs until stopped."""
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim()
+            except Exception as e:
+                logger.error(f"Error claiming research job: {str(e)}", exc_info=True)
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        """Run one claimed job, heartbeating its lease until the agent finishes."""
+        job_id, lease_id = job["id"], job["lease_id"]
+        cancel = threading.Event()
+        try:
+            future = self.service.start_run(job["query"], job["cache_control"], cancel=cancel)
+        except PoolSaturatedError:
+            self.store.release(job_id, lease_id, delay=self.poll_interval)
+            return
+
+        heartbeat_interval = max(1.0, self.store.visibility_timeout / 3)
+        while True:
+            try:
+                result = future.result(timeout=heartbeat_interval)
+                break
+            except FutureTimeoutError:
+                if self._stop.is_set() or not self.store.heartbeat(job_id, lease_id):
+                    # Cancelled, or shutting down: stop the agent after its current step
+                    cancel.set()
+                    return
+            except Exception as e:
+                logger.error(f"Research job {job_id} failed: {str(e)}")
+                self.store.fail(job_id, lease_id, str(e))
+                return
+
+        self.store.complete(job_id, lease_id, result)
+
+
+@lru_cache()
+def get_job_store() -> JobStore:
+    """
+    Get the process-wide research job store.
+
+    Returns:
+        JobStore: The configured job store.
+    """
+    return JobStore(
+        path=config.JOB_STORE_PATH,
+        visibility_timeout=config.JOB_VISIBILITY_TIMEOUT,
+        max_attempts=config.JOB_MAX_ATTEMPTS,
+        retry_backoff=config.JOB_RETRY_BACKOFF,
+    )
+
+
+def main() -> None:
+    """Run research job workers as a standalone process until interrupted."""
+    from app.services.agent_service import ResearchAgentService
+
+    parser = argparse.ArgumentParser(description="Run research job workers.")
+    parser.add_argument(
+        "--workers", type=int, default=config.JOB_WORKERS or config.AGENT_POOL_SIZE,
+        help="Number of jobs run at the same time, and of agents; defaults to JOB_WORKERS, or AGENT_POOL_SIZE if 0.",
+    )
+    args = parser.parse_args()
+    size = max(1, args.workers)
+
+    logging.basicConfig(level=logging.INFO)
+    workers = JobWorkerPool(
+        store=get_job_store(),
+        # One agent per worker: extra agents would sit idle, and too few would make jobs wait
+        service=ResearchAgentService(pool_size=size),
+        workers=size,
+        poll_interval=config.JOB_POLL_INTERVAL,
+    )
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    workers.start()
+    stopped.wait()
+    workers.stop()
+
+
+if __name__ == "__main__":
+    main()
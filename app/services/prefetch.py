@@ -0,0 +1,206 @@
+"""
+Speculative Search Prefetch
+
+The research agent's first step is nearly always the same: one model call to decide to run
+`web_search` and `news_search` on the user's query, then the two searches one after the other.
+The prefetch removes that round trip from the critical path. When a run is submitted, both
+searches for the raw query start in the background, while the run waits for a free agent.
+Once the run starts, their compacted results are written into the agent's task, so its first
+model call can go straight to reading sources.
+
+The searches go through the same tools, caches and rate limits as the agent's own searches.
+Their results are rendered inside the research run, so the URLs count as already returned and
+later searches of the run leave them out. A search not finished within `timeout` seconds is
+left out of the task; it still fills the search cache for the agent.
+
+With `crawl_top_k` set, the top web results are also crawled in the background as soon as the
+web search returns, into the local page store, so the agent finds them there when it crawls.
+
+Example:
+
+    >>> prefetcher = create_prefetcher(serper_api_key, crawl_top_k=3)
+    >>> prefetch = prefetcher.start("solar panel efficiency")
+    >>> with run_scope("solar panel efficiency"):
+    ...     prefetched = prefetch.results()
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+from app.utils import config, metrics
+from app.utils.run_context import current_run
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_SECONDS = metrics.histogram(
+    "prefetch_seconds", "Duration of speculative searches and crawls before research runs.", ["kind", "status"]
+)
+
+
+class Prefetch:
+    """
+    The speculative searches of one research run.
+
+    Attributes:
+        query (str): The research query searched for.
+        timeout (float): Seconds `results` waits for searches still running.
+    """
+
+    def __init__(self, query: str, searches: Dict[str, Future], tools: Dict[str, Any], timeout: float) -> None:
+        self.query = query
+        self.timeout = timeout
+        self._searches = searches
+        self._tools = tools
+
+    def results(self) -> Optional[str]:
+        """
+        Get the compacted results of the searches, as the agent's search tools would return them.
+
+        Must be called inside the research run, whose deadline bounds the wait and which records
+        the returned URLs as seen.
+
+        Returns:
+            Optional[str]: JSON object of result lists by tool name, or None if no search
+                returned results in time.
+        """
+        timeout = self.timeout
+        run = current_run()
+        remaining = run.remaining() if run is not None else None
+        if remaining is not None:
+            timeout = max(0.0, min(timeout, remaining))
+        wait(self._searches.values(), timeout=timeout)
+
+        found: Dict[str, Any] = {}
+        for name, future in self._searches.items():
+            if not future.done():
+                logger.info(f"Prefetched {name} for the research query did not finish in time")
+                continue
+            if future.exception() is not None:
+                continue
+            try:
+                records = json.loads(self._tools[name].render(future.result()))
+            except Exception as e:
+                logger.warning(f"Could not render prefetched {name} results: {str(e)}")
+                continue
+            if records:
+                found[name] = records
+        return json.dumps(found, ensure_ascii=False) if found else None
+
+
+class Prefetcher:
+    """
+    Starts the speculative searches of research runs on background threads.
+
+    Attributes:
+        web_search (WebSearchTool): Tool running the web search.
+        news_search (NewsSearchTool): Tool running the news search.
+        crawler (Optional[WebCrawlerTool]): Crawler filling the page store with the top web
+            results, or None to skip crawling.
+        crawl_top_k (int): Number of top web results crawled.
+        timeout (float): Seconds a run waits for its searches before starting without them.
+    """
+
+    def __init__(
+            self,
+            web_search: Any,
+            news_search: Any,
+            crawler: Optional[Any] = None,
+            crawl_top_k: int = 0,
+            timeout: float = 5.0,
+            workers: int = 8
+    ) -> None:
+        self.web_search = web_search
+        self.news_search = news_search
+        self.crawler = crawler if crawl_top_k > 0 else None
+        self.crawl_top_k = crawl_top_k
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def start(self, query: str) -> Prefetch:
+        """
+        Start the web and news searches for a query.
+
+        Args:
+            query (str): The research query.
+
+        Returns:
+            Prefetch: Handle to the searches, read by the run once it starts.
+        """
+        tools = {"web_search": self.web_search, "news_search": self.news_search}
+        searches = {name: self._executor.submit(self._timed, name, tool.fetch, query) for name, tool in tools.items()}
+        if self.crawler is not None:
+            searches["web_search"].add_done_callback(self._crawl_top)
+        return Prefetch(query, searches, tools, self.timeout)
+
+    def _crawl_top(self, search: Future) -> None:
+        """Crawl the top results of a finished web search into the page store."""
+        if search.exception() is not None:
+            return
+        try:
+            results = json.loads(search.result()).get("organic") or []
+        except (json.JSONDecodeError, AttributeError):
+            return
+        urls = [result["link"] for result in results if result.get("link")][:self.crawl_top_k]
+        for url in urls:
+            try:
+                self._executor.submit(self._timed, "crawl", self.crawler.crawl, url)
+            except RuntimeError:
+                # The executor was shut down
+                return
+
+    def _timed(self, kind: str, fn: Any, arg: str) -> Any:
+        """Call `fn(arg)`, recording its duration and logging a failure."""
+        started = time.monotonic()
+        status = "ok"
+        try:
+            return fn(arg)
+        except Exception as e:
+            status = "error"
+            logger.warning(f"Prefetch {kind} failed: {str(e)}")
+            raise
+        finally:
+            PREFETCH_SECONDS.labels(kind=kind, status=status).observe(time.monotonic() - started)
+
+    def shutdown(self) -> None:
+        """Stop the background threads, dropping searches and crawls not started yet."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_prefetcher(serper_api_key: str, crawl_top_k: int = 0, timeout: float = 5.0) -> Prefetcher:
+    """
+    Build a prefetcher with search tools sharing the agents' caches and corpus index.
+
+    Args:
+        serper_api_key (str): The API key for Serper.dev.
+        crawl_top_k (int): Number of top web results crawled into the page store; pages are not
+            crawled when the page store is disabled.
+        timeout (float): Seconds a run waits for its searches before starting without them.
+
+    Returns:
+        Prefetcher: The prefetcher.
+    """
+    # The tools are smolagents tools; only load them once the prefetcher is built
+    from app.tools.news_search_tool import NewsSearchTool
+    from app.tools.web_crawler_tool import WebCrawlerTool
+    from app.tools.web_search_tool import WebSearchTool
+    from app.utils.cache import get_search_cache
+    from app.utils.corpus_index import get_corpus_index
+    from app.utils.page_store import get_page_store
+
+    search_cache = get_search_cache()
+    corpus = get_corpus_index()
+    page_store = get_page_store()
+    crawler = None
+    if crawl_top_k > 0 and page_store is not None:
+        crawler = WebCrawlerTool(api_key=serper_api_key, page_store=page_store, corpus=corpus)
+    return Prefetcher(
+        web_search=WebSearchTool(api_key=serper_api_key, cache=search_cache, corpus=corpus),
+        news_search=NewsSearchTool(api_key=serper_api_key, cache=search_cache, corpus=corpus),
+        crawler=crawler,
+        crawl_top_k=crawl_top_k,
+        timeout=timeout,
+        workers=(2 + crawl_top_k) * config.AGENT_POOL_SIZE
+    )
@@ -0,0 +1,95 @@
+"""
+Research Progress Events
+
+This module turns the memory steps a `CodeAgent` yields while it runs into small,
+JSON-serializable progress events. They are used by the streaming endpoint to report
+each step, tool call and tool observation as it happens.
+
+Every event is a dictionary with two keys:
+
+* `event`: the event name ("queued", "started", "tool_call", "observation", "step",
+  "deadline", "early_exit", "result", "error" or "heartbeat")
+* `data`: a JSON-serializable payload
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from app.utils.run_context import RunCancelledError  # noqa: F401  (re-exported)
+
+# Maximum number of characters of model output and observations included in an event
+PREVIEW_CHARS = 500
+
+
+def preview(text: Any, limit: int = PREVIEW_CHARS) -> str:
+    """
+    Shorten text for inclusion in an event.
+
+    Args:
+        text (Any): The text to shorten; None becomes an empty string.
+        limit (int): Maximum number of characters kept.
+
+    Returns:
+        str: The text, truncated with an ellipsis when longer than `limit`.
+    """
+    text = "" if text is None else str(text)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def event(name: str, /, **data: Any) -> Dict[str, Any]:
+    """
+    Build a progress event.
+
+    Args:
+        name (str): The event name.
+        **data: The event payload.
+
+    Returns:
+        Dict[str, Any]: The event.
+    """
+    return {"event": name, "data": data}
+
+
+def step_events(step: Any, tool_names: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Convert one agent memory step into progress events.
+
+    An action step produces a "tool_call" event per code action, listing the agent tools
+    the code calls, an "observation" event summarizing its output, and a closing "step"
+    event. Planning steps produce a single "step" event.
+
+    Args:
+        step (Any): A memory step yielded by `CodeAgent.run(stream=True)`.
+        tool_names (Iterable[str]): Names of the tools available to the agent.
+
+    Returns:
+        List[Dict[str, Any]]: The events, in the order they should be emitted.
+    """
+    # Imported here so importing the events does not load smolagents
+    from smolagents.memory import ActionStep, PlanningStep
+
+    if isinstance(step, PlanningStep):
+        return [event("step", kind="planning", plan=preview(step.plan))]
+    if not isinstance(step, ActionStep):
+        return []
+
+    events = []
+    for tool_call in step.tool_calls or []:
+        code = tool_call.arguments if isinstance(tool_call.arguments, str) else str(tool_call.arguments)
+        events.append(event(
+            "tool_call",
+            step=step.step_number,
+            name=tool_call.name,
+            tools=[name for name in tool_names if f"{name}(" in code],
+            code=preview(code),
+        ))
+    if step.observations:
+        events.append(event("observation", step=step.step_number, summary=preview(step.observations)))
+    events.append(event(
+        "step",
+        kind="action",
+        step=step.step_number,
+        duration=step.duration,
+        model_output=preview(step.model_output),
+        error=str(step.error) if step.error else None,
+    ))
+    return events
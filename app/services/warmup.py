@@ -0,0 +1,118 @@
+"""
+Startup Warm-up
+
+Importing the application does not load smolagents, LiteLLM or the Gemini SDK; they are imported
+when the research agents and the Gemini client are first built. Left alone, that cost (several
+seconds) would fall on the first request. `Warmup` pays it right after startup instead: it runs
+named steps, such as building the agent pool, on a background thread, so the server answers
+liveness probes at once and reports ready through `/ready` once every step has finished.
+
+Each step's duration is logged and exported as the `startup_step_seconds` metric. A failing step
+is logged and leaves the process not ready, so a broken instance never receives traffic.
+
+Example:
+
+    >>> warmup = Warmup([("research_agents", get_research_agent_service)])
+    >>> warmup.start()
+    >>> warmup.status()["status"]
+    'warming'
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SECONDS = metrics.gauge("startup_step_seconds", "Duration of each startup warm-up step.", ["step"])
+READY = metrics.gauge("ready", "Whether the startup warm-up has finished successfully.")
+
+
+class Warmup:
+    """
+    Startup steps run once on a background thread.
+
+    Attributes:
+        steps (List[Tuple[str, Callable[[], Any]]]): Named steps, run in order.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]]) -> None:
+        self.steps = steps
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._failed = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Run the steps on a background thread."""
+        self._started = time.monotonic()
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+
+    def _run(self) -> None:
+        """Run every step in order, stopping at the first failure."""
+        for name, step in self.steps:
+            started = time.monotonic()
+            try:
+                step()
+            except Exception as e:
+                logger.exception(f"Startup step '{name}' failed")
+                with self._lock:
+                    self._results[name] = {"seconds": round(time.monotonic() - started, 3), "error": str(e)}
+                    self._failed = True
+                break
+            seconds = time.monotonic() - started
+            STARTUP_SECONDS.labels(step=name).set(seconds)
+            logger.info(f"Startup step '{name}' finished in {seconds:.2f}s")
+            with self._lock:
+                self._results[name] = {"seconds": round(seconds, 3)}
+
+        with self._lock:
+            self._finished = time.monotonic()
+            failed = self._failed
+        if not failed:
+            READY.labels().set(1)
+        self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        """Whether every step finished successfully."""
+        with self._lock:
+            return self._done.is_set() and not self._failed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the steps to finish.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait; None waits until done.
+
+        Returns:
+            bool: Whether the process is ready.
+        """
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the progress of the warm-up.
+
+        Returns:
+            Dict[str, Any]: "warming", "ready" or "failed", the seconds spent so far and the
+                duration (and error, if any) of each finished step.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                state = "warming"
+            else:
+                state = "failed" if self._failed else "ready"
+            end = self._finished or time.monotonic()
+            return {
+                "status": state,
+                "seconds": round(end - self._started, 3) if self._started is not None else 0.0,
+                "steps": dict(self._results),
+            }
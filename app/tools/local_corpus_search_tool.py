@@ -0,0 +1,75 @@
+from smolagents import Tool
+from app.utils import config
+from app.utils.corpus_index import CorpusIndex
+from datetime import datetime, timezone
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCorpusSearchTool(Tool):
+    """
+        Tool for searching pages and search results fetched by earlier research runs.
+
+        This tool queries the local corpus index, which the crawler and search tools fill as
+        they fetch content. It answers in milliseconds without any network request, so the
+        agent can check what is already known before searching the web.
+
+        Attributes:
+            name (str): The name identifier for the tool.
+            description (str): Human-readable description of the tool's functionality.
+            inputs (dict): Schema defining the expected input parameters.
+            output_type (str): The type of output returned by the tool.
+            corpus (CorpusIndex): The local index that is searched.
+            max_results (int): Maximum number of passages returned per call.
+    """
+    name = "local_corpus_search"
+    description = (
+        "Searches pages and search results fetched by earlier research, stored locally, and returns "
+        "a JSON list of the most relevant passages with url, title, kind ('page' or 'snippet'), "
+        "text and the date they were fetched. Instant and free; try it before web_search."
+    )
+
+    inputs = {
+        "query": {
+            "type": "string",
+            "description": "The search query to run against the local corpus."
+        }
+    }
+
+    output_type = "string"
+
+    def __init__(self, corpus: CorpusIndex, **kwargs):
+        """
+                Initialize the LocalCorpusSearchTool.
+
+                Args:
+                    corpus (CorpusIndex): The local index that is searched.
+                    **kwargs: Additional keyword arguments passed to the parent Tool class.
+        """
+        super().__init__(**kwargs)
+        self.corpus = corpus
+        self.max_results = config.CORPUS_SEARCH_MAX_RESULTS
+
+    def forward(self, query: str) -> str:
+        """
+        Search the local corpus.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            str: JSON list of matching passages or an error message.
+        """
+        try:
+            passages = self.corpus.search(query, limit=self.max_results)
+        except Exception as e:
+            error_msg = f"Error searching local corpus: {str(e)}"
+            logger.error(error_msg)
+            return error_msg
+
+        for passage in passages:
+            passage["fetched"] = datetime.fromtimestamp(passage.pop("indexed_at"), timezone.utc).strftime("%Y-%m-%d")
+            passage.pop("score")
+        return json.dumps(passages, ensure_ascii=False)
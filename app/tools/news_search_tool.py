@@ -1,5 +1,11 @@
 from smolagents import Tool
-import requests
+from app.utils import config, http_client, rate_limit
+from app.utils.cache import ResultCache, cache_key
+from app.utils.corpus_index import CorpusIndex
+from app.utils.run_context import current_run
+from app.utils.search_results import format_results
+from typing import Optional
+import httpx
 import json
 import logging
 
@@ -22,9 +28,23 @@ class NewsSearchTool(Tool):
             api_key (str): API key for authenticating with Serper.dev.
             url (str): Endpoint URL for the Serper.dev news API.
             headers (dict): HTTP headers for API requests.
+            limiter (RateLimiter): Shared rate limiter and retry policy for the endpoint and API key.
+            cache (Optional[ResultCache]): Cache for successful results, or None to disable caching.
+            cache_ttl (float): Seconds a cached result stays valid.
+            corpus (Optional[CorpusIndex]): Local full-text index every result snippet is added to,
+                or None to skip indexing.
+            result_mode (str): "compact" for trimmed result records or "raw" for the Serper response.
+            max_results (int): Maximum number of records returned in compact mode.
+            duplicate_similarity (Optional[float]): Similarity above which a result is collapsed
+                into a pointer to an earlier near-duplicate result, or None to keep duplicates.
         """
     name = "news_search"
-    description = "Fetches news articles using the Serper.dev API based on a search query."
+    description = (
+        "Fetches news articles using the Serper.dev API based on a search query and returns a JSON "
+        "list of articles with title, url, snippet, date and source. URLs already returned earlier "
+        "are left out, and a near-duplicate copy of an earlier result only has title, url and "
+        "duplicate_of."
+    )
 
     inputs = {
         "query": {
@@ -35,21 +55,35 @@ class NewsSearchTool(Tool):
 
     output_type = "string"
 
-    def __init__(self, api_key: str, **kwargs):
+    def __init__(
+            self,
+            api_key: str,
+            cache: Optional[ResultCache] = None,
+            corpus: Optional[CorpusIndex] = None,
+            **kwargs
+    ):
         """
                 Initialize the NewsSearchTool with API credentials.
 
                 Args:
                     api_key (str): The API key for authenticating with Serper.dev API.
+                    cache (Optional[ResultCache]): Cache for successful results, or None to disable caching.
                     **kwargs: Additional keyword arguments passed to the parent Tool class.
         """
         super().__init__(**kwargs)
         self.api_key = api_key
-        self.url = "https://google.serper.dev/news"
+        self.url = f"{config.SERPER_BASE_URL}/news"
         self.headers = {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json"
         }
+        self.limiter = rate_limit.get_limiter("serper", self.url, self.api_key)
+        self.cache = cache
+        self.corpus = corpus
+        self.result_mode = config.SEARCH_RESULT_MODE
+        self.max_results = config.SEARCH_MAX_RESULTS
+        self.duplicate_similarity = config.SNIPPET_DUPLICATE_SIMILARITY if config.DEDUP_ENABLED else None
+        self.cache_ttl = config.NEWS_SEARCH_CACHE_TTL
 
     def forward(self, query: str) -> str:
         """
@@ -61,19 +95,78 @@ class NewsSearchTool(Tool):
         Returns:
             str: JSON string of the news results or an error message.
         """
-        # Construct the payload
-        payload = json.dumps({"q": query})
-
         try:
-            # Send the POST request to the Serper.dev API
-            response = requests.post(self.url, headers=self.headers, data=payload)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return response.text  # Return the raw JSON response as a string
-        except requests.RequestException as e:
+            return self.render(self.fetch(query))
+        except httpx.HTTPError as e:
             error_msg = f"Error fetching news: {str(e)}"
             logger.error(error_msg)
             return error_msg
         except Exception as e:
             error_msg = f"Error processing request: {str(e)}"
             logger.error(error_msg)
-            return error_msg
\ No newline at end of file
+            return error_msg
+
+    def fetch(self, query: str) -> str:
+        """
+        Get the raw Serper news response for a query from the cache or the Serper.dev API.
+
+        Args:
+            query (str): The search query for news.
+
+        Returns:
+            str: The raw Serper response body.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        # Serve repeated queries from the cache without spending API quota; keyed by tool name,
+        # like the web search
+        key = cache_key("news_search", query)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Construct the payload
+        payload = {"q": query}
+
+        # Send the POST request to the Serper.dev API over the shared connection pool
+        response = http_client.post(self.url, headers=self.headers, json=payload, limiter=self.limiter)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        if self.cache is not None:
+            self.cache.set(key, response.text, self.cache_ttl)
+        self._index(response.text)
+        return response.text
+
+    def render(self, text: str) -> str:
+        """
+        Format a raw Serper response for the agent according to `result_mode`.
+
+        In compact mode, URLs already returned earlier in the research run are dropped and
+        near-duplicate results are collapsed.
+
+        Args:
+            text (str): The raw Serper response body.
+
+        Returns:
+            str: The raw response, or a JSON list of compact result records.
+        """
+        if self.result_mode == "raw":
+            return text
+        return format_results(text, "news", self.max_results, current_run(), self.duplicate_similarity)
+
+    def _index(self, text: str) -> None:
+        """
+        Add the result snippets of a raw Serper response to the corpus index.
+
+        Args:
+            text (str): The raw Serper response body.
+        """
+        if self.corpus is None:
+            return
+        try:
+            for result in json.loads(text).get("news") or []:
+                if result.get("link"):
+                    self.corpus.index_snippet(result["link"], result.get("title"), result.get("snippet"))
+        except Exception as e:
+            logger.warning(f"Could not index search results: {str(e)}")
@@ -0,0 +1,187 @@
+from smolagents import Tool
+from app.tools.web_crawler_tool import WebCrawlerTool
+from app.utils import config
+from app.utils.page_store import normalize_url
+from app.utils.run_context import DeadlineExceededError, current_run, time_limit
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Any, Dict, List, Optional, Set
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds a batch waits past its URLs' time limits for crawls to report their timeout
+TIMEOUT_GRACE = 1.0
+
+
+class WebCrawlerBatchTool(Tool):
+    """
+        Tool for crawling several web pages concurrently in a single agent step.
+
+        This tool takes a list of URLs and crawls them in parallel through a `WebCrawlerTool`,
+        so it shares the crawler's page store and connection pool. Concurrency is bounded and
+        every URL has its own time limit, covering retries and rate limit waits; a failing or
+        timed-out URL does not fail the batch.
+
+        Attributes:
+            name (str): The name identifier for the tool.
+            description (str): Human-readable description of the tool's functionality.
+            inputs (dict): Schema defining the expected input parameters.
+            output_type (str): The type of output returned by the tool.
+            crawler (WebCrawlerTool): The crawler used for every URL.
+            max_urls (int): Maximum number of URLs crawled per call.
+            max_concurrency (int): Maximum number of URLs crawled at the same time.
+            timeout (float): Time limit in seconds for each URL.
+    """
+    name = "web_crawler_batch"
+    description = (
+        "Crawls several URLs in parallel using the Serper.dev API and returns a JSON list with, "
+        "for each URL, its status ('ok', 'duplicate' or 'error') and its content, the URL it "
+        "duplicates or its error message. Each page is reduced to the passages most relevant to "
+        "the query that fit the token budget. Near-duplicates of pages already crawled are "
+        "skipped. Prefer this over calling web_crawler repeatedly."
+    )
+
+    inputs = {
+        "urls": {
+            "type": "array",
+            "description": "The URLs of the web pages to crawl and extract content from."
+        },
+        "query": {
+            "type": "string",
+            "description": "What you are looking for on the pages; used to keep the most relevant passages.",
+            "nullable": True
+        },
+        "max_tokens": {
+            "type": "integer",
+            "description": "Token budget for the text returned per URL (0 returns whole pages).",
+            "nullable": True
+        }
+    }
+
+    output_type = "string"
+
+    def __init__(self, crawler: WebCrawlerTool, **kwargs):
+        """
+                Initialize the WebCrawlerBatchTool.
+
+                Args:
+                    crawler (WebCrawlerTool): The crawler used for every URL.
+                    **kwargs: Additional keyword arguments passed to the parent Tool class.
+        """
+        super().__init__(**kwargs)
+        self.crawler = crawler
+        self.max_urls = config.CRAWL_BATCH_MAX_URLS
+        self.max_concurrency = config.CRAWL_BATCH_CONCURRENCY
+        self.timeout = config.CRAWL_BATCH_TIMEOUT
+
+    def forward(self, urls: list, query: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        """
+        Crawl the provided URLs concurrently.
+
+        Args:
+            urls (list): The URLs to crawl.
+            query (Optional[str]): What to look for on the pages.
+            max_tokens (Optional[int]): Token budget for the text returned per URL.
+
+        Returns:
+            str: JSON list of per-URL results, in the order the URLs were given.
+        """
+        if isinstance(urls, str):
+            urls = [urls]
+
+        # Drop duplicates while keeping the requested order
+        unique_urls: List[str] = []
+        seen = set()
+        for url in urls:
+            key = normalize_url(str(url))
+            if key not in seen:
+                seen.add(key)
+                unique_urls.append(str(url))
+
+        skipped = unique_urls[self.max_urls:]
+        unique_urls = unique_urls[:self.max_urls]
+
+        results: List[Dict[str, Any]] = []
+        if unique_urls:
+            workers = min(self.max_concurrency, len(unique_urls))
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl-batch")
+            try:
+                # Each worker runs in a copy of this context so it sees the research run
+                pending = {normalize_url(url) for url in unique_urls}
+                futures = [
+                    executor.submit(copy_context().run, self._crawl_one, url, query, max_tokens, pending)
+                    for url in unique_urls
+                ]
+                # Every URL stops within its time limit; the wait only guards against a crawl
+                # that does not, so it cannot hold the batch
+                rounds = -(-len(unique_urls) // workers)
+                limit = self.timeout * rounds + TIMEOUT_GRACE
+                run = current_run()
+                if run is not None and run.remaining() is not None:
+                    limit = min(limit, max(0.0, run.remaining()) + TIMEOUT_GRACE)
+                wait(futures, timeout=limit)
+                results = [
+                    future.result() if future.done() else self._timed_out(url)
+                    for url, future in zip(unique_urls, futures)
+                ]
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        for url in skipped:
+            results.append({
+                "url": url,
+                "status": "error",
+                "error": f"Skipped: at most {self.max_urls} URLs are crawled per call"
+            })
+
+        logger.info(
+            f"Crawled {sum(result['status'] == 'ok' for result in results)}/{len(results)} URLs in batch"
+        )
+        return json.dumps(results, ensure_ascii=False)
+
+    def _crawl_one(
+            self,
+            url: str,
+            query: Optional[str],
+            max_tokens: Optional[int],
+            pending: Set[str]
+    ) -> Dict[str, Any]:
+        """
+        Crawl one URL, capturing any failure as a per-URL error.
+
+        Args:
+            url (str): The URL to crawl.
+            query (Optional[str]): What to look for on the page.
+            max_tokens (Optional[int]): Token budget for the returned text.
+            pending (Set[str]): Normalized URLs crawled in the same batch.
+
+        Returns:
+            Dict[str, Any]: The URL with its status and content, error message or the URL of
+                the near-duplicate already crawled in the research run.
+        """
+        try:
+            with time_limit(self.timeout):
+                original = self.crawler.duplicate_of(url, pending=pending)
+                if original is None:
+                    text = self.crawler.crawl(url, timeout=self.timeout)
+                    original = self.crawler.duplicate_of(url, text)
+            if original is not None:
+                return {"url": url, "status": "duplicate", "duplicate_of": original}
+            content = self.crawler.extract(text, query, max_tokens)
+            return {"url": url, "status": "ok", "content": content}
+        except DeadlineExceededError as e:
+            run = current_run()
+            if run is not None and run.remaining() is not None and run.remaining() <= 0:
+                # The research run itself is out of time
+                return {"url": url, "status": "error", "error": str(e)}
+            return self._timed_out(url)
+        except Exception as e:
+            logger.error(f"Error crawling URL '{url}' in batch: {str(e)}")
+            return {"url": url, "status": "error", "error": str(e)}
+
+    def _timed_out(self, url: str) -> Dict[str, Any]:
+        """Get the result of a URL not crawled within its time limit."""
+        logger.warning(f"Crawling URL '{url}' in batch timed out after {self.timeout}s")
+        return {"url": url, "status": "error", "error": f"Timed out after {self.timeout:g}s"}
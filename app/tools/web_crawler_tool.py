@@ -1,10 +1,21 @@
 from smolagents import Tool
-import requests
+from app.utils import config, http_client, rate_limit
+from app.utils.corpus_index import CorpusIndex
+from app.utils.fingerprint import simhash
+from app.utils.page_store import PageStore, normalize_url
+from app.utils.run_context import current_run
+from app.utils.text_extract import extract_relevant
+from typing import Optional, Set
+import httpx
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Returned instead of page content when the page is not worth reading again
+NO_CONTENT = 'No text content found'
+DUPLICATE_NOTE = "Skipped: near-duplicate of {url}, which was already crawled in this research."
+
 
 
 class WebCrawlerTool(Tool):
@@ -23,49 +34,90 @@ class WebCrawlerTool(Tool):
             api_key (str): API key for authenticating with Serper.dev.
             url (str): Endpoint URL for the Serper.dev scraping API.
             headers (dict): HTTP headers for API requests.
+            limiter (RateLimiter): Shared rate limiter and retry policy for the endpoint and API key.
+            page_store (Optional[PageStore]): Local store of crawled pages, or None to always crawl.
+            corpus (Optional[CorpusIndex]): Local full-text index every crawled page is added to,
+                or None to skip indexing.
+            duplicate_distance (Optional[int]): Largest SimHash distance at which a page is treated
+                as a near-duplicate of a page already crawled in the research run, or None to disable.
+            max_tokens (int): Default token budget for the returned text.
     """
     name = "web_crawler"
-    description = "Crawls and extracts all content from a specified URL using the Serper.dev API."
+    description = (
+        "Crawls a specified URL using the Serper.dev API and returns its main content, without "
+        "boilerplate. When the page is longer than the token budget, only the passages most "
+        "relevant to the query are returned. A near-duplicate of a page already crawled is "
+        "skipped with a note naming the first copy."
+    )
 
     inputs = {
         "url": {
             "type": "string",
             "description": "The URL of the web page to crawl and extract content from."
+        },
+        "query": {
+            "type": "string",
+            "description": "What you are looking for on the page; used to keep the most relevant passages.",
+            "nullable": True
+        },
+        "max_tokens": {
+            "type": "integer",
+            "description": "Token budget for the returned text (0 returns the whole page).",
+            "nullable": True
         }
     }
 
     output_type = "string"
 
-    def __init__(self, api_key: str, **kwargs):
+    def __init__(
+            self,
+            api_key: str,
+            page_store: Optional[PageStore] = None,
+            corpus: Optional[CorpusIndex] = None,
+            **kwargs
+    ):
         super().__init__(**kwargs)
         self.api_key = api_key
-        self.url = "https://scrape.serper.dev"
+        self.url = config.SERPER_SCRAPE_URL
         self.headers = {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json"
         }
+        self.limiter = rate_limit.get_limiter("serper", self.url, self.api_key)
+        self.page_store = page_store
+        self.corpus = corpus
+        self.duplicate_distance = config.PAGE_DUPLICATE_DISTANCE if config.DEDUP_ENABLED else None
+        self.max_tokens = config.CRAWL_MAX_TOKENS
 
-    def forward(self, url: str) -> str:
+    def forward(self, url: str, query: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
         """
         Crawl and extract content from the provided URL using the Serper.dev API.
 
+        Pages already in the page store are served from it. Stale pages are served
+        immediately and refreshed in the background. Near-duplicates of a page already
+        crawled in the research run are skipped. The page text is stripped of
+        boilerplate and reduced to the passages most relevant to `query` that fit the
+        token budget.
+
         Args:
             url (str): The URL to crawl.
+            query (Optional[str]): What to look for on the page.
+            max_tokens (Optional[int]): Token budget for the returned text; defaults to
+                `config.CRAWL_MAX_TOKENS`.
 
         Returns:
             str: JSON string of the extracted content or an error message.
         """
-        # Construct the payload
-        payload = json.dumps({"url": url})
-
         try:
-            # Send the POST request to the Serper.dev API
-            response = requests.post(self.url, headers=self.headers, data=payload)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            data = json.loads(response.text)
-            logger.info(f"Successfully crawled URL: {url}")
-            return data.get('text', 'No text content found')
-        except requests.RequestException as e:
+            original = self.duplicate_of(url)
+            if original is not None:
+                return DUPLICATE_NOTE.format(url=original)
+            text = self.crawl(url)
+            original = self.duplicate_of(url, text)
+            if original is not None:
+                return DUPLICATE_NOTE.format(url=original)
+            return self.extract(text, query, max_tokens)
+        except httpx.HTTPError as e:
             error_msg = f"Error crawling URL '{url}': {str(e)}"
             logger.error(error_msg)
             return error_msg
@@ -74,4 +126,115 @@ class WebCrawlerTool(Tool):
             logger.error(error_msg)
             return error_msg
 
+    def crawl(self, url: str, timeout: Optional[float] = None) -> str:
+        """
+        Get the text of a page from the page store or by crawling it.
+
+        Args:
+            url (str): The URL to crawl.
+            timeout (Optional[float]): Read timeout in seconds for the crawl request.
+
+        Returns:
+            str: The extracted text, or `NO_CONTENT`.
+
+        Raises:
+            httpx.HTTPError: If the crawl request fails.
+        """
+        if self.page_store is not None:
+            page = self.page_store.lookup(url)
+            if page is not None:
+                if not page.fresh:
+                    self.page_store.refresh_in_background(url, self._fetch)
+                return page.text
+
+        text = self._fetch(url, timeout=timeout)
+        if text is None:
+            return NO_CONTENT
+        if self.page_store is not None:
+            self.page_store.put(url, text)
+        return text
+
+    def duplicate_of(
+            self,
+            url: str,
+            text: Optional[str] = None,
+            pending: Optional[Set[str]] = None
+    ) -> Optional[str]:
+        """
+        Check whether a page repeats content already crawled in the current research run.
+
+        Without `text`, only URLs already known to be near-duplicates (for example from their
+        search snippets) whose first copy was crawled, or is in `pending`, are reported, so
+        they need not be fetched. With `text`, the page content is fingerprinted and compared with the pages
+        crawled earlier in the run, and the page is recorded as crawled.
+
+        Args:
+            url (str): The page URL.
+            text (Optional[str]): The crawled page text.
+            pending (Optional[Set[str]]): Normalized URLs being crawled alongside this one.
+
+        Returns:
+            Optional[str]: URL of the first copy, or None if the page should be read.
+        """
+        run = current_run()
+        if run is None or self.duplicate_distance is None:
+            return None
+        if text is None:
+            original = run.duplicate_of(url)
+            if original is not None and pending and normalize_url(original) in pending:
+                return original
+            return run.duplicate_of(url, crawled_only=True)
+        if text == NO_CONTENT:
+            return None
+        return run.match_page(url, simhash(text), self.duplicate_distance)
+
+    def extract(self, text: str, query: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        """
+        Reduce crawled text to the passages most relevant to a query within a token budget.
+
+        Args:
+            text (str): The crawled page text.
+            query (Optional[str]): What to look for on the page; defaults to the query of the
+                current research run.
+            max_tokens (Optional[int]): Token budget; defaults to `config.CRAWL_MAX_TOKENS`.
+
+        Returns:
+            str: The extracted text.
+        """
+        if not query:
+            run = current_run()
+            query = run.query if run is not None else None
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        return extract_relevant(text, query, budget)
+
+    def _fetch(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Scrape a URL through the Serper.dev API and add its text to the corpus index.
+
+        Args:
+            url (str): The URL to crawl.
+            timeout (Optional[float]): Read timeout in seconds for the request.
+
+        Returns:
+            Optional[str]: The extracted text, or None if the page has no text content.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        # Construct the payload
+        payload = {"url": url}
 
+        # Send the POST request to the Serper.dev API over the shared connection pool
+        response = http_client.post(
+            self.url, headers=self.headers, json=payload, timeout=timeout, limiter=self.limiter
+        )
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        data = json.loads(response.text)
+        logger.info(f"Successfully crawled URL: {url}")
+        text = data.get('text') or None
+        if text and self.corpus is not None:
+            try:
+                self.corpus.index_page(url, text, title=(data.get('metadata') or {}).get('title'))
+            except Exception as e:
+                logger.warning(f"Could not index crawled URL '{url}': {str(e)}")
+        return text
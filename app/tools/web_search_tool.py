@@ -1,5 +1,12 @@
 from smolagents import Tool
-import requests
+from app.utils import config
+from app.utils.cache import ResultCache, cache_key
+from app.utils.corpus_index import CorpusIndex
+from app.utils.run_context import current_run
+from app.utils.search_backends import HedgedSearch, get_web_search
+from app.utils.search_results import format_results
+from typing import Optional
+import httpx
 import json
 import logging
 
@@ -8,11 +15,12 @@ logger = logging.getLogger(__name__)
 
 class WebSearchTool(Tool):
     """
-        Tool for performing web searches using the Serper.dev API.
+        Tool for performing web searches using the Serper.dev API, hedged with DuckDuckGo.
 
         This tool enables LLM agents to search the web for information based on queries.
-        It interacts with the Serper.dev search API to fetch relevant search results,
-        including links, snippets, and other metadata.
+        It sends queries to the configured search backends, normally the Serper.dev search API,
+        falling back to DuckDuckGo when Serper is slow or fails, to fetch relevant search
+        results, including links, snippets, and other metadata.
 
         Attributes:
             name (str): The name identifier for the tool.
@@ -20,33 +28,54 @@ class WebSearchTool(Tool):
             inputs (dict): Schema defining the expected input parameters.
             output_type (str): The type of output returned by the tool.
             api_key (str): API key for authenticating with Serper.dev.
-            url (str): Endpoint URL for the Serper.dev search API.
-            headers (dict): HTTP headers for API requests.
+            search (HedgedSearch): The search backends, shared by all agents.
+            cache (Optional[ResultCache]): Cache for successful results, or None to disable caching.
+            cache_ttl (float): Seconds a cached result stays valid.
+            corpus (Optional[CorpusIndex]): Local full-text index every result snippet is added to,
+                or None to skip indexing.
+            result_mode (str): "compact" for trimmed result records or "raw" for the normalized
+                backend response.
+            max_results (int): Maximum number of records returned in compact mode.
+            duplicate_similarity (Optional[float]): Similarity above which a result is collapsed
+                into a pointer to an earlier near-duplicate result, or None to keep duplicates.
     """
     name = "web_search"
-    description = "Performs a web search using the Serper.dev API and returns the results."
+    description = (
+        "Performs a web search and returns a JSON list of results with "
+        "title, url, snippet, date and source. URLs already returned earlier are left out, and a "
+        "near-duplicate copy of an earlier result only has title, url and duplicate_of."
+    )
 
     inputs = {
         "query": {
             "type": "string",
-            "description": "The search query to send to the Serper.dev API."
+            "description": "The search query to send to the search engine."
         }
     }
 
     output_type = "string"
 
-    def __init__(self, api_key: str, **kwargs):
+    def __init__(
+            self,
+            api_key: str,
+            cache: Optional[ResultCache] = None,
+            corpus: Optional[CorpusIndex] = None,
+            search: Optional[HedgedSearch] = None,
+            **kwargs
+    ):
         super().__init__(**kwargs)
         self.api_key = api_key
-        self.url = "https://google.serper.dev/search"
-        self.headers = {
-            "X-API-KEY": self.api_key,
-            "Content-Type": "application/json"
-        }
+        self.search = search or get_web_search(api_key)
+        self.cache = cache
+        self.corpus = corpus
+        self.result_mode = config.SEARCH_RESULT_MODE
+        self.max_results = config.SEARCH_MAX_RESULTS
+        self.duplicate_similarity = config.SNIPPET_DUPLICATE_SIMILARITY if config.DEDUP_ENABLED else None
+        self.cache_ttl = config.WEB_SEARCH_CACHE_TTL
 
     def forward(self, query: str) -> str:
         """
-        Perform a web search using the Serper.dev API.
+        Perform a web search on the configured backends.
 
         Args:
             query (str): The search query.
@@ -54,16 +83,9 @@ class WebSearchTool(Tool):
         Returns:
             str: JSON string of the search results or an error message.
         """
-        # Construct the payloads
-        payload = json.dumps({"q": query})
-
         try:
-            # Send the POST request to the Serper.dev API
-            response = requests.post(self.url, headers=self.headers, data=payload)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-
-            return response.text  # Return the raw JSON response as a string
-        except requests.RequestException as e:
+            return self.render(self.fetch(query))
+        except httpx.HTTPError as e:
             error_msg = f"Error performing web search: {str(e)}"
             logger.error(error_msg)
             return error_msg
@@ -72,4 +94,62 @@ class WebSearchTool(Tool):
             logger.error(error_msg)
             return error_msg
 
+    def fetch(self, query: str) -> str:
+        """
+        Get the normalized search response for a query from the cache or the search backends.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            str: The normalized search response.
+
+        Raises:
+            httpx.HTTPError: If every backend fails.
+        """
+        # Serve repeated queries from the cache without spending API quota
+        key = cache_key("web_search", query)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Whichever backend answers first provides the results, normalized to one schema
+        text = json.dumps(self.search.search(query), ensure_ascii=False)
+        if self.cache is not None:
+            self.cache.set(key, text, self.cache_ttl)
+        self._index(text)
+        return text
+
+    def render(self, text: str) -> str:
+        """
+        Format a normalized search response for the agent according to `result_mode`.
+
+        In compact mode, URLs already returned earlier in the research run are dropped and
+        near-duplicate results are collapsed.
+
+        Args:
+            text (str): The normalized search response.
+
+        Returns:
+            str: The normalized response, or a JSON list of compact result records.
+        """
+        if self.result_mode == "raw":
+            return text
+        return format_results(text, "organic", self.max_results, current_run(), self.duplicate_similarity)
 
+    def _index(self, text: str) -> None:
+        """
+        Add the result snippets of a normalized search response to the corpus index.
+
+        Args:
+            text (str): The normalized search response.
+        """
+        if self.corpus is None:
+            return
+        try:
+            for result in json.loads(text).get("organic") or []:
+                if result.get("link"):
+                    self.corpus.index_snippet(result["link"], result.get("title"), result.get("snippet"))
+        except Exception as e:
+            logger.warning(f"Could not index search results: {str(e)}")
@@ -0,0 +1,352 @@
+"""
+Result caches for upstream API responses.
+
+This module provides a small, pluggable key/value cache with per-entry TTLs, a size bound
+with least-recently-used eviction, and hit/miss counters. Two backends are available:
+
+* `MemoryCache`: an in-process LRU, the fastest option for a single worker
+* `SQLiteCache`: an on-disk store that survives restarts and is shared by every worker
+  process pointing at the same file
+
+Values must be JSON-serializable. Expired entries are never returned and are removed lazily.
+
+Example:
+
+    >>> cache = MemoryCache(max_entries=2)
+    >>> cache.set(cache_key("search", "Python  Jobs"), "results", ttl=60)
+    >>> cache.get(cache_key("search", "python jobs"))
+    'results'
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils import config, metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = " \t\n?!.,;:"
+_WORD = re.compile(r"\w+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so trivially different spellings share a cache entry.
+
+    Applies Unicode NFKC normalization, case folding, whitespace collapsing and strips
+    trailing punctuation.
+
+    Args:
+        query (str): The raw query.
+
+    Returns:
+        str: The normalized query.
+    """
+    query = unicodedata.normalize("NFKC", query or "").casefold()
+    return _WHITESPACE.sub(" ", query).strip(_TRAILING_PUNCTUATION)
+
+
+def canonical_query(query: str) -> str:
+    """
+    Reduce a research query to a canonical form for response-level caching.
+
+    Goes further than `normalize_query`: all punctuation is dropped, so "What is the future
+    of AI?" and "what is the future of AI" match. Every word is kept, in order, so that
+    different questions about the same terms ("why did ..." and "when did ...") do not.
+
+    Args:
+        query (str): The raw query.
+
+    Returns:
+        str: The canonical query; empty if the query has no words.
+    """
+    words = _WORD.findall(unicodedata.normalize("NFKC", query or "").casefold())
+    return " ".join(words)
+
+
+def cache_key(endpoint: str, query: str) -> str:
+    """
+    Build a cache key from an endpoint and a query.
+
+    Args:
+        endpoint (str): Logical name of the cached call, e.g. the tool name.
+        query (str): The raw query; it is normalized with `normalize_query`.
+
+    Returns:
+        str: The cache key.
+    """
+    return f"{endpoint}|{normalize_query(query)}"
+
+
+class ResultCache:
+    """
+    Base class for result caches.
+
+    Subclasses implement `_get`, `_set` and `clear`. Hit and miss counting is handled here.
+
+    Attributes:
+        name (str): Name used in logs and metrics.
+        hits (int): Number of lookups that returned a value.
+        misses (int): Number of lookups that found nothing or an expired entry.
+    """
+
+    def __init__(self, name: str = "cache") -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None if missing or expired.
+        """
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value.
+
+        Args:
+            key (str): The cache key.
+            value (Any): A JSON-serializable value. None values are not stored.
+            ttl (float): Seconds until the entry expires. Non-positive TTLs disable storage.
+        """
+        if value is None or ttl <= 0:
+            return
+        self._set(key, value, time.time() + ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses and hit ratio.
+        """
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+    def _get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        raise NotImplementedError
+
+
+class MemoryCache(ResultCache):
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept before evicting the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 1024, name: str = "memory") -> None:
+        super().__init__(name=name)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResultCache):
+    """
+    On-disk cache backed by SQLite, with per-entry expiry and LRU eviction.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_entries (int): Maximum number of entries kept before evicting the least recently used.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, name: str = "sqlite") -> None:
+        super().__init__(name=name)
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def _get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones beyond `max_entries`."""
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def create_cache(backend: str, path: str, max_entries: int, name: str) -> Optional[ResultCache]:
+    """
+    Create a cache from configuration values.
+
+    Args:
+        backend (str): One of "memory", "sqlite" or "none".
+        path (str): Database path for the "sqlite" backend.
+        max_entries (int): Size bound for the cache.
+        name (str): Name used in logs and metrics.
+
+    Returns:
+        Optional[ResultCache]: The cache, or None when caching is disabled.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    backend = (backend or "none").lower()
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, name=name)
+    if backend == "sqlite":
+        return SQLiteCache(path=path, max_entries=max_entries, name=name)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown cache backend '{backend}', expected 'memory', 'sqlite' or 'none'")
+
+
+@lru_cache()
+def get_search_cache() -> Optional[ResultCache]:
+    """
+    Get the process-wide cache for web and news search results.
+
+    Returns:
+        Optional[ResultCache]: The configured cache, or None when disabled.
+    """
+    return create_cache(
+        backend=config.SEARCH_CACHE_BACKEND,
+        path=config.SEARCH_CACHE_PATH,
+        max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+        name="search",
+    )
+
+
+@lru_cache()
+def get_research_cache() -> Optional[ResultCache]:
+    """
+    Get the process-wide cache for finished research responses.
+
+    Returns:
+        Optional[ResultCache]: The configured cache, or None when disabled.
+    """
+    return create_cache(
+        backend=config.RESEARCH_CACHE_BACKEND,
+        path=config.RESEARCH_CACHE_PATH,
+        max_entries=config.RESEARCH_CACHE_MAX_ENTRIES,
+        name="research",
+    )
+
+
+def _collect_metrics():
+    """Export the hit and miss counters of the shared caches created so far as metrics."""
+    caches = [
+        factory() for factory in (get_search_cache, get_research_cache)
+        if factory.cache_info().currsize and factory() is not None
+    ]
+    stats = [cache.stats() for cache in caches]
+    return [
+        ("cache_hits_total", "counter", "Cache lookups that returned a value.",
+         [({"cache": item["name"]}, item["hits"]) for item in stats]),
+        ("cache_misses_total", "counter", "Cache lookups that found nothing or an expired entry.",
+         [({"cache": item["name"]}, item["misses"]) for item in stats]),
+    ]
+
+
+metrics.register_collector(_collect_metrics)
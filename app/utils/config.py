@@ -7,6 +7,127 @@ and making them available to the rest of the application.
 Environment Variables:
     GEMINI_API_KEY: The API key for the Gemini LLM model.
     SERPER_API_KEY: The API key for the Serper.dev API.
+    SERPER_BASE_URL: Base URL of the Serper.dev search and news endpoints.
+    SERPER_SCRAPE_URL: URL of the Serper.dev scrape endpoint.
+    RESEARCH_MODEL: LiteLLM model id used by the research agents.
+    LLM_API_BASE: Base URL of an OpenAI-compatible endpoint serving `RESEARCH_MODEL`, if any.
+    GEMINI_BASE_URL: Base URL of the Gemini API used by the formatter, if not the default.
+    AGENT_POOL_SIZE: Number of independent research agents (and worker threads) kept in the pool.
+    AGENT_QUEUE_DEPTH: Number of research runs allowed to wait for a free agent before new
+        requests are rejected.
+    AGENT_MEMORY_MAX_TOKENS: Tool observation tokens kept in agent memory before older
+        observations are compacted (0 disables compaction).
+    AGENT_MEMORY_KEEP_RECENT: Number of most recent agent steps whose observations are never
+        compacted.
+    AGENT_MEMORY_SUMMARY_TOKENS: Token budget for each compacted observation.
+    AGENT_EXECUTION_MODE: Where research runs execute: "thread" (pool threads of the server
+        process) or "process" (one worker process per pooled agent).
+    AGENT_PROCESS_MAX_RUNS: Runs after which a worker process is replaced (0 never replaces it).
+    AGENT_PROCESS_MEMORY_MB: Address space limit of each worker process in megabytes (0 disables).
+    AGENT_PROCESS_CPU_SECONDS: CPU time limit of each run in a worker process (0 disables).
+    AGENT_PROCESS_START_TIMEOUT: Seconds allowed for a worker process to build its agent.
+    QUERY_ROUTING_ENABLED: Whether research queries are classified into the "simple", "standard"
+        and "deep" tiers, each with its own model, step budget, token limit and prompt.
+    QUERY_TIER_SIMPLE_MODEL: LiteLLM model id of the "simple" tier (short factual questions).
+    QUERY_TIER_SIMPLE_MAX_STEPS: Agent step budget of the "simple" tier.
+    QUERY_TIER_SIMPLE_MAX_TOKENS: Completion token limit of the "simple" tier.
+    QUERY_TIER_STANDARD_MODEL: LiteLLM model id of the "standard" tier (other direct questions).
+    QUERY_TIER_STANDARD_MAX_STEPS: Agent step budget of the "standard" tier.
+    QUERY_TIER_STANDARD_MAX_TOKENS: Completion token limit of the "standard" tier.
+    QUERY_TIER_DEEP_MODEL: LiteLLM model id of the "deep" tier (analyses and open topics).
+    QUERY_TIER_DEEP_MAX_STEPS: Agent step budget of the "deep" tier.
+    QUERY_TIER_DEEP_MAX_TOKENS: Completion token limit of the "deep" tier.
+    HTTP_CONNECT_TIMEOUT: Seconds allowed to open a connection to an upstream API.
+    HTTP_READ_TIMEOUT: Seconds allowed to wait for an upstream API response.
+    HTTP_MAX_CONNECTIONS: Maximum number of open connections in the shared HTTP client.
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: Maximum number of idle keep-alive connections kept open.
+    HTTP_KEEPALIVE_EXPIRY: Seconds an idle keep-alive connection is kept open.
+    HTTP_MAX_CONNECTIONS_PER_HOST: Maximum number of concurrent requests to a single host.
+    SERPER_QPS: Requests per second allowed per Serper.dev endpoint and API key (0 disables).
+    SERPER_BURST: Number of Serper.dev requests allowed in a burst above `SERPER_QPS`.
+    SERPER_MAX_CONCURRENCY: Maximum concurrent requests per Serper.dev endpoint and API key.
+    LLM_QPS: Completion calls per second allowed per model and API key (0 disables).
+    LLM_BURST: Number of completion calls allowed in a burst above `LLM_QPS`.
+    LLM_MAX_CONCURRENCY: Maximum concurrent completion calls per model and API key.
+    RETRY_MAX_ATTEMPTS: Attempts per upstream call, including the first, on 429, 5xx and
+        connection errors.
+    RETRY_BASE_DELAY: Backoff ceiling in seconds before the first retry; doubles every retry.
+    RETRY_MAX_DELAY: Longest wait in seconds between attempts, including `Retry-After`.
+    SEARCH_CACHE_BACKEND: Cache for web and news search results: "memory", "sqlite" or "none".
+    SEARCH_CACHE_PATH: SQLite file used by the "sqlite" search cache backend.
+    SEARCH_CACHE_MAX_ENTRIES: Maximum number of cached search results.
+    WEB_SEARCH_CACHE_TTL: Seconds a cached web search result stays valid.
+    NEWS_SEARCH_CACHE_TTL: Seconds a cached news search result stays valid.
+    SEARCH_BACKENDS: Comma-separated web search backends, "serper" and/or "duckduckgo". The
+        first is queried for every search; the second is queried too when the first is slow.
+    SEARCH_HEDGE_PERCENTILE: Percentile of the primary backend's latency after which the
+        secondary backend is queried.
+    SEARCH_HEDGE_MIN_DELAY: Smallest delay in seconds before the secondary backend is queried.
+    SEARCH_HEDGE_INITIAL_DELAY: Delay in seconds before the secondary backend is queried, used
+        until enough latencies of the primary are known.
+    SEARCH_HEDGE_WORKERS: Threads running hedged search backend calls.
+    SEARCH_RESULT_MODE: Output of the web and news search tools: "compact" result records or
+        the "raw" Serper response.
+    SEARCH_MAX_RESULTS: Maximum number of records a search tool returns in compact mode.
+    PAGE_STORE_ENABLED: Whether crawled pages are kept in the local page store.
+    PAGE_STORE_PATH: SQLite file holding the page store.
+    PAGE_STORE_MAX_BYTES: Budget for the compressed size of stored pages.
+    PAGE_MAX_AGE: Seconds a stored page is served without refreshing it.
+    PAGE_STALE_WHILE_REVALIDATE: Extra seconds a stale page is served while it is refreshed
+        in the background.
+    CORPUS_INDEX_ENABLED: Whether fetched pages and search results are added to the local corpus
+        index searched by the `local_corpus_search` tool.
+    CORPUS_INDEX_PATH: SQLite file holding the local corpus index.
+    CORPUS_INDEX_MAX_SOURCES: Maximum number of URLs kept in the local corpus index.
+    CORPUS_SEARCH_MAX_RESULTS: Maximum number of passages `local_corpus_search` returns.
+    DEDUP_ENABLED: Whether near-duplicate pages and search results are collapsed into a pointer
+        to the first copy.
+    PAGE_DUPLICATE_DISTANCE: Largest SimHash Hamming distance (out of 64 bits) at which two
+        pages are near-duplicates.
+    SNIPPET_DUPLICATE_SIMILARITY: Smallest Jaccard similarity of title and snippet terms at
+        which two search results are near-duplicates.
+    CRAWL_MAX_TOKENS: Default token budget for text returned by the crawler tools (0 disables
+        pruning).
+    CRAWL_BATCH_MAX_URLS: Maximum number of URLs crawled per `web_crawler_batch` call.
+    CRAWL_BATCH_CONCURRENCY: Maximum number of URLs `web_crawler_batch` crawls at the same time.
+    CRAWL_BATCH_TIMEOUT: Time limit in seconds for each URL in `web_crawler_batch`, including
+        retries and rate limit waits.
+    PREFETCH_ENABLED: Whether web and news searches for the query start when a research run is
+        submitted, with their results written into the agent's task.
+    PREFETCH_TIMEOUT: Seconds a starting research run waits for its prefetched searches.
+    PREFETCH_CRAWL_TOP_K: Number of top prefetched web results crawled into the page store
+        (0 disables crawling).
+    COALESCE_ENABLED: Whether concurrent identical research queries share one agent run.
+    COALESCE_KEY_RULE: How queries are compared for coalescing: "exact", "normalized" or
+        "canonical".
+    RESEARCH_CACHE_BACKEND: Cache for finished research responses: "memory", "sqlite" or "none".
+    RESEARCH_CACHE_PATH: SQLite file used by the "sqlite" research cache backend.
+    RESEARCH_CACHE_MAX_ENTRIES: Maximum number of cached research responses.
+    RESEARCH_CACHE_TTL: Seconds a cached research response stays valid.
+    RESEARCH_DEADLINE: Default time limit in seconds for a research request (0 disables it).
+    RESEARCH_MAX_DEADLINE: Largest deadline in seconds a request may ask for.
+    RESEARCH_FINAL_ANSWER_RESERVE: Seconds of a request's deadline kept for the final answer
+        the agent is forced to give when time runs out.
+    DISCONNECT_POLL_INTERVAL: Seconds between checks for a disconnected client while a
+        research request waits for its run.
+    STREAM_HEARTBEAT_INTERVAL: Seconds without progress after which the streaming endpoint
+        sends a heartbeat event.
+    JOB_STORE_PATH: SQLite file holding the research job queue.
+    JOB_WORKERS: Number of research job workers started inside each web process. Defaults to
+        0: jobs are run by standalone workers (`python -m app.services.job_queue`), sized
+        independently of the web processes and not sharing their agent pools.
+    JOB_VISIBILITY_TIMEOUT: Seconds a claimed job stays leased to a worker without a heartbeat.
+    JOB_MAX_ATTEMPTS: Number of times a research job is tried before it is marked failed.
+    JOB_RETRY_BACKOFF: Base delay in seconds before a failed job is retried; doubles per attempt.
+    JOB_POLL_INTERVAL: Seconds an idle job worker waits before polling the queue again.
+    FORMATTER_BATCH_CONCURRENCY: Maximum number of concurrent Gemini calls per formatting batch.
+    FORMATTER_BATCH_MAX_ITEMS: Maximum number of prompts in one formatting batch.
+    WARMUP_ENABLED: Whether the research agents and API clients are built at startup, before
+        `/ready` passes, rather than on first use.
+    PROFILE_TOKEN: Admin token that profiles a request when sent in its `X-Profile` header.
+    PROFILE_SAMPLE_RATE: Share of research and formatter requests profiled (0 disables).
+    PROFILE_INTERVAL: Seconds between stack samples of a profiled request.
+    PROFILE_DIR: Directory the profiles are written to.
 """
 
 import os
@@ -15,4 +136,137 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
-SERPER_API_KEY: str = os.getenv("SERPER_API_KEY")
\ No newline at end of file
+SERPER_API_KEY: str = os.getenv("SERPER_API_KEY")
+
+# Upstream endpoints; overridden to point the service at local stand-ins for benchmarks
+SERPER_BASE_URL: str = os.getenv("SERPER_BASE_URL", "https://google.serper.dev").rstrip("/")
+SERPER_SCRAPE_URL: str = os.getenv("SERPER_SCRAPE_URL", "https://scrape.serper.dev")
+RESEARCH_MODEL: str = os.getenv("RESEARCH_MODEL", "gemini/gemini-2.0-flash")
+LLM_API_BASE: str = os.getenv("LLM_API_BASE")
+GEMINI_BASE_URL: str = os.getenv("GEMINI_BASE_URL")
+
+# Research agent pool
+AGENT_POOL_SIZE: int = int(os.getenv("AGENT_POOL_SIZE", "4"))
+AGENT_QUEUE_DEPTH: int = int(os.getenv("AGENT_QUEUE_DEPTH", "16"))
+AGENT_MEMORY_MAX_TOKENS: int = int(os.getenv("AGENT_MEMORY_MAX_TOKENS", "6000"))
+AGENT_MEMORY_KEEP_RECENT: int = int(os.getenv("AGENT_MEMORY_KEEP_RECENT", "2"))
+AGENT_MEMORY_SUMMARY_TOKENS: int = int(os.getenv("AGENT_MEMORY_SUMMARY_TOKENS", "200"))
+AGENT_EXECUTION_MODE: str = os.getenv("AGENT_EXECUTION_MODE", "thread").lower()
+AGENT_PROCESS_MAX_RUNS: int = int(os.getenv("AGENT_PROCESS_MAX_RUNS", "50"))
+AGENT_PROCESS_MEMORY_MB: int = int(os.getenv("AGENT_PROCESS_MEMORY_MB", "0"))
+AGENT_PROCESS_CPU_SECONDS: float = float(os.getenv("AGENT_PROCESS_CPU_SECONDS", "0"))
+AGENT_PROCESS_START_TIMEOUT: float = float(os.getenv("AGENT_PROCESS_START_TIMEOUT", "120"))
+
+# Query complexity routing
+QUERY_ROUTING_ENABLED: bool = os.getenv("QUERY_ROUTING_ENABLED", "false").lower() in ("1", "true", "yes")
+QUERY_TIER_SIMPLE_MODEL: str = os.getenv("QUERY_TIER_SIMPLE_MODEL", RESEARCH_MODEL)
+QUERY_TIER_SIMPLE_MAX_STEPS: int = int(os.getenv("QUERY_TIER_SIMPLE_MAX_STEPS", "4"))
+QUERY_TIER_SIMPLE_MAX_TOKENS: int = int(os.getenv("QUERY_TIER_SIMPLE_MAX_TOKENS", "1024"))
+QUERY_TIER_STANDARD_MODEL: str = os.getenv("QUERY_TIER_STANDARD_MODEL", RESEARCH_MODEL)
+QUERY_TIER_STANDARD_MAX_STEPS: int = int(os.getenv("QUERY_TIER_STANDARD_MAX_STEPS", "6"))
+QUERY_TIER_STANDARD_MAX_TOKENS: int = int(os.getenv("QUERY_TIER_STANDARD_MAX_TOKENS", "4096"))
+QUERY_TIER_DEEP_MODEL: str = os.getenv("QUERY_TIER_DEEP_MODEL", RESEARCH_MODEL)
+QUERY_TIER_DEEP_MAX_STEPS: int = int(os.getenv("QUERY_TIER_DEEP_MAX_STEPS", "10"))
+QUERY_TIER_DEEP_MAX_TOKENS: int = int(os.getenv("QUERY_TIER_DEEP_MAX_TOKENS", "8000"))
+
+# Shared HTTP client
+HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+
+# Rate limiting and retries
+SERPER_QPS: float = float(os.getenv("SERPER_QPS", "10"))
+SERPER_BURST: float = float(os.getenv("SERPER_BURST", "20"))
+SERPER_MAX_CONCURRENCY: int = int(os.getenv("SERPER_MAX_CONCURRENCY", "10"))
+LLM_QPS: float = float(os.getenv("LLM_QPS", "5"))
+LLM_BURST: float = float(os.getenv("LLM_BURST", "10"))
+LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "20"))
+
+# Search result cache
+SEARCH_CACHE_BACKEND: str = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+SEARCH_CACHE_PATH: str = os.getenv("SEARCH_CACHE_PATH", "data/search_cache.sqlite3")
+SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+WEB_SEARCH_CACHE_TTL: float = float(os.getenv("WEB_SEARCH_CACHE_TTL", "3600"))
+NEWS_SEARCH_CACHE_TTL: float = float(os.getenv("NEWS_SEARCH_CACHE_TTL", "600"))
+SEARCH_BACKENDS: str = os.getenv("SEARCH_BACKENDS", "serper,duckduckgo")
+SEARCH_HEDGE_PERCENTILE: float = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "95"))
+SEARCH_HEDGE_MIN_DELAY: float = float(os.getenv("SEARCH_HEDGE_MIN_DELAY", "0.25"))
+SEARCH_HEDGE_INITIAL_DELAY: float = float(os.getenv("SEARCH_HEDGE_INITIAL_DELAY", "1"))
+SEARCH_HEDGE_WORKERS: int = int(os.getenv("SEARCH_HEDGE_WORKERS", "16"))
+SEARCH_RESULT_MODE: str = os.getenv("SEARCH_RESULT_MODE", "compact").lower()
+SEARCH_MAX_RESULTS: int = int(os.getenv("SEARCH_MAX_RESULTS", "8"))
+
+# Crawled page store
+PAGE_STORE_ENABLED: bool = os.getenv("PAGE_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+PAGE_STORE_PATH: str = os.getenv("PAGE_STORE_PATH", "data/pages.sqlite3")
+PAGE_STORE_MAX_BYTES: int = int(os.getenv("PAGE_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_MAX_AGE: float = float(os.getenv("PAGE_MAX_AGE", "86400"))
+PAGE_STALE_WHILE_REVALIDATE: float = float(os.getenv("PAGE_STALE_WHILE_REVALIDATE", "604800"))
+
+# Local corpus index
+CORPUS_INDEX_ENABLED: bool = os.getenv("CORPUS_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+CORPUS_INDEX_PATH: str = os.getenv("CORPUS_INDEX_PATH", "data/corpus.sqlite3")
+CORPUS_INDEX_MAX_SOURCES: int = int(os.getenv("CORPUS_INDEX_MAX_SOURCES", "50000"))
+CORPUS_SEARCH_MAX_RESULTS: int = int(os.getenv("CORPUS_SEARCH_MAX_RESULTS", "5"))
+
+# Near-duplicate detection
+DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+PAGE_DUPLICATE_DISTANCE: int = int(os.getenv("PAGE_DUPLICATE_DISTANCE", "3"))
+SNIPPET_DUPLICATE_SIMILARITY: float = float(os.getenv("SNIPPET_DUPLICATE_SIMILARITY", "0.7"))
+
+# Crawling
+CRAWL_MAX_TOKENS: int = int(os.getenv("CRAWL_MAX_TOKENS", "2000"))
+CRAWL_BATCH_MAX_URLS: int = int(os.getenv("CRAWL_BATCH_MAX_URLS", "8"))
+CRAWL_BATCH_CONCURRENCY: int = int(os.getenv("CRAWL_BATCH_CONCURRENCY", "5"))
+CRAWL_BATCH_TIMEOUT: float = float(os.getenv("CRAWL_BATCH_TIMEOUT", "20"))
+
+# Speculative search prefetch
+PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+PREFETCH_TIMEOUT: float = float(os.getenv("PREFETCH_TIMEOUT", "5"))
+PREFETCH_CRAWL_TOP_K: int = int(os.getenv("PREFETCH_CRAWL_TOP_K", "0"))
+
+# Research request coalescing
+COALESCE_ENABLED: bool = os.getenv("COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+COALESCE_KEY_RULE: str = os.getenv("COALESCE_KEY_RULE", "normalized")
+
+# Research response cache
+RESEARCH_CACHE_BACKEND: str = os.getenv("RESEARCH_CACHE_BACKEND", "sqlite")
+RESEARCH_CACHE_PATH: str = os.getenv("RESEARCH_CACHE_PATH", "data/research_cache.sqlite3")
+RESEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "1000"))
+RESEARCH_CACHE_TTL: float = float(os.getenv("RESEARCH_CACHE_TTL", "21600"))
+
+# Research deadlines
+RESEARCH_DEADLINE: float = float(os.getenv("RESEARCH_DEADLINE", "300"))
+RESEARCH_MAX_DEADLINE: float = float(os.getenv("RESEARCH_MAX_DEADLINE", "900"))
+RESEARCH_FINAL_ANSWER_RESERVE: float = float(os.getenv("RESEARCH_FINAL_ANSWER_RESERVE", "20"))
+DISCONNECT_POLL_INTERVAL: float = float(os.getenv("DISCONNECT_POLL_INTERVAL", "1"))
+
+# Streaming
+STREAM_HEARTBEAT_INTERVAL: float = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))
+
+# Research job queue
+JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "data/jobs.sqlite3")
+JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "0"))
+JOB_VISIBILITY_TIMEOUT: float = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF: float = float(os.getenv("JOB_RETRY_BACKOFF", "10"))
+JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+# Formatter
+FORMATTER_BATCH_CONCURRENCY: int = int(os.getenv("FORMATTER_BATCH_CONCURRENCY", "8"))
+FORMATTER_BATCH_MAX_ITEMS: int = int(os.getenv("FORMATTER_BATCH_MAX_ITEMS", "100"))
+
+# Startup
+WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Request profiling
+PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL: float = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR: str = os.getenv("PROFILE_DIR", "data/profiles")
@@ -0,0 +1,241 @@
+"""
+Local full-text index over crawled pages and search snippets.
+
+Research topics overlap from one run to the next, so much of what the agent needs has usually
+been fetched before. Every page the crawler fetches and every search result the search tools
+receive is added to an on-disk index. The `local_corpus_search` tool queries it in
+milliseconds, before the agent spends a network round-trip.
+
+Pages are split into passages of about 200 tokens, and each passage is indexed separately so
+a search returns the relevant part of a page rather than the whole page. The index is a SQLite
+FTS5 table ranked with BM25, with Porter stemming. It is updated incrementally: re-indexing a
+URL replaces its passages, and an unchanged page is not re-indexed. The oldest sources are
+evicted once the index holds more than `max_sources` URLs.
+
+Example:
+
+    >>> index = CorpusIndex("data/corpus.sqlite3", max_sources=50000)
+    >>> index.index_page("https://example.com/solar", page_text, title="Solar basics")
+    >>> index.search("solar panel efficiency", limit=5)
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.utils import config
+from app.utils.page_store import normalize_url
+from app.utils.text_extract import chunk_text, strip_boilerplate, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Kinds of indexed sources; a crawled page supersedes a search snippet for the same URL
+PAGE = "page"
+SNIPPET = "snippet"
+
+
+class CorpusIndex:
+    """
+    SQLite FTS5 index of crawled page passages and search snippets.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_sources (int): Maximum number of indexed URLs.
+        passage_tokens (int): Target size of indexed page passages.
+    """
+
+    def __init__(self, path: str, max_sources: int = 50000, passage_tokens: int = 200) -> None:
+        self.path = path
+        self.max_sources = max_sources
+        self.passage_tokens = passage_tokens
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " url_key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " title TEXT,"
+            " kind TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " indexed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS passages ("
+            " id INTEGER PRIMARY KEY,"
+            " url_key TEXT NOT NULL,"
+            " text TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sources_indexed ON sources (indexed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS passages_source ON passages (url_key)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5("
+            " text, content='passages', content_rowid='id', tokenize='porter unicode61')"
+        )
+        # Keep the full-text table in sync with the passages table
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS passages_insert AFTER INSERT ON passages BEGIN"
+            " INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text); END"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS passages_delete AFTER DELETE ON passages BEGIN"
+            " INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+        )
+
+    def index_page(self, url: str, text: str, title: Optional[str] = None) -> bool:
+        """
+        Index the text of a crawled page, replacing any earlier version of it.
+
+        Args:
+            url (str): The page URL.
+            text (str): The page text.
+            title (Optional[str]): The page title.
+
+        Returns:
+            bool: True if the index changed; False if the page was already indexed unchanged.
+        """
+        passages = chunk_text(strip_boilerplate(text), target_tokens=self.passage_tokens)
+        return self._index(url, title, PAGE, passages)
+
+    def index_snippet(self, url: str, title: Optional[str], snippet: Optional[str]) -> bool:
+        """
+        Index a search result snippet, unless the full page is already indexed.
+
+        Args:
+            url (str): The result URL.
+            title (Optional[str]): The result title.
+            snippet (Optional[str]): The result snippet.
+
+        Returns:
+            bool: True if the index changed.
+        """
+        text = " ".join(part for part in (title, snippet) if part)
+        if not text:
+            return False
+        return self._index(url, title, SNIPPET, [text])
+
+    def search(self, query: str, limit: int = 5, per_source: int = 2) -> List[Dict[str, Any]]:
+        """
+        Find the indexed passages most relevant to a query.
+
+        Args:
+            query (str): The search query.
+            limit (int): Maximum number of passages returned.
+            per_source (int): Maximum number of passages returned from one URL.
+
+        Returns:
+            List[Dict[str, Any]]: Passages with url, title, kind, text, indexed_at and score,
+                best first.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.url, s.title, s.kind, s.indexed_at, p.text, bm25(passages_fts) AS score"
+                " FROM passages_fts"
+                " JOIN passages p ON p.id = passages_fts.rowid"
+                " JOIN sources s ON s.url_key = p.url_key"
+                " WHERE passages_fts MATCH ?"
+                " ORDER BY score LIMIT ?",
+                (match, limit * per_source * 2),
+            ).fetchall()
+
+        results: List[Dict[str, Any]] = []
+        per_url: Dict[str, int] = {}
+        for url, title, kind, indexed_at, text, score in rows:
+            if per_url.get(url, 0) >= per_source:
+                continue
+            per_url[url] = per_url.get(url, 0) + 1
+            results.append({
+                "url": url,
+                "title": title,
+                "kind": kind,
+                "text": text,
+                "indexed_at": indexed_at,
+                # SQLite's bm25() is lower for better matches
+                "score": round(-score, 4),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the size of the index.
+
+        Returns:
+            Dict[str, Any]: Number of indexed pages, snippets and passages.
+        """
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM sources GROUP BY kind").fetchall())
+            passages = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        return {"pages": counts.get(PAGE, 0), "snippets": counts.get(SNIPPET, 0), "passages": passages}
+
+    def _index(self, url: str, title: Optional[str], kind: str, passages: List[str]) -> bool:
+        """Replace the passages stored for a URL."""
+        if not passages:
+            return False
+        url_key = normalize_url(url)
+        content_hash = hashlib.sha256("\n".join(passages).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, content_hash FROM sources WHERE url_key = ?", (url_key,)
+            ).fetchone()
+            if row is not None and (row[1] == content_hash or (row[0] == PAGE and kind == SNIPPET)):
+                return False
+
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM passages WHERE url_key = ?", (url_key,))
+                self._conn.executemany(
+                    "INSERT INTO passages (url_key, text) VALUES (?, ?)",
+                    [(url_key, passage) for passage in passages],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (url_key, url, title, kind, content_hash, indexed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (url_key, url, title, kind, content_hash, time.time()),
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _evict(self) -> None:
+        """Drop the least recently indexed sources beyond `max_sources`."""
+        excess = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0] - self.max_sources
+        if excess <= 0:
+            return
+        stale = self._conn.execute(
+            "SELECT url_key FROM sources ORDER BY indexed_at ASC LIMIT ?", (excess,)
+        ).fetchall()
+        self._conn.executemany("DELETE FROM passages WHERE url_key = ?", stale)
+        self._conn.executemany("DELETE FROM sources WHERE url_key = ?", stale)
+
+
+@lru_cache()
+def get_corpus_index() -> Optional[CorpusIndex]:
+    """
+    Get the process-wide corpus index.
+
+    Returns:
+        Optional[CorpusIndex]: The configured index, or None when disabled.
+    """
+    if not config.CORPUS_INDEX_ENABLED:
+        return None
+    return CorpusIndex(path=config.CORPUS_INDEX_PATH, max_sources=config.CORPUS_INDEX_MAX_SOURCES)
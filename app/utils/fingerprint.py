@@ -0,0 +1,137 @@
+"""
+Fingerprints for near-duplicate detection.
+
+Search results often point to syndicated copies of one article: wire stories, mirrors and AMP
+pages. Their text differs by a byline, a timestamp or a navigation line, so exact content
+hashes do not match. A 64-bit SimHash maps similar texts to fingerprints that differ in few
+bits, so two texts are near-duplicates when the Hamming distance of their fingerprints is small.
+
+Fingerprints are built from overlapping word shingles of the text's terms. `bands` splits a
+fingerprint into four 16-bit bands. Any two fingerprints within three bits of each other share at
+least one band exactly, so stored fingerprints can be searched through indexed band lookups.
+
+Search snippets are too short for SimHash to separate reliably, so they are compared by the
+Jaccard similarity of their term sets instead.
+
+Example:
+
+    >>> hamming(simhash(article), simhash(syndicated_copy)) <= 3
+    True
+    >>> jaccard(term_set(snippet), term_set(syndicated_snippet)) >= 0.7
+    True
+"""
+
+import hashlib
+from collections import Counter
+from typing import AbstractSet, FrozenSet, List
+
+from app.utils.text_extract import tokenize
+
+# Number of bits in a fingerprint, and the bands used to look fingerprints up
+BITS = 64
+BAND_BITS = 16
+_MASK = (1 << BITS) - 1
+
+
+def _hash(feature: str) -> int:
+    """Hash a feature to a stable 64-bit integer."""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """
+    Compute the SimHash fingerprint of a text.
+
+    Args:
+        text (str): The text.
+        shingle (int): Number of consecutive terms per feature. Texts shorter than this use
+            single terms.
+
+    Returns:
+        int: The unsigned 64-bit fingerprint; 0 for text without terms.
+    """
+    terms = tokenize(text)
+    if len(terms) < shingle:
+        shingle = 1
+    features = Counter(" ".join(terms[i:i + shingle]) for i in range(len(terms) - shingle + 1))
+
+    weights = [0] * BITS
+    for feature, count in features.items():
+        value = _hash(feature)
+        for bit in range(BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    """
+    Count the bits in which two fingerprints differ.
+
+    Args:
+        a (int): A fingerprint.
+        b (int): Another fingerprint.
+
+    Returns:
+        int: The Hamming distance.
+    """
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def bands(fingerprint: int) -> List[int]:
+    """
+    Split a fingerprint into bands for indexed lookup.
+
+    Args:
+        fingerprint (int): The fingerprint.
+
+    Returns:
+        List[int]: The four 16-bit bands, lowest bits first.
+    """
+    mask = (1 << BAND_BITS) - 1
+    return [fingerprint >> shift & mask for shift in range(0, BITS, BAND_BITS)]
+
+
+def to_signed(fingerprint: int) -> int:
+    """
+    Convert a fingerprint to a signed 64-bit integer, as stored by SQLite.
+
+    Args:
+        fingerprint (int): The unsigned fingerprint.
+
+    Returns:
+        int: The same bits as a signed integer.
+    """
+    return fingerprint - (1 << BITS) if fingerprint >> (BITS - 1) else fingerprint
+
+
+def term_set(text: str) -> FrozenSet[str]:
+    """
+    Get the distinct terms of a short text, such as a search snippet.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        FrozenSet[str]: The terms, without stop words.
+    """
+    return frozenset(tokenize(text))
+
+
+def jaccard(a: AbstractSet[str], b: AbstractSet[str]) -> float:
+    """
+    Compute the Jaccard similarity of two term sets.
+
+    Args:
+        a (AbstractSet[str]): A term set.
+        b (AbstractSet[str]): Another term set.
+
+    Returns:
+        float: Shared terms over all terms, between 0 and 1; 0 when both sets are empty.
+    """
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
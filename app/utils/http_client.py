@@ -0,0 +1,166 @@
+"""
+Shared HTTP client for the Serper.dev tools.
+
+This module owns one connection-pooled `httpx.Client` for the whole process. Reusing it keeps
+TCP/TLS connections alive across tool calls, agent steps and requests instead of paying a new
+handshake on every call.
+
+The client is configured with:
+
+* connect/read/write/pool timeouts, so a slow endpoint cannot hang an agent step forever
+* HTTP keep-alive with a bounded number of idle connections
+* HTTP/2 when the optional `h2` package is installed
+* a per-host cap on concurrent requests, on top of httpx's global connection limit
+
+Requests can also go through a `RateLimiter`, which keeps them within the API's
+quota and retries 429, 5xx and connection failures with backoff.
+
+Inside a research run with a deadline, every attempt's timeouts are capped to the time the
+run has left, and no attempt is started once the deadline has passed.
+
+The tools call `post` from their `forward` methods, on the pool threads running the agents.
+"""
+
+import importlib.util
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.utils import config
+from app.utils.rate_limit import RateLimiter, call_with_retries, parse_retry_after
+from app.utils.run_context import current_run
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 without it
+HTTP2_AVAILABLE: bool = importlib.util.find_spec("h2") is not None
+
+_host_locks_guard = threading.Lock()
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def _timeout(read: Optional[float] = None, remaining: Optional[float] = None) -> httpx.Timeout:
+    """
+    Build the timeout policy for a request.
+
+    Args:
+        read (Optional[float]): Override for the read timeout in seconds.
+        remaining (Optional[float]): Seconds left before the run's deadline; caps every timeout.
+
+    Returns:
+        httpx.Timeout: Timeout with the configured connect and pool timeouts.
+    """
+    read_timeout = config.HTTP_READ_TIMEOUT if read is None else read
+    connect_timeout = config.HTTP_CONNECT_TIMEOUT
+    if remaining is not None:
+        read_timeout = min(read_timeout, remaining)
+        connect_timeout = min(connect_timeout, remaining)
+    return httpx.Timeout(
+        connect=connect_timeout,
+        read=read_timeout,
+        write=read_timeout,
+        pool=connect_timeout,
+    )
+
+
+def _limits() -> httpx.Limits:
+    """Build the connection pool limits of the client."""
+    return httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+@lru_cache()
+def get_client() -> httpx.Client:
+    """
+    Get the process-wide synchronous HTTP client.
+
+    Returns:
+        httpx.Client: A thread-safe, connection-pooled client.
+    """
+    return httpx.Client(timeout=_timeout(), limits=_limits(), http2=HTTP2_AVAILABLE)
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Get the semaphore capping concurrent requests to the host of `url`."""
+    host = urlsplit(url).netloc
+    with _host_locks_guard:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(config.HTTP_MAX_CONNECTIONS_PER_HOST)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def classify_response(
+        response: Optional[httpx.Response],
+        error: Optional[BaseException]
+) -> Tuple[bool, bool, Optional[float]]:
+    """
+    Decide whether an HTTP attempt should be retried.
+
+    Connection errors and timeouts, 429 and 5xx responses are retried.
+
+    Args:
+        response (Optional[httpx.Response]): The response, if the request completed.
+        error (Optional[BaseException]): The exception, if the request failed.
+
+    Returns:
+        Tuple[bool, bool, Optional[float]]: Whether to retry, whether the API throttled the
+            request (429), and the seconds requested by its `Retry-After` header.
+    """
+    if error is not None:
+        return isinstance(error, httpx.TransportError), False, None
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if response.status_code == 429:
+        return True, True, retry_after
+    return response.status_code >= 500, False, retry_after
+
+
+def post(
+        url: str,
+        headers: Dict[str, str],
+        json: Any,
+        timeout: Optional[float] = None,
+        limiter: Optional[RateLimiter] = None
+) -> httpx.Response:
+    """
+    Send a JSON POST request through the shared synchronous client.
+
+    Args:
+        url (str): The endpoint URL.
+        headers (Dict[str, str]): Request headers.
+        json (Any): JSON-serializable request body.
+        timeout (Optional[float]): Override for the read timeout in seconds.
+        limiter (Optional[RateLimiter]): Rate limiter of the endpoint. When given, the
+            request waits for its quota and is retried on 429, 5xx and connection errors.
+
+    Returns:
+        httpx.Response: The response of the last attempt. Call `raise_for_status` to surface
+            HTTP errors.
+
+    Raises:
+        httpx.HTTPError: On connection errors and timeouts.
+        DeadlineExceededError: If the research run's deadline has passed.
+        RunCancelledError: If the research run was cancelled.
+    """
+    run = current_run()
+
+    def _send() -> httpx.Response:
+        remaining = run.timeout(None) if run is not None else None
+        with _host_semaphore(url):
+            return get_client().post(url, headers=headers, json=json, timeout=_timeout(timeout, remaining))
+
+    if limiter is None:
+        return _send()
+    return call_with_retries(_send, limiter, classify_response)
+
+
+def close() -> None:
+    """Close the client if it has been created; the next request creates a new one."""
+    if get_client.cache_info().currsize:
+        get_client().close()
+        get_client.cache_clear()
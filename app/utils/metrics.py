@@ -0,0 +1,393 @@
+"""
+Process metrics in the Prometheus text format.
+
+Every stage of a research run is timed: the wait for a free agent, each model call (with its
+prompt and completion tokens), each tool call (with its output size and status), the parsing of
+the agent's answer, and the formatter's Gemini call. The metrics are plain counters, gauges and
+fixed-bucket histograms updated in memory under a short lock, cheap enough to stay on in
+production. `render` writes them in the Prometheus text exposition format, served at `/metrics`.
+
+Counters that other modules already keep (cache hits and misses, rate limiter waits, search
+backend latencies) are not duplicated: collectors read them when the metrics are rendered.
+
+Example:
+
+    >>> started = time.monotonic()
+    >>> TOOL_SECONDS.labels(tool="web_search", status="ok").observe(time.monotonic() - started)
+    >>> render()
+"""
+
+import bisect
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds of the default histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5,
+                   10.0, 15.0, 30.0, 60.0, 120.0, 300.0)
+
+# Upper bounds of the output size histogram buckets, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# A collector returns (name, type, help, [(labels, value)]) tuples; a histogram value is a `Histogram`
+Sample = Tuple[Dict[str, str], Any]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount (float): The increment; must not be negative.
+        """
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        """The current value."""
+        with self._lock:
+            return self._value
+
+
+class Gauge(Counter):
+    """Value that goes up and down, such as the number of runs in flight."""
+
+    def dec(self, amount: float = 1.0) -> None:
+        """
+        Decrease the gauge.
+
+        Args:
+            amount (float): The decrement.
+        """
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        """
+        Set the gauge.
+
+        Args:
+            value (float): The new value.
+        """
+        with self._lock:
+            self._value = value
+
+
+class Histogram:
+    """
+    Thread-safe histogram over fixed buckets.
+
+    Attributes:
+        buckets (Sequence[float]): Upper bounds of the buckets; larger values are counted in a
+            final overflow bucket.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record one value.
+
+        Args:
+            value (float): The value, e.g. a latency in seconds.
+        """
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        """Number of values recorded."""
+        with self._lock:
+            return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        """Sum of the values recorded."""
+        with self._lock:
+            return self._sum
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Estimate a percentile.
+
+        Args:
+            percentile (float): The percentile, between 0 and 100.
+
+        Returns:
+            Optional[float]: Upper bound of the bucket holding the percentile (the largest
+                bucket bound for the overflow bucket), or None before any value is recorded.
+        """
+        with self._lock:
+            counts = list(self._counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = percentile / 100 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[min(index, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the histogram counts.
+
+        Returns:
+            Dict[str, Any]: Cumulative counts per bucket bound ("+Inf" for all), the count, the
+                sum of values and the p50, p95 and p99 estimates.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*map(_format_value, self.buckets), "+Inf"], counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "buckets": buckets,
+            "count": cumulative,
+            "sum": round(total, 3),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricFamily:
+    """
+    A named metric with one series per combination of label values.
+
+    Attributes:
+        name (str): The metric name.
+        kind (str): "counter", "gauge" or "histogram".
+        help (str): One-line description.
+        labelnames (Tuple[str, ...]): Names of the labels.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            kind: str,
+            help: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: Any) -> Any:
+        """
+        Get the series of a combination of label values, creating it on first use.
+
+        Args:
+            **labels: A value for every label name.
+
+        Returns:
+            Any: The `Counter`, `Gauge` or `Histogram` of the series.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = Histogram(self._buckets) if self.kind == "histogram" else (
+                        Gauge() if self.kind == "gauge" else Counter())
+                    self._children[key] = child
+        return child
+
+    def samples(self) -> List[Sample]:
+        """
+        Get every series of the family.
+
+        Returns:
+            List[Sample]: Label values and series.
+        """
+        with self._lock:
+            children = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in children]
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the series of a family without labels."""
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the series of a gauge family without labels."""
+        self.labels().dec(amount)
+
+    def observe(self, value: float) -> None:
+        """Record a value in the series of a histogram family without labels."""
+        self.labels().observe(value)
+
+
+_families: Dict[str, MetricFamily] = {}
+_collectors: List[Collector] = []
+_registry_lock = threading.Lock()
+
+
+def _family(name: str, kind: str, help: str, labelnames: Sequence[str], **kwargs: Any) -> MetricFamily:
+    """Register a metric family, or return the one already registered under its name."""
+    with _registry_lock:
+        family = _families.get(name)
+        if family is None:
+            family = MetricFamily(name, kind, help, labelnames, **kwargs)
+            _families[name] = family
+        return family
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+    """
+    Register a counter.
+
+    Args:
+        name (str): The metric name, ending in "_total".
+        help (str): One-line description.
+        labelnames (Sequence[str]): Names of the labels.
+
+    Returns:
+        MetricFamily: The counter family.
+    """
+    return _family(name, "counter", help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+    """
+    Register a gauge.
+
+    Args:
+        name (str): The metric name.
+        help (str): One-line description.
+        labelnames (Sequence[str]): Names of the labels.
+
+    Returns:
+        MetricFamily: The gauge family.
+    """
+    return _family(name, "gauge", help, labelnames)
+
+
+def histogram(
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+) -> MetricFamily:
+    """
+    Register a histogram.
+
+    Args:
+        name (str): The metric name, ending in its unit ("_seconds", "_bytes").
+        help (str): One-line description.
+        labelnames (Sequence[str]): Names of the labels.
+        buckets (Sequence[float]): Upper bounds of the buckets.
+
+    Returns:
+        MetricFamily: The histogram family.
+    """
+    return _family(name, "histogram", help, labelnames, buckets=buckets)
+
+
+def register_collector(collector: Collector) -> None:
+    """
+    Add a function producing metrics when they are rendered.
+
+    Args:
+        collector (Collector): Returns (name, type, help, samples) tuples.
+    """
+    with _registry_lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value or bucket bound."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Format a label set, escaping values."""
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _render_family(name: str, kind: str, help: str, samples: List[Sample]) -> List[str]:
+    """Render one metric family in the text exposition format."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if kind != "histogram":
+            number = value.value if isinstance(value, Counter) else value
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(number)}")
+            continue
+        snapshot = value.snapshot()
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+def render() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics, one family after another.
+    """
+    with _registry_lock:
+        families = list(_families.values())
+        collectors = list(_collectors)
+
+    lines: List[str] = []
+    for family in families:
+        lines.extend(_render_family(family.name, family.kind, family.help, family.samples()))
+    for collector in collectors:
+        for name, kind, help, samples in collector():
+            lines.extend(_render_family(name, kind, help, samples))
+    return "\n".join(lines) + "\n"
+
+
+# Research runs
+QUEUE_SECONDS = histogram("research_queue_seconds", "Time research runs waited for a free agent.")
+RUN_SECONDS = histogram("research_run_seconds", "Duration of research runs by outcome.", ["outcome"])
+RUNS_IN_FLIGHT = gauge("research_runs_in_flight", "Research runs currently executing on an agent.")
+PARSE_SECONDS = histogram("research_parse_seconds", "Time spent parsing the agent's final answer.")
+TIER_RUNS = counter("research_tier_runs_total", "Research runs by query tier.", ["tier"])
+EARLY_EXITS = counter("research_early_exits_total", "Research runs told to answer early, by query tier.", ["tier"])
+
+# Model and tool calls
+LLM_SECONDS = histogram("llm_call_seconds", "Duration of model calls, retries included.", ["model", "outcome"])
+LLM_TOKENS = counter("llm_tokens_total", "Tokens sent to and generated by the model.", ["model", "kind"])
+TOOL_SECONDS = histogram("tool_call_seconds", "Duration of agent tool calls.", ["tool", "status"])
+TOOL_OUTPUT_BYTES = histogram("tool_output_bytes", "Size of agent tool outputs.", ["tool"], buckets=SIZE_BUCKETS)
+
+# Formatter
+FORMATTER_SECONDS = histogram("formatter_call_seconds", "Duration of formatter Gemini calls.", ["outcome"])
+
+# Errors by the stage that failed
+ERRORS = counter("errors_total", "Errors by stage.", ["stage"])
@@ -0,0 +1,361 @@
+"""
+Content-addressed store for crawled pages.
+
+Crawled page text is stored on disk in SQLite, keyed by normalized URL. Page bodies are
+compressed with zlib and deduplicated by their SHA-256 content hash, so mirrors and
+unchanged re-crawls cost no extra space.
+
+Every stored page goes through a freshness policy:
+
+* fresh: younger than `max_age`, served directly
+* stale: older than `max_age` but within `stale_while_revalidate`, served immediately while
+  a background refresh fetches a new copy
+* expired: older than both, treated as a miss
+
+The total compressed size of stored bodies is kept under `max_bytes` by evicting the least
+recently accessed pages first.
+
+When `duplicate_distance` is set, every stored page is also given a SimHash fingerprint. A page
+whose text is a near-duplicate of a page already stored under another URL (a syndicated copy
+or mirror) is stored as a pointer to the first copy's body instead of a new body.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.utils import config
+from app.utils.fingerprint import bands, hamming, simhash, to_signed
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visitor and never change page content
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Least recently accessed pages read per query while evicting
+EVICT_BATCH = 64
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings share one store entry.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking parameters
+    and trailing slashes, and sorts the remaining query parameters.
+
+    Args:
+        url (str): The URL to normalize.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class StoredPage:
+    """
+    A page served from the store.
+
+    Attributes:
+        url (str): The URL the page was fetched from.
+        text (str): The extracted page text.
+        fetched_at (float): Unix time the page was fetched.
+        fresh (bool): Whether the page is within `max_age`.
+    """
+    url: str
+    text: str
+    fetched_at: float
+    fresh: bool
+
+
+class PageStore:
+    """
+    SQLite-backed, compressed and deduplicated store for crawled page text.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_bytes (int): Budget for the total compressed size of stored bodies.
+        max_age (float): Seconds a page is considered fresh.
+        stale_while_revalidate (float): Extra seconds a stale page may still be served
+            while it is refreshed in the background.
+        duplicate_distance (Optional[int]): Largest SimHash Hamming distance at which a new page
+            is stored as a pointer to a near-duplicate stored page, or None to disable.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_bytes: int,
+            max_age: float,
+            stale_while_revalidate: float = 0.0,
+            refresh_workers: int = 2,
+            duplicate_distance: Optional[int] = None
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.duplicate_distance = duplicate_distance
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url_key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " content_hash TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_hash ON pages (content_hash)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " url_key TEXT PRIMARY KEY,"
+            " simhash INTEGER NOT NULL,"
+            " band0 INTEGER NOT NULL,"
+            " band1 INTEGER NOT NULL,"
+            " band2 INTEGER NOT NULL,"
+            " band3 INTEGER NOT NULL)"
+        )
+        for band in range(4):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS fingerprints_band{band} ON fingerprints (band{band})"
+            )
+
+        # Running total of the compressed body sizes, so puts never sum the whole table
+        self._bytes = self._sum_bytes()
+
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="page-refresh"
+        )
+        self._refreshing: Set[str] = set()
+
+    def lookup(self, url: str) -> Optional[StoredPage]:
+        """
+        Look up a page that is fresh or still servable while stale.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            Optional[StoredPage]: The stored page, or None if missing or expired.
+        """
+        now = time.time()
+        url_key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.url, p.fetched_at, b.body FROM pages p"
+                " JOIN blobs b ON b.content_hash = p.content_hash"
+                " WHERE p.url_key = ?",
+                (url_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            stored_url, fetched_at, body = row
+            age = now - fetched_at
+            if age > self.max_age + self.stale_while_revalidate:
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url_key = ?", (now, url_key))
+
+        return StoredPage(
+            url=stored_url,
+            text=zlib.decompress(body).decode("utf-8"),
+            fetched_at=fetched_at,
+            fresh=age <= self.max_age,
+        )
+
+    def put(self, url: str, text: str) -> str:
+        """
+        Store the text of a page.
+
+        Args:
+            url (str): The page URL.
+            text (str): The extracted page text.
+
+        Returns:
+            str: The SHA-256 content hash of the stored body, which is the first copy's body
+                when the page is a near-duplicate of a page stored under another URL.
+        """
+        raw = text.encode("utf-8")
+        content_hash = hashlib.sha256(raw).hexdigest()
+        # Compress before taking the lock, which lookups wait for
+        body = zlib.compress(raw, 6)
+        url_key = normalize_url(url)
+        fingerprint = simhash(text) if self.duplicate_distance is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if fingerprint is not None:
+                    original = self._find_near_duplicate(url_key, fingerprint)
+                    if original is not None:
+                        logger.info(f"Stored '{url}' as a near-duplicate of '{original[0]}'")
+                        content_hash = original[1]
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO fingerprints (url_key, simhash, band0, band1, band2, band3)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (url_key, to_signed(fingerprint), *bands(fingerprint)),
+                    )
+
+                exists = self._conn.execute(
+                    "SELECT 1 FROM blobs WHERE content_hash = ?", (content_hash,)
+                ).fetchone()
+                if exists is None:
+                    self._conn.execute(
+                        "INSERT INTO blobs (content_hash, body, size) VALUES (?, ?, ?)",
+                        (content_hash, body, len(body)),
+                    )
+                    self._bytes += len(body)
+                previous = self._conn.execute(
+                    "SELECT content_hash FROM pages WHERE url_key = ?", (url_key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages (url_key, url, content_hash, fetched_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (url_key, url, content_hash, now, now),
+                )
+                if previous is not None and previous[0] != content_hash:
+                    self._release(previous[0])
+                self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # The running total counted the rolled back changes
+                self._bytes = self._sum_bytes()
+                raise
+        return content_hash
+
+    def refresh_in_background(self, url: str, fetch: Callable[[str], Optional[str]]) -> None:
+        """
+        Re-fetch a stale page on a background thread and store the new copy.
+
+        Concurrent refreshes of the same URL are collapsed into one.
+
+        Args:
+            url (str): The page URL.
+            fetch (Callable[[str], Optional[str]]): Function returning the page text, or None
+                if the page has no text.
+        """
+        url_key = normalize_url(url)
+        with self._lock:
+            if url_key in self._refreshing:
+                return
+            self._refreshing.add(url_key)
+
+        def _refresh() -> None:
+            try:
+                text = fetch(url)
+                if text:
+                    self.put(url, text)
+            except Exception as e:
+                logger.warning(f"Background refresh of '{url}' failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url_key)
+
+        self._refresh_executor.submit(_refresh)
+
+    def total_bytes(self) -> int:
+        """Get the total compressed size of stored bodies."""
+        with self._lock:
+            return self._bytes
+
+    def _sum_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _find_near_duplicate(self, url_key: str, fingerprint: int) -> Optional[Tuple[str, str]]:
+        """Find the URL and content hash of a stored near-duplicate through band lookups."""
+        fingerprint_bands = bands(fingerprint)
+        rows = self._conn.execute(
+            "SELECT p.url, p.content_hash, f.simhash FROM fingerprints f"
+            " JOIN pages p ON p.url_key = f.url_key"
+            " WHERE f.url_key != ? AND (f.band0 = ? OR f.band1 = ? OR f.band2 = ? OR f.band3 = ?)",
+            (url_key, *fingerprint_bands),
+        ).fetchall()
+        best = None
+        for stored_url, content_hash, stored in rows:
+            distance = hamming(fingerprint, stored)
+            if distance <= self.duplicate_distance and (best is None or distance < best[0]):
+                best = (distance, stored_url, content_hash)
+        return (best[1], best[2]) if best is not None else None
+
+    def _release(self, content_hash: str) -> None:
+        """Delete a body once no page refers to it anymore."""
+        referenced = self._conn.execute(
+            "SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if referenced is not None:
+            return
+        row = self._conn.execute(
+            "SELECT size FROM blobs WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+            self._bytes -= row[0]
+
+    def _evict(self) -> None:
+        """Evict least recently accessed pages until stored bodies fit in `max_bytes`."""
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url_key, content_hash FROM pages ORDER BY accessed_at ASC LIMIT ?",
+                (EVICT_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            for url_key, content_hash in rows:
+                self._conn.execute("DELETE FROM pages WHERE url_key = ?", (url_key,))
+                self._conn.execute("DELETE FROM fingerprints WHERE url_key = ?", (url_key,))
+                self._release(content_hash)
+                if self._bytes <= self.max_bytes:
+                    break
+
+
+@lru_cache()
+def get_page_store() -> Optional[PageStore]:
+    """
+    Get the process-wide page store.
+
+    Returns:
+        Optional[PageStore]: The configured store, or None when disabled.
+    """
+    if not config.PAGE_STORE_ENABLED:
+        return None
+    return PageStore(
+        path=config.PAGE_STORE_PATH,
+        max_bytes=config.PAGE_STORE_MAX_BYTES,
+        max_age=config.PAGE_MAX_AGE,
+        stale_while_revalidate=config.PAGE_STALE_WHILE_REVALIDATE,
+        duplicate_distance=config.PAGE_DUPLICATE_DISTANCE if config.DEDUP_ENABLED else None,
+    )
@@ -0,0 +1,360 @@
+"""
+Opt-in sampling profiler for single API requests.
+
+When one query is slow, the metrics tell which stage was slow across all requests, not where
+that request's time went. A profiled request is sampled by a background thread: every
+`interval` seconds it records the call stack of each thread working for the request, whether
+the thread is running or waiting, so the samples add up to wall time.
+
+A request is profiled when it carries the `X-Profile` header with the configured admin token,
+or when it is drawn at the configured sampling rate. When it finishes, two files are written to
+`config.PROFILE_DIR` by a background thread, off the event loop:
+
+* `<id>.speedscope.json`: the samples in the speedscope format, one profile per thread, to be
+  opened at https://www.speedscope.app as a flame graph
+* `<id>.breakdown.json`: wall time per stage (queue wait, model calls, the agent's Python
+  executor, each tool, JSON handling, ...) and the functions with the most samples
+
+A sample is attributed to the stage of its innermost frame that belongs to one, so JSON parsed
+inside a tool counts as JSON handling, not as the tool. Requests not profiled cost one
+comparison.
+
+Work reaches the profiler through a context variable: the research run calls `attach` on its
+pool thread to have that thread sampled.
+
+Example:
+
+    >>> with profile_request("research", x_profile) as profile:
+    ...     result = await service.run_research_async(query)
+    >>> profile.saved.wait()
+    >>> profile.path  # the speedscope file
+"""
+
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.utils import config
+
+logger = logging.getLogger(__name__)
+
+# Stage of a sample, by a fragment of its frame's file path; the first match wins
+STAGES: Tuple[Tuple[str, str], ...] = (
+    ("smolagents/local_python_executor", "executor"),
+    ("smolagents/models", "model"),
+    ("app/agents/rate_limited_model", "model"),
+    ("litellm/", "model"),
+    ("google/genai/", "gemini"),
+    ("app/agents/memory_compaction", "memory_compaction"),
+    ("app/tools/", "tool"),
+    ("json/", "json"),
+    ("pydantic", "validation"),
+    ("asyncio/", "event_loop"),
+    ("selectors", "event_loop"),
+)
+
+Frame = Tuple[str, str, int]
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+
+
+def _stage(filename: str) -> Optional[str]:
+    """Get the stage a frame's file belongs to, if any."""
+    path = filename.replace(os.sep, "/")
+    for fragment, stage in STAGES:
+        if fragment in path:
+            if stage == "tool":
+                return "tool:" + os.path.splitext(os.path.basename(path))[0].replace("_tool", "")
+            return stage
+    return None
+
+
+class Profile:
+    """
+    Wall-clock stack samples of the threads working for one request.
+
+    Attributes:
+        name (str): The profiled endpoint, e.g. "research".
+        id (str): Unique id of the profile, also the name of its files.
+        interval (float): Seconds between samples.
+        started (float): `time.monotonic()` value when profiling started.
+        attached (Optional[float]): `time.monotonic()` value when the first thread attached.
+        path (Optional[str]): Path of the speedscope file, once written.
+        saved (threading.Event): Set once a profiled request's files are written, or failed to be.
+    """
+
+    def __init__(self, name: str, interval: float = 0.005) -> None:
+        self.name = name
+        self.id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.interval = interval
+        self.started = time.monotonic()
+        self.attached: Optional[float] = None
+        self.path: Optional[str] = None
+        self.saved = threading.Event()
+        self._threads: Dict[int, str] = {}
+        self._names: Dict[int, str] = {}
+        self._frames: Dict[Frame, int] = {}
+        self._samples: Dict[int, List[Tuple[Tuple[int, ...], float]]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._finished: Optional[float] = None
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self) -> "Profile":
+        """Start sampling."""
+        self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler to finish."""
+        self._finished = time.monotonic()
+        self._stopped.set()
+        self._sampler.join()
+
+    def watch(self, thread: Optional[threading.Thread] = None) -> None:
+        """
+        Start sampling a thread.
+
+        Args:
+            thread (Optional[threading.Thread]): The thread; defaults to the current one.
+        """
+        thread = thread or threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self._names[thread.ident] = thread.name
+            if self.attached is None:
+                self.attached = time.monotonic()
+
+    def unwatch(self, thread: Optional[threading.Thread] = None) -> None:
+        """
+        Stop sampling a thread.
+
+        Args:
+            thread (Optional[threading.Thread]): The thread; defaults to the current one.
+        """
+        thread = thread or threading.current_thread()
+        with self._lock:
+            self._threads.pop(thread.ident, None)
+
+    def _run(self) -> None:
+        """Sample the watched threads until stopped."""
+        last = time.monotonic()
+        while not self._stopped.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                threads = list(self._threads)
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._record(ident, frame, now - last)
+            last = now
+
+    def _record(self, ident: int, frame: Any, weight: float) -> None:
+        """Store one stack, outermost frame first."""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frames.get(key)
+            if index is None:
+                index = self._frames[key] = len(self._frames)
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        self._samples.setdefault(ident, []).append((tuple(stack), weight))
+
+    def speedscope(self) -> Dict[str, Any]:
+        """
+        Get the samples in the speedscope file format.
+
+        Returns:
+            Dict[str, Any]: One sampled profile per thread, weighted in seconds.
+        """
+        frames = sorted(self._frames.items(), key=lambda item: item[1])
+        profiles = []
+        for ident, samples in self._samples.items():
+            total = sum(weight for _, weight in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.name}: {self._names.get(ident, ident)}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [list(stack) for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.id,
+            "exporter": "research-agent-api",
+            "shared": {"frames": [{"name": name, "file": file, "line": line} for (name, file, line), _ in frames]},
+            "profiles": profiles,
+        }
+
+    def breakdown(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Get the wall time per stage and the functions sampled most.
+
+        Returns:
+            Dict[str, Any]: Wall time, queue wait and sampled time in seconds, seconds and share
+                per stage, and the `top` functions by own and total time.
+        """
+        frames = {index: key for key, index in self._frames.items()}
+        stages: Counter = Counter()
+        own: Counter = Counter()
+        total: Counter = Counter()
+        sampled = 0.0
+        for samples in self._samples.values():
+            for stack, weight in samples:
+                sampled += weight
+                stage = next(
+                    (found for found in (_stage(frames[index][1]) for index in reversed(stack)) if found), "other"
+                )
+                stages[stage] += weight
+                if stack:
+                    own[stack[-1]] += weight
+                for index in set(stack):
+                    total[index] += weight
+
+        def label(index: int) -> str:
+            name, file, line = frames[index]
+            return f"{name} ({file}:{line})"
+
+        finished = self._finished or time.monotonic()
+        return {
+            "id": self.id,
+            "endpoint": self.name,
+            "wall_seconds": round(finished - self.started, 4),
+            "queue_seconds": round((self.attached or finished) - self.started, 4),
+            "sampled_seconds": round(sampled, 4),
+            "samples": sum(len(samples) for samples in self._samples.values()),
+            "stages": {
+                stage: {"seconds": round(seconds, 4), "share": round(seconds / sampled, 4) if sampled else 0.0}
+                for stage, seconds in stages.most_common()
+            },
+            "top_own": [{"function": label(index), "seconds": round(seconds, 4)} for index, seconds in own.most_common(top)],
+            "top_total": [{"function": label(index), "seconds": round(seconds, 4)} for index, seconds in total.most_common(top)],
+        }
+
+    def save(self, directory: str) -> str:
+        """
+        Write the speedscope file and the breakdown.
+
+        Args:
+            directory (str): Directory the files are written to.
+
+        Returns:
+            str: Path of the speedscope file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{self.id}.speedscope.json")
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(self.speedscope(), file)
+        with open(os.path.join(directory, f"{self.id}.breakdown.json"), "w", encoding="utf-8") as file:
+            json.dump(self.breakdown(), file, indent=2)
+        return self.path
+
+
+def requested(header: Optional[str]) -> bool:
+    """
+    Decide whether to profile a request.
+
+    Args:
+        header (Optional[str]): The request's `X-Profile` header.
+
+    Returns:
+        bool: True if the header carries the admin token, or the request is drawn at
+            `config.PROFILE_SAMPLE_RATE`.
+    """
+    if header and config.PROFILE_TOKEN and hmac.compare_digest(header, config.PROFILE_TOKEN):
+        return True
+    return config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+
+
+@contextmanager
+def _profile(name: str, watch_current: bool) -> Iterator[Profile]:
+    """Profile the enclosed block and save the result in the background."""
+    profile = Profile(name, interval=config.PROFILE_INTERVAL).start()
+    if watch_current:
+        profile.watch()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+        if watch_current:
+            profile.unwatch()
+        # Joining the sampler and writing the files would block the event loop the request
+        # handler runs on
+        threading.Thread(target=_finish, args=(profile,), name=f"profile-save-{profile.id}", daemon=True).start()
+
+
+def _finish(profile: Profile) -> None:
+    """Stop a profile and write its files."""
+    try:
+        profile.stop()
+        profile.save(config.PROFILE_DIR)
+        logger.info(f"Saved profile of {profile.name} request to {profile.path}")
+    except OSError as e:
+        logger.warning(f"Could not save profile {profile.id}: {str(e)}")
+    finally:
+        profile.saved.set()
+
+
+def profile_request(name: str, header: Optional[str], watch_current: bool = False):
+    """
+    Profile a request if it asks for it or is drawn for sampling.
+
+    Args:
+        name (str): The endpoint, used in file names.
+        header (Optional[str]): The request's `X-Profile` header.
+        watch_current (bool): Whether to sample the current thread too, e.g. the event loop
+            for work done in the request handler itself. The loop also runs other requests,
+            whose work then shows up in the profile.
+
+    Returns:
+        ContextManager[Optional[Profile]]: Yields the profile, or None when not profiled.
+    """
+    if not requested(header):
+        return nullcontext()
+    return _profile(name, watch_current)
+
+
+def current_profile() -> Optional[Profile]:
+    """
+    Get the profile of the current request.
+
+    Returns:
+        Optional[Profile]: The profile, or None when the request is not profiled.
+    """
+    return _active.get()
+
+
+@contextmanager
+def attach(profile: Optional[Profile]) -> Iterator[None]:
+    """
+    Sample the current thread for a profile while the enclosed block runs.
+
+    Args:
+        profile (Optional[Profile]): The profile; None does nothing.
+    """
+    if profile is None:
+        yield
+        return
+    profile.watch()
+    try:
+        yield
+    finally:
+        profile.unwatch()
@@ -0,0 +1,362 @@
+"""
+Client-side rate limiting and retries for the upstream APIs.
+
+Under load, Serper.dev and Gemini answer with 429 once their quota is exceeded. Sending more
+requests then only produces more 429s, so throughput collapses. This module keeps callers
+within the quota instead:
+
+* `TokenBucket` admits at most `qps` calls per second on average, with bursts up to `burst`
+* `RateLimiter` adds a cap on concurrent calls, and pauses all callers when the API asks to
+  slow down (429 with or without `Retry-After`)
+* `call_with_retries` retries throttled (429), failing (5xx) and unreachable calls with
+  exponential backoff and full jitter, honouring `Retry-After`
+
+Inside a research run with a deadline, a call does not wait for its quota or retry past the
+deadline; it raises `DeadlineExceededError` or returns its last result instead.
+
+There is one limiter per service, endpoint and API key, shared by every agent in the process:
+
+    >>> limiter = get_limiter("serper", "https://google.serper.dev/search", api_key)
+    >>> response = call_with_retries(lambda: client.post(...), limiter, classify_response)
+"""
+
+import email.utils
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from app.utils import config, metrics
+from app.utils.run_context import DeadlineExceededError, current_run
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Judges an attempt from its result or exception: (retry it, the API throttled it, Retry-After)
+Classifier = Callable[[Optional[Any], Optional[BaseException]], Tuple[bool, bool, Optional[float]]]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that schedules calls rather than rejecting them.
+
+    Every call reserves a token and is told how long to wait for it, so waiting callers are
+    admitted in order at the configured rate.
+
+    Attributes:
+        rate (float): Tokens added per second; 0 or less disables the limit.
+        burst (float): Maximum number of tokens held.
+    """
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, possibly one that is not available yet.
+
+        Returns:
+            float: Seconds the caller must wait before using the token.
+        """
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate <= 0:
+                return pause
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, pause)
+
+    def refund(self) -> None:
+        """Give back a token taken by `reserve` for a call that will not be made."""
+        with self._lock:
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + 1)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every caller for a while, e.g. after the API asked to retry later.
+
+        Args:
+            seconds (float): Seconds from now during which no token is usable.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attributes:
+        max_attempts (int): Total attempts per call, including the first.
+        base_delay (float): Backoff ceiling in seconds for the first retry; doubles every retry.
+        max_delay (float): Largest delay in seconds, also applied to `Retry-After`.
+    """
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure).
+            retry_after (Optional[float]): Seconds requested by the API, if any.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        if retry_after is not None:
+            # A little jitter keeps callers released by the same Retry-After from colliding
+            return min(self.max_delay, retry_after + random.uniform(0, self.base_delay))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RateLimiter:
+    """
+    Rate and concurrency limit for one API endpoint and key.
+
+    Attributes:
+        name (str): Name used in logs and statistics.
+        bucket (TokenBucket): The request rate limit.
+        max_concurrency (int): Maximum number of calls in flight; 0 or less disables the cap.
+        policy (RetryPolicy): Retry policy for calls made through this limiter.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            qps: float,
+            burst: float,
+            max_concurrency: int,
+            policy: Optional[RetryPolicy] = None
+    ) -> None:
+        self.name = name
+        self.bucket = TokenBucket(qps, burst)
+        self.max_concurrency = max_concurrency
+        self.policy = policy or RetryPolicy()
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self._stats_lock = threading.Lock()
+        self._counters = {"calls": 0, "throttled": 0, "waited_seconds": 0.0, "retries": 0, "rate_limited": 0}
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Wait for a token and a concurrency slot, and hold the slot for the call.
+
+        Yields:
+            None: Once the call may be made.
+
+        Raises:
+            DeadlineExceededError: If the research run's deadline passes before the call may
+                be made.
+        """
+        run = current_run()
+        remaining = run.remaining() if run is not None else None
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceededError(f"{self.name}: no quota before the research deadline")
+        wait = self.bucket.reserve()
+        if remaining is not None and wait >= remaining:
+            # The call is not made, so it must not use up quota of later calls
+            self.bucket.refund()
+            raise DeadlineExceededError(f"{self.name}: no quota before the research deadline")
+        if wait > 0:
+            time.sleep(wait)
+        if self._slots is not None:
+            if remaining is None:
+                self._slots.acquire()
+            elif not self._slots.acquire(timeout=max(0.0, run.remaining())):
+                self.bucket.refund()
+                raise DeadlineExceededError(f"{self.name}: no free slot before the research deadline")
+        self._count(calls=1, throttled=int(wait > 0), waited_seconds=wait)
+        try:
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def backoff(self, seconds: float, rate_limited: bool) -> None:
+        """
+        Record a failed attempt that will be retried.
+
+        Args:
+            seconds (float): Delay before the retry.
+            rate_limited (bool): Whether the API reported a rate limit; all callers of the
+                limiter are then held back for the delay, not just the one retrying.
+        """
+        self._count(retries=1, rate_limited=int(rate_limited))
+        if rate_limited:
+            self.bucket.pause(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the limiter counters.
+
+        Returns:
+            Dict[str, Any]: Calls, throttled calls, seconds spent waiting, retries and 429s.
+        """
+        with self._stats_lock:
+            counters = dict(self._counters)
+        counters["waited_seconds"] = round(counters["waited_seconds"], 3)
+        return counters
+
+    def _count(self, **increments: float) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self._counters[key] += value
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a `Retry-After` header given in seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): The header value.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retries(call: Callable[[], T], limiter: RateLimiter, classify: Classifier) -> T:
+    """
+    Make a call within a limiter, retrying it while `classify` says so.
+
+    Args:
+        call (Callable[[], T]): Makes one attempt.
+        limiter (RateLimiter): The limiter of the endpoint being called.
+        classify (Classifier): Given the attempt's result or exception, returns whether to
+            retry it, whether the API throttled it, and the `Retry-After` delay, if any.
+
+    Returns:
+        T: The result of the last attempt.
+
+    Raises:
+        BaseException: The exception of the last attempt, if it raised.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        result, error = None, None
+        with limiter.slot():
+            try:
+                result = call()
+            except Exception as e:
+                error = e
+
+        retry, throttled, retry_after = classify(result, error)
+        delay = limiter.policy.delay(attempt, retry_after)
+        run = current_run()
+        remaining = run.remaining() if run is not None else None
+        out_of_time = remaining is not None and delay >= remaining
+        if not retry or attempt >= limiter.policy.max_attempts or out_of_time:
+            if error is not None:
+                raise error
+            return result
+
+        limiter.backoff(delay, rate_limited=throttled)
+        logger.warning(
+            f"{limiter.name}: attempt {attempt} failed ({error or 'retryable response'}), "
+            f"retrying in {delay:.2f}s"
+        )
+        time.sleep(delay)
+
+
+def _service_limits(service: str) -> Tuple[float, float, int]:
+    """Get the configured (qps, burst, max concurrency) of a service."""
+    if service == "llm":
+        return config.LLM_QPS, config.LLM_BURST, config.LLM_MAX_CONCURRENCY
+    return config.SERPER_QPS, config.SERPER_BURST, config.SERPER_MAX_CONCURRENCY
+
+
+_limiters: Dict[Tuple[str, str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(service: str, endpoint: str, api_key: Optional[str] = None) -> RateLimiter:
+    """
+    Get the process-wide limiter for a service endpoint and API key.
+
+    Args:
+        service (str): "serper" or "llm"; selects the configured limits.
+        endpoint (str): The endpoint URL or model name.
+        api_key (Optional[str]): The API key; each key gets its own quota.
+
+    Returns:
+        RateLimiter: The shared limiter.
+    """
+    key_id = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:8]
+    key = (service, endpoint, key_id)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            qps, burst, max_concurrency = _service_limits(service)
+            limiter = RateLimiter(
+                name=f"{service}:{endpoint}:{key_id}",
+                qps=qps,
+                burst=burst,
+                max_concurrency=max_concurrency,
+                policy=RetryPolicy(
+                    max_attempts=config.RETRY_MAX_ATTEMPTS,
+                    base_delay=config.RETRY_BASE_DELAY,
+                    max_delay=config.RETRY_MAX_DELAY,
+                ),
+            )
+            _limiters[key] = limiter
+        return limiter
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the counters of every limiter created so far.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Counters by limiter name.
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def _collect_metrics():
+    """Export the limiter counters as metrics."""
+    counters = stats()
+    return [
+        (f"rate_limit_{counter}_total", "counter", help,
+         [({"limiter": name}, values[counter]) for name, values in counters.items()])
+        for counter, help in (
+            ("calls", "Calls made through a rate limiter."),
+            ("throttled", "Calls that waited for their rate limit."),
+            ("waited_seconds", "Seconds calls waited for their rate limit."),
+            ("retries", "Failed calls retried by a rate limiter."),
+            ("rate_limited", "Calls the API answered with a rate limit error."),
+        )
+    ]
+
+
+metrics.register_collector(_collect_metrics)
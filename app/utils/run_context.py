@@ -0,0 +1,261 @@
+"""
+Per-run state shared by the tools of one research run.
+
+A research run executes on one pool thread, and the agent calls its tools on that same thread.
+`run_scope` stores a `RunContext` in a context variable for the duration of the run, so tools
+can read and update state that belongs to the run without it being passed through the agent:
+the research query, the URLs the search tools have already returned, and the fingerprints of
+the pages and snippets already read, used to spot near-duplicates.
+
+A run can also carry a deadline and a cancellation event. Every HTTP request and model call
+made during the run caps its timeout to the time remaining, and `check` raises once the
+deadline has passed or the caller has cancelled the run.
+
+Threads started by a tool do not inherit the context variable on their own; run their work
+through `contextvars.copy_context().run` to keep the run context.
+
+Example:
+
+    >>> with run_scope("solar panel efficiency", deadline=time.monotonic() + 300) as run:
+    ...     agent.run(task)
+    >>> current_run().query  # inside a tool
+    >>> current_run().timeout(30)  # at most 30s, less if the deadline is closer
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import AbstractSet, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from app.utils.fingerprint import hamming, jaccard
+from app.utils.page_store import normalize_url
+
+
+class RunCancelledError(RuntimeError):
+    """Raised inside a research run when its caller cancelled it."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised inside a research run when its deadline has passed."""
+
+
+@dataclass
+class RunContext:
+    """
+    State of one research run.
+
+    Attributes:
+        query (str): The research query.
+        seen_urls (Set[str]): Normalized URLs already returned to the agent by a search tool.
+        crawled_urls (Set[str]): Normalized URLs whose content was already returned by a crawler.
+        duplicates (Dict[str, str]): Normalized URLs found to be near-duplicates, mapped to the
+            URL of the first copy.
+        deadline (Optional[float]): `time.monotonic()` value by which the run's work must be
+            done, or None for no deadline.
+        cancel (Optional[threading.Event]): Set by the caller to cancel the run.
+    """
+    query: str
+    deadline: Optional[float] = None
+    cancel: Optional[threading.Event] = field(default=None, repr=False, compare=False)
+    seen_urls: Set[str] = field(default_factory=set)
+    crawled_urls: Set[str] = field(default_factory=set)
+    duplicates: Dict[str, str] = field(default_factory=dict)
+    _pages: List[Tuple[int, str]] = field(default_factory=list, repr=False)
+    _snippets: List[Tuple[FrozenSet[str], str]] = field(default_factory=list, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def remaining(self) -> Optional[float]:
+        """
+        Get the time left before the deadline.
+
+        Returns:
+            Optional[float]: Seconds left, negative once the deadline has passed, or None
+                without a deadline.
+        """
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self) -> None:
+        """
+        Stop the run if it was cancelled or its deadline has passed.
+
+        Raises:
+            RunCancelledError: If the caller cancelled the run.
+            DeadlineExceededError: If the deadline has passed.
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            raise RunCancelledError("Research run cancelled")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceededError("Research deadline exceeded")
+
+    def timeout(self, seconds: Optional[float]) -> Optional[float]:
+        """
+        Cap a timeout to the time left before the deadline.
+
+        Args:
+            seconds (Optional[float]): The timeout; None for no timeout of its own.
+
+        Returns:
+            Optional[float]: The smaller of the timeout and the time left.
+
+        Raises:
+            RunCancelledError: If the caller cancelled the run.
+            DeadlineExceededError: If the deadline has passed.
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        return remaining if seconds is None else min(seconds, remaining)
+
+    def mark_seen(self, url: str) -> bool:
+        """
+        Record that a URL was returned to the agent.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            bool: True if the URL had not been returned earlier in the run.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            if key in self.seen_urls:
+                return False
+            self.seen_urls.add(key)
+            return True
+
+    def match_page(self, url: str, fingerprint: int, max_distance: int) -> Optional[str]:
+        """
+        Find an earlier page of the run whose content is a near-duplicate of a page.
+
+        The page is remembered as the first copy when no near-duplicate is found, and its URL is
+        recorded as crawled either way.
+
+        Args:
+            url (str): The page URL.
+            fingerprint (int): SimHash of the page text.
+            max_distance (int): Largest Hamming distance counted as a near-duplicate.
+
+        Returns:
+            Optional[str]: URL of the first copy, or None if the page is new to the run.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            self.crawled_urls.add(key)
+            for other, other_url in self._pages:
+                if hamming(fingerprint, other) <= max_distance:
+                    if normalize_url(other_url) == key:
+                        return None
+                    self.duplicates[key] = other_url
+                    return other_url
+            self._pages.append((fingerprint, url))
+            return None
+
+    def match_snippet(self, url: str, terms: AbstractSet[str], min_similarity: float) -> Optional[str]:
+        """
+        Find an earlier search result of the run whose snippet is a near-duplicate of another.
+
+        Args:
+            url (str): The result URL.
+            terms (AbstractSet[str]): Terms of the result title and snippet.
+            min_similarity (float): Smallest Jaccard similarity counted as a near-duplicate.
+
+        Returns:
+            Optional[str]: URL of the first copy, or None if the result is new to the run.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            for other, other_url in self._snippets:
+                if jaccard(terms, other) >= min_similarity:
+                    if normalize_url(other_url) == key:
+                        return None
+                    self.duplicates[key] = other_url
+                    return other_url
+            self._snippets.append((frozenset(terms), url))
+            return None
+
+    def duplicate_of(self, url: str, crawled_only: bool = False) -> Optional[str]:
+        """
+        Get the first copy of a URL known to be a near-duplicate.
+
+        Args:
+            url (str): The URL.
+            crawled_only (bool): Only return the first copy if its content was already crawled.
+
+        Returns:
+            Optional[str]: URL of the first copy, or None.
+        """
+        with self._lock:
+            original = self.duplicates.get(normalize_url(url))
+            if original is None or (crawled_only and normalize_url(original) not in self.crawled_urls):
+                return None
+            return original
+
+
+_current_run: ContextVar[Optional[RunContext]] = ContextVar("current_run", default=None)
+
+
+def current_run() -> Optional[RunContext]:
+    """
+    Get the context of the research run executing on this thread.
+
+    Returns:
+        Optional[RunContext]: The run context, or None outside a research run.
+    """
+    return _current_run.get()
+
+
+@contextmanager
+def run_scope(
+        query: str,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None
+) -> Iterator[RunContext]:
+    """
+    Make a fresh `RunContext` current for the duration of a research run.
+
+    Args:
+        query (str): The research query.
+        deadline (Optional[float]): `time.monotonic()` value by which the run must be done.
+        cancel (Optional[threading.Event]): Event the caller sets to cancel the run.
+
+    Yields:
+        RunContext: The run context.
+    """
+    run = RunContext(query=query, deadline=deadline, cancel=cancel)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def time_limit(seconds: float) -> Iterator[RunContext]:
+    """
+    Give the work in the block at most `seconds`, or less if the run's deadline is closer.
+
+    For the block, the current run is replaced by a copy with the earlier deadline that shares
+    the run's state, so HTTP requests, rate limit waits and retries in the block stop in time.
+    Outside a research run, a run with only the deadline is used.
+
+    Args:
+        seconds (float): Time allowed for the block.
+
+    Yields:
+        RunContext: The run context in effect for the block.
+    """
+    deadline = time.monotonic() + seconds
+    run = current_run()
+    if run is None:
+        limited = RunContext(query="", deadline=deadline)
+    else:
+        limited = replace(run, deadline=deadline if run.deadline is None else min(deadline, run.deadline))
+    token = _current_run.set(limited)
+    try:
+        yield limited
+    finally:
+        _current_run.reset(token)
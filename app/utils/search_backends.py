@@ -0,0 +1,379 @@
+"""
+Web search backends and hedged search.
+
+`WebSearchTool` used to depend on Serper.dev alone, so every slow Serper response was a slow
+agent step. A `SearchBackend` runs a query against one search engine and normalizes its results
+to the schema the search tools already consume, a subset of Serper's response:
+
+    {"backend": "serper", "organic": [{"title": ..., "link": ..., "snippet": ..., "date": ...,
+                                       "source": ...}]}
+
+Two backends are provided: `SerperBackend` and `DuckDuckGoBackend` (through the
+`duckduckgo_search` package, which needs no API key).
+
+`HedgedSearch` sends a query to the primary backend and, if no answer has arrived within a
+hedge delay, also to the secondary one; whichever answers first wins. The delay is the
+`percentile`-th percentile of the primary's recent latency, so only its slow tail is hedged
+and the secondary sees a small share of the traffic. If one backend fails, the other's answer
+is used. Inside a research run, the wait ends at the run's deadline. A backend call still
+running when the search returns is abandoned to finish on its pool thread. Every call's
+latency is recorded in a per-backend histogram, also exported as the `search_backend_seconds`
+metric.
+
+Example:
+
+    >>> search = get_web_search(serper_api_key)
+    >>> search.search("solar panel efficiency")["organic"][0]["link"]
+"""
+
+import importlib.util
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.utils import config, http_client, metrics, rate_limit
+from app.utils.run_context import current_run
+
+logger = logging.getLogger(__name__)
+
+# duckduckgo_search is only needed by the DuckDuckGo backend
+DUCKDUCKGO_AVAILABLE: bool = importlib.util.find_spec("duckduckgo_search") is not None
+
+# Latency samples needed before the hedge delay follows the primary's percentile
+MIN_HEDGE_SAMPLES = 20
+
+
+class SearchBackend:
+    """
+    A web search engine returning normalized results.
+
+    Attributes:
+        name (str): Name of the backend, reported in results and statistics.
+        latency (Histogram): Latency of the backend's calls, failed ones included.
+        errors (int): Number of failed calls.
+    """
+    name = "backend"
+
+    def __init__(self) -> None:
+        self.latency = metrics.Histogram()
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> Dict[str, Any]:
+        """
+        Run a query and record its latency.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            Dict[str, Any]: The normalized response, with the backend name and "organic" results.
+        """
+        started = time.monotonic()
+        try:
+            results = self._search(query)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            self.latency.observe(time.monotonic() - started)
+        return {"backend": self.name, "organic": results}
+
+    def _search(self, query: str) -> List[Dict[str, Optional[str]]]:
+        """Run a query and return results with title, link, snippet, date and source."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the backend's counters.
+
+        Returns:
+            Dict[str, Any]: Error count and latency histogram.
+        """
+        with self._lock:
+            errors = self.errors
+        return {"errors": errors, "latency": self.latency.snapshot()}
+
+
+class SerperBackend(SearchBackend):
+    """
+    Google results through the Serper.dev search API.
+
+    Attributes:
+        url (str): Endpoint URL of the Serper.dev search API.
+        headers (dict): HTTP headers for API requests.
+        limiter (RateLimiter): Shared rate limiter and retry policy for the endpoint and API key.
+    """
+    name = "serper"
+
+    def __init__(self, api_key: str, url: Optional[str] = None) -> None:
+        super().__init__()
+        self.url = url or f"{config.SERPER_BASE_URL}/search"
+        self.headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
+        self.limiter = rate_limit.get_limiter("serper", self.url, api_key)
+
+    def _search(self, query: str) -> List[Dict[str, Optional[str]]]:
+        response = http_client.post(self.url, headers=self.headers, json={"q": query}, limiter=self.limiter)
+        response.raise_for_status()
+        return [
+            {
+                "title": result.get("title"),
+                "link": result.get("link"),
+                "snippet": result.get("snippet"),
+                "date": result.get("date"),
+                "source": result.get("source"),
+            }
+            for result in response.json().get("organic") or []
+            if result.get("link")
+        ]
+
+
+class DuckDuckGoBackend(SearchBackend):
+    """
+    DuckDuckGo results through the `duckduckgo_search` package.
+
+    Attributes:
+        max_results (int): Maximum number of results requested.
+    """
+    name = "duckduckgo"
+
+    def __init__(self, max_results: int = 10) -> None:
+        super().__init__()
+        self.max_results = max_results
+
+    def _search(self, query: str) -> List[Dict[str, Optional[str]]]:
+        from duckduckgo_search import DDGS
+
+        timeout = config.HTTP_READ_TIMEOUT
+        run = current_run()
+        if run is not None:
+            timeout = run.timeout(timeout)
+        results = DDGS(timeout=max(1, int(timeout))).text(query, max_results=self.max_results)
+        return [
+            {
+                "title": result.get("title"),
+                "link": result.get("href"),
+                "snippet": result.get("body"),
+                "date": None,
+                "source": None,
+            }
+            for result in results or []
+            if result.get("href")
+        ]
+
+
+class HedgedSearch:
+    """
+    Search that hedges a slow primary backend with a secondary one.
+
+    Attributes:
+        primary (SearchBackend): Backend every query is sent to first.
+        secondary (Optional[SearchBackend]): Backend queried when the primary is slow or fails,
+            or None to use the primary alone.
+        percentile (float): Percentile of the primary's latency after which the secondary is
+            queried.
+        min_delay (float): Smallest hedge delay in seconds.
+        initial_delay (float): Hedge delay in seconds until the primary's latency is known.
+        hedged (int): Number of queries sent to the secondary.
+        secondary_wins (int): Number of queries answered by the secondary.
+        abandoned (int): Number of backend calls left running on the pool after their search
+            returned or gave up.
+    """
+
+    def __init__(
+            self,
+            primary: SearchBackend,
+            secondary: Optional[SearchBackend] = None,
+            percentile: float = 95,
+            min_delay: float = 0.25,
+            initial_delay: float = 1.0,
+            executor: Optional[ThreadPoolExecutor] = None
+    ) -> None:
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.hedged = 0
+        self.secondary_wins = 0
+        self.abandoned = 0
+        self._executor = executor or _executor()
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        """
+        Get the time to wait for the primary before querying the secondary.
+
+        Returns:
+            float: Seconds.
+        """
+        if self.primary.latency.count < MIN_HEDGE_SAMPLES:
+            return self.initial_delay
+        return max(self.min_delay, self.primary.latency.percentile(self.percentile))
+
+    def search(self, query: str) -> Dict[str, Any]:
+        """
+        Run a query, hedging the primary backend with the secondary when it is slow.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            Dict[str, Any]: The normalized response of the first backend that answered.
+
+        Raises:
+            Exception: The primary's error, if every queried backend failed.
+            DeadlineExceededError: If the research run's deadline passed before an answer.
+            RunCancelledError: If the research run was cancelled while waiting.
+        """
+        if self.secondary is None:
+            return self.primary.search(query)
+
+        run = current_run()
+        # Backend calls run on pool threads and must still see the research run's deadline
+        calls = [self._executor.submit(copy_context().run, self.primary.search, query)]
+        primary = calls[0]
+        try:
+            hedge_delay = self.hedge_delay()
+            done, _ = wait([primary], timeout=run.timeout(hedge_delay) if run is not None else hedge_delay)
+            if done and primary.exception() is None:
+                return primary.result()
+            if run is not None:
+                run.check()
+
+            with self._lock:
+                self.hedged += 1
+            calls.append(self._executor.submit(copy_context().run, self.secondary.search, query))
+            secondary = calls[1]
+            pending = {primary, secondary}
+            while pending:
+                # Raises once the deadline has passed
+                timeout = run.timeout(None) if run is not None else None
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in (primary, secondary):
+                    if future in done and future.exception() is None:
+                        if future is secondary:
+                            with self._lock:
+                                self.secondary_wins += 1
+                        return future.result()
+            raise primary.exception()
+        finally:
+            self._abandon(calls)
+
+    def _abandon(self, calls: List[Future]) -> None:
+        """Cancel the calls still queued and count those still running."""
+        running = sum(1 for call in calls if not call.done() and not call.cancel())
+        if running:
+            with self._lock:
+                self.abandoned += running
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the hedging counters and the backends' latency histograms.
+
+        Returns:
+            Dict[str, Any]: Hedge delay, hedged queries, secondary wins, abandoned calls and
+                per-backend counters.
+        """
+        backends = [self.primary] + ([self.secondary] if self.secondary is not None else [])
+        with self._lock:
+            hedged, secondary_wins, abandoned = self.hedged, self.secondary_wins, self.abandoned
+        return {
+            "hedge_delay": self.hedge_delay(),
+            "hedged": hedged,
+            "secondary_wins": secondary_wins,
+            "abandoned": abandoned,
+            "backends": {backend.name: backend.stats() for backend in backends},
+        }
+
+
+@lru_cache()
+def _executor() -> ThreadPoolExecutor:
+    """Get the thread pool running hedged backend calls."""
+    return ThreadPoolExecutor(max_workers=config.SEARCH_HEDGE_WORKERS, thread_name_prefix="search")
+
+
+def create_backend(name: str, serper_api_key: Optional[str] = None) -> SearchBackend:
+    """
+    Create a search backend by name.
+
+    Args:
+        name (str): "serper" or "duckduckgo".
+        serper_api_key (Optional[str]): API key of the Serper backend.
+
+    Returns:
+        SearchBackend: The backend.
+
+    Raises:
+        ValueError: If the backend is unknown or its dependency is not installed.
+    """
+    if name == "serper":
+        return SerperBackend(api_key=serper_api_key)
+    if name == "duckduckgo":
+        if not DUCKDUCKGO_AVAILABLE:
+            raise ValueError("The duckduckgo search backend needs the duckduckgo_search package")
+        return DuckDuckGoBackend()
+    raise ValueError(f"Unknown search backend '{name}', expected 'serper' or 'duckduckgo'")
+
+
+@lru_cache()
+def get_web_search(serper_api_key: Optional[str] = None) -> HedgedSearch:
+    """
+    Get the process-wide web search of the configured backends.
+
+    The first backend of `config.SEARCH_BACKENDS` is the primary and the second, if any, the
+    secondary. Sharing one instance lets every agent contribute to the latency histograms.
+
+    Args:
+        serper_api_key (Optional[str]): API key of the Serper backend.
+
+    Returns:
+        HedgedSearch: The web search.
+    """
+    names = [name.strip().lower() for name in config.SEARCH_BACKENDS.split(",") if name.strip()]
+    backends = [create_backend(name, serper_api_key) for name in names[:2]] or [create_backend("serper", serper_api_key)]
+    return HedgedSearch(
+        primary=backends[0],
+        secondary=backends[1] if len(backends) > 1 else None,
+        percentile=config.SEARCH_HEDGE_PERCENTILE,
+        min_delay=config.SEARCH_HEDGE_MIN_DELAY,
+        initial_delay=config.SEARCH_HEDGE_INITIAL_DELAY,
+    )
+
+
+def stats() -> Optional[Dict[str, Any]]:
+    """
+    Get the counters of the web search, if it has been created.
+
+    Returns:
+        Optional[Dict[str, Any]]: Hedging and backend counters, or None.
+    """
+    if not get_web_search.cache_info().currsize:
+        return None
+    return get_web_search(config.SERPER_API_KEY).stats()
+
+
+def _collect_metrics():
+    """Export the backend latencies and hedging counters of the web search as metrics."""
+    if not get_web_search.cache_info().currsize:
+        return []
+    search = get_web_search(config.SERPER_API_KEY)
+    backends = [search.primary] + ([search.secondary] if search.secondary is not None else [])
+    return [
+        ("search_backend_seconds", "histogram", "Latency of web search backend calls.",
+         [({"backend": backend.name}, backend.latency) for backend in backends]),
+        ("search_backend_errors_total", "counter", "Failed web search backend calls.",
+         [({"backend": backend.name}, backend.errors) for backend in backends]),
+        ("search_hedged_total", "counter", "Web searches also sent to the secondary backend.",
+         [({}, search.hedged)]),
+        ("search_secondary_wins_total", "counter", "Web searches answered by the secondary backend.",
+         [({}, search.secondary_wins)]),
+    ]
+
+
+metrics.register_collector(_collect_metrics)
@@ -0,0 +1,109 @@
+"""
+Compact formatting of Serper.dev search responses.
+
+Serper responses carry knowledge-graph blobs, sitelinks, "people also ask" entries, related
+searches and image URLs. The agent re-reads every tool output in its prompt on each later step,
+so the search tools reduce a response to a short list of records:
+
+    {"title": ..., "url": ..., "snippet": ..., "date": ..., "source": ...}
+
+Results whose URL was already returned earlier in the same research run are dropped, and the
+list is capped at a configurable number of records. A result whose title and snippet nearly
+match an earlier result of the run (a syndicated copy) is collapsed to a pointer:
+
+    {"title": ..., "url": ..., "duplicate_of": <url of the first copy>}
+
+Example:
+
+    >>> compact_results(response.json(), "organic", max_results=8)
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from app.utils.fingerprint import term_set
+from app.utils.run_context import RunContext
+
+
+def _source(result: Dict[str, Any], url: str) -> str:
+    """Get the publisher of a result, falling back to the URL's host."""
+    source = result.get("source")
+    if source:
+        return str(source)
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def compact_results(
+        data: Dict[str, Any],
+        field: str,
+        max_results: int,
+        run: Optional[RunContext] = None,
+        min_similarity: Optional[float] = None
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Reduce a Serper response to compact result records.
+
+    Args:
+        data (Dict[str, Any]): The parsed Serper response.
+        field (str): The response field holding the results ("organic" or "news").
+        max_results (int): Maximum number of records returned.
+        run (Optional[RunContext]): The current research run; URLs it has already seen are
+            dropped and the returned URLs are marked as seen.
+        min_similarity (Optional[float]): Jaccard similarity of title and snippet terms above
+            which a result is collapsed into a pointer to an earlier result of the run, or None
+            to keep near-duplicates.
+
+    Returns:
+        List[Dict[str, Optional[str]]]: Records with title, url, snippet, date and source, or
+            title, url and duplicate_of for near-duplicates.
+    """
+    records: List[Dict[str, Optional[str]]] = []
+    for result in data.get(field) or []:
+        if len(records) >= max_results:
+            break
+        url = result.get("link")
+        if not url:
+            continue
+        if run is not None and not run.mark_seen(url):
+            continue
+        if run is not None and min_similarity is not None:
+            terms = term_set(f"{result.get('title') or ''} {result.get('snippet') or ''}")
+            original = run.match_snippet(url, terms, min_similarity) if terms else None
+            if original is not None:
+                records.append({"title": result.get("title"), "url": url, "duplicate_of": original})
+                continue
+        records.append({
+            "title": result.get("title"),
+            "url": url,
+            "snippet": result.get("snippet"),
+            "date": result.get("date"),
+            "source": _source(result, url),
+        })
+    return records
+
+
+def format_results(
+        text: str,
+        field: str,
+        max_results: int,
+        run: Optional[RunContext] = None,
+        min_similarity: Optional[float] = None
+) -> str:
+    """
+    Convert a raw Serper response body to a compact JSON list of records.
+
+    Args:
+        text (str): The raw response body.
+        field (str): The response field holding the results ("organic" or "news").
+        max_results (int): Maximum number of records returned.
+        run (Optional[RunContext]): The current research run, used to drop URLs already seen.
+        min_similarity (Optional[float]): Similarity above which near-duplicate results are
+            collapsed, or None to keep them.
+
+    Returns:
+        str: JSON list of result records.
+    """
+    records = compact_results(json.loads(text), field, max_results, run, min_similarity)
+    return json.dumps(records, ensure_ascii=False)
@@ -0,0 +1,278 @@
+"""
+Token-aware extraction of relevant text from crawled pages.
+
+Crawled pages often run to tens of thousands of tokens, and everything the crawler returns is
+resent to the model on every later agent step. This module trims a page down to what matters
+for the research query:
+
+1. `strip_boilerplate` drops navigation menus, cookie banners, footers and repeated lines
+2. `chunk_text` splits the page into paragraph-sized chunks
+3. `rank_chunks` scores the chunks against the query with BM25
+4. `extract_relevant` keeps the best chunks that fit a token budget, in page order
+
+Tokens are counted with `tiktoken`. If its encoding cannot be loaded (for example when the
+encoding file cannot be downloaded), an estimate of four characters per token is used.
+
+Example:
+
+    >>> extract_relevant(page_text, query="solar panel efficiency", max_tokens=1500)
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Separator placed between non-adjacent chunks in extracted text
+OMISSION = "[...]"
+
+_WORD = re.compile(r"\w+")
+# Words left out of lexical scoring
+STOP_WORDS = frozenset({
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "i", "in", "is", "it", "me", "of", "on", "or", "please", "tell", "the", "to", "with",
+})
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_BOILERPLATE = re.compile(
+    r"\b(cookies?|accept all|privacy policy|terms of (use|service)|all rights reserved|"
+    r"skip to (main )?content|sign (in|up)|log ?in|subscribe|newsletter|follow us|"
+    r"share (on|this)|back to top|advertisement|javascript)\b|©",
+    re.IGNORECASE,
+)
+# Share of a short line's words in boilerplate phrases at which the line is dropped
+BOILERPLATE_SHARE = 1 / 3
+
+
+@lru_cache()
+def _encoding() -> Optional[Any]:
+    """Load the tiktoken encoding once, or return None if it is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The number of tokens, estimated when tiktoken is unavailable.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-case terms for lexical scoring, dropping stop words.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The terms.
+    """
+    return [word for word in _WORD.findall(text.casefold()) if word not in STOP_WORDS]
+
+
+def _is_short(line: str) -> bool:
+    """Whether a line looks like a menu entry or label rather than prose."""
+    return len(line.split()) <= 4 and not line.endswith((".", "!", "?", ":"))
+
+
+def _is_boilerplate(line: str) -> bool:
+    """Whether a line is short and mostly made of boilerplate phrases."""
+    words = len(_WORD.findall(line))
+    if words > 25:
+        return False
+    matched = sum(len(_WORD.findall(match.group())) for match in _BOILERPLATE.finditer(line))
+    if not matched:
+        return bool(_BOILERPLATE.search(line)) and words <= 4
+    return matched >= words * BOILERPLATE_SHARE
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Remove navigation, cookie banners, footers and repeated lines from page text.
+
+    Short lines made mostly of common boilerplate phrases (at least `BOILERPLATE_SHARE` of
+    their words) are dropped, as are runs of three or more consecutive short lines (typical of
+    menus) and exact repeats of earlier lines. Prose merely mentioning such a phrase is kept.
+
+    Args:
+        text (str): The page text.
+
+    Returns:
+        str: The cleaned text, with paragraphs separated by blank lines.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    keep = [bool(line) for line in lines]
+
+    seen = set()
+    for index, line in enumerate(lines):
+        if not line:
+            continue
+        if line in seen or _is_boilerplate(line):
+            keep[index] = False
+        seen.add(line)
+
+    # Drop runs of short lines, which are almost always menus or link lists
+    run: List[int] = []
+    for index, line in enumerate(lines + [""]):
+        if line and _is_short(line):
+            run.append(index)
+            continue
+        if len(run) >= 3:
+            for short_index in run:
+                keep[short_index] = False
+        run = []
+
+    paragraphs: List[str] = []
+    current: List[str] = []
+    for line, kept in zip(lines, keep):
+        if kept:
+            current.append(line)
+        elif not line and current:
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return "\n\n".join(paragraphs)
+
+
+def chunk_text(text: str, target_tokens: int = 200) -> List[str]:
+    """
+    Split text into chunks of roughly `target_tokens` tokens along paragraph boundaries.
+
+    Small paragraphs are merged; paragraphs larger than twice the target are split into
+    sentences.
+
+    Args:
+        text (str): The text, with paragraphs separated by blank lines.
+        target_tokens (int): Desired chunk size.
+
+    Returns:
+        List[str]: The chunks, in text order.
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) > 2 * target_tokens:
+            pieces.extend(sentence for sentence in _SENTENCE_END.split(paragraph) if sentence)
+        else:
+            pieces.append(paragraph)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and current_tokens + tokens > target_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def rank_chunks(chunks: List[str], query: str, k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Score chunks against a query with BM25, treating each chunk as a document.
+
+    Args:
+        chunks (List[str]): The chunks.
+        query (str): The research query.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+
+    Returns:
+        List[float]: One score per chunk; higher is more relevant.
+    """
+    terms = set(tokenize(query))
+    documents = [Counter(tokenize(chunk)) for chunk in chunks]
+    if not terms or not documents:
+        return [0.0] * len(chunks)
+
+    lengths = [sum(document.values()) for document in documents]
+    average_length = (sum(lengths) / len(lengths)) or 1.0
+    scores = []
+    for document, length in zip(documents, lengths):
+        score = 0.0
+        for term in terms:
+            frequency = document.get(term, 0)
+            if not frequency:
+                continue
+            containing = sum(1 for other in documents if term in other)
+            idf = math.log(1 + (len(documents) - containing + 0.5) / (containing + 0.5))
+            score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+
+def extract_relevant(text: str, query: Optional[str], max_tokens: int) -> str:
+    """
+    Reduce page text to the chunks most relevant to a query within a token budget.
+
+    Without a query, the leading chunks of the page are kept. Selected chunks are returned in
+    page order, with `OMISSION` marking skipped text.
+
+    Args:
+        text (str): The page text.
+        query (Optional[str]): The research query used to rank chunks.
+        max_tokens (int): Token budget for the result; zero or less disables pruning.
+
+    Returns:
+        str: The extracted text.
+    """
+    if max_tokens <= 0:
+        return text
+
+    cleaned = strip_boilerplate(text)
+    if count_tokens(cleaned) <= max_tokens:
+        return cleaned
+
+    chunks = chunk_text(cleaned, target_tokens=max(1, min(300, max_tokens // 4)))
+    if query:
+        scores = rank_chunks(chunks, query)
+        # Best chunks first; earlier chunks win ties
+        order = sorted(range(len(chunks)), key=lambda index: (-scores[index], index))
+    else:
+        order = list(range(len(chunks)))
+
+    selected: List[int] = []
+    budget = max_tokens
+    for index in order:
+        tokens = count_tokens(chunks[index])
+        if tokens <= budget:
+            selected.append(index)
+            budget -= tokens
+
+    if not selected:
+        # Even the best chunk is over budget: keep its beginning
+        best = chunks[order[0]]
+        return best[:max_tokens * 4]
+
+    parts: List[str] = []
+    previous = -1
+    for index in sorted(selected):
+        if parts and index != previous + 1:
+            parts.append(OMISSION)
+        parts.append(chunks[index])
+        previous = index
+    return "\n\n".join(parts)
@@ -0,0 +1,388 @@
+"""
+Offline load test of the research and formatter endpoints.
+
+Starts the upstream stub (`benchmarks.stub_server`) and the API in subprocesses, points the API
+at the stub, and drives `/api/research/run` and `/api/formater/generate` at fixed concurrency
+levels. Each level sends a fixed number of requests with unique queries and reports:
+
+* throughput (successful requests per second)
+* p50, p95 and p99 latency of successful requests
+* the API process's resident memory, peak during the level and at its end
+* status codes, and the number of calls each upstream endpoint received
+
+Caches that would let later requests skip work are disabled, so every run measures the same
+path. The results are printed and saved as JSON under `benchmarks/results/`; `--compare`
+prints the change between two saved runs.
+
+Example:
+
+    $ python -m benchmarks.load --concurrency 1,4,16 --requests 32 --label baseline
+    $ python -m benchmarks.load --compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+ENDPOINTS = {
+    "research": "/api/research/run",
+    "formatter": "/api/formater/generate",
+}
+
+# Stub options passed through to `benchmarks.stub_server`
+STUB_OPTIONS = ("search_latency", "news_latency", "scrape_latency", "llm_latency", "gemini_latency",
+                "results", "snippet_words", "page_bytes", "llm_steps", "answer_words")
+
+# Research query sent by default; `{index}` makes each request's query unique
+DEFAULT_QUERY = "benchmark request {index}: how is solar panel efficiency changing?"
+
+# Start of the `research_data` of a research run that failed, returned with status 200
+AGENT_ERROR_PREFIX = "Error running research agent"
+
+
+def percentile(values: Sequence[float], percent: float) -> Optional[float]:
+    """
+    Get a percentile of a sample by the nearest-rank method.
+
+    Args:
+        values (Sequence[float]): The sample.
+        percent (float): The percentile, between 0 and 100.
+
+    Returns:
+        Optional[float]: The value, or None for an empty sample.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """
+    Get the resident memory of a process.
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        Optional[float]: Megabytes, or None where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def _free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    """Wait until a URL answers 200, failing if the server's process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"Server for {url} did not start within {timeout}s")
+
+
+def start_stub(port: int, args: argparse.Namespace) -> subprocess.Popen:
+    """Start the upstream stub."""
+    command = [sys.executable, "-m", "benchmarks.stub_server", "--port", str(port)]
+    for name in STUB_OPTIONS:
+        value = getattr(args, name)
+        if value is not None:
+            command += [f"--{name.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command, cwd=ROOT)
+    _wait_ready(f"http://127.0.0.1:{port}/stats", process)
+    return process
+
+
+def start_api(
+        port: int,
+        stub_url: str,
+        data_dir: str,
+        extra_env: List[str],
+        probe: str = "/ready"
+) -> subprocess.Popen:
+    """Start the API pointed at the stub, with result caches and background workers disabled, and wait for `probe`."""
+    env = dict(os.environ)
+    env.update({
+        "SERPER_API_KEY": "stub",
+        "GEMINI_API_KEY": "stub",
+        "OPENAI_API_KEY": "stub",
+        "SERPER_BASE_URL": stub_url,
+        "SERPER_SCRAPE_URL": f"{stub_url}/scrape",
+        "RESEARCH_MODEL": "openai/stub",
+        "LLM_API_BASE": f"{stub_url}/v1",
+        "GEMINI_BASE_URL": stub_url,
+        "SEARCH_BACKENDS": "serper",
+        "RESEARCH_CACHE_BACKEND": "none",
+        "SEARCH_CACHE_BACKEND": "none",
+        "PAGE_STORE_ENABLED": "false",
+        "CORPUS_INDEX_ENABLED": "false",
+        "JOB_WORKERS": "0",
+        "JOB_STORE_PATH": os.path.join(data_dir, "jobs.sqlite3"),
+    })
+    for item in extra_env:
+        name, _, value = item.partition("=")
+        env[name] = value
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        # The agents print every step; keep the report readable and errors visible
+        stdout=subprocess.DEVNULL,
+    )
+    _wait_ready(f"http://127.0.0.1:{port}{probe}", process)
+    return process
+
+
+def _payload(endpoint: str, index: int, prompt_bytes: int, query: str = DEFAULT_QUERY) -> Dict[str, Any]:
+    """Build a request body with a query unique to the request."""
+    if endpoint == "research":
+        return {"query": query.format(index=index)}
+    text = f"Benchmark content {index}. See https://stub.example/page/{index}. "
+    return {"prompt": (text * (prompt_bytes // len(text) + 1))[:prompt_bytes]}
+
+
+def classify(endpoint: str, response: httpx.Response) -> str:
+    """
+    Get the outcome of a response: its status code, or "agent_error" for a failed research
+    run returned with status 200.
+    """
+    status = str(response.status_code)
+    if endpoint == "research" and status == "200":
+        try:
+            data = response.json().get("research_data")
+        except ValueError:
+            return "invalid_json"
+        if isinstance(data, str) and data.startswith(AGENT_ERROR_PREFIX):
+            return "agent_error"
+    return status
+
+
+async def run_level(
+        base_url: str,
+        endpoint: str,
+        concurrency: int,
+        requests: int,
+        api_pid: int,
+        prompt_bytes: int,
+        timeout: float,
+        offset: int,
+        query: str = DEFAULT_QUERY
+) -> Dict[str, Any]:
+    """
+    Send a fixed number of requests to an endpoint, `concurrency` at a time.
+
+    Only successful responses count towards throughput and latency; failed research runs
+    returned with status 200 count as errors.
+
+    Returns:
+        Dict[str, Any]: Throughput, latency percentiles, memory, and outcome and error counts.
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    indexes = iter(range(offset, offset + requests))
+    peak_rss = rss_mb(api_pid)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for index in indexes:
+            started = time.monotonic()
+            try:
+                response = await client.post(ENDPOINTS[endpoint], json=_payload(endpoint, index, prompt_bytes, query))
+                status = classify(endpoint, response)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            statuses[status] += 1
+            if status == "200":
+                latencies.append(time.monotonic() - started)
+
+    async def sample_memory() -> None:
+        nonlocal peak_rss
+        while True:
+            current = rss_mb(api_pid)
+            if current is not None:
+                peak_rss = max(peak_rss or 0.0, current)
+            await asyncio.sleep(0.2)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        sampler = asyncio.create_task(sample_memory())
+        started = time.monotonic()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+        sampler.cancel()
+
+    def seconds(value: Optional[float]) -> Optional[float]:
+        return round(value, 4) if value is not None else None
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": requests - len(latencies),
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "p50": seconds(percentile(latencies, 50)),
+        "p95": seconds(percentile(latencies, 95)),
+        "p99": seconds(percentile(latencies, 99)),
+        "rss_mb_peak": peak_rss,
+        "rss_mb_end": rss_mb(api_pid),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """Get the checked out commit, if the tree is a git repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """Print level results as a table."""
+    print(f"{'endpoint':<10} {'conc':>4} {'ok':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'rss MB':>8}")
+    for row in results:
+        cells = [row["throughput"], row["p50"], row["p95"], row["p99"], row["rss_mb_peak"]]
+        print(f"{row['endpoint']:<10} {row['concurrency']:>4} {row['ok']:>3}/{row['requests']:<3} "
+              + " ".join(f"{cell:>8}" if cell is not None else f"{'-':>8}" for cell in cells))
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print the change of every level between two saved runs."""
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    levels = {(row["endpoint"], row["concurrency"]): row for row in before["results"]}
+    print(f"{before.get('label') or before_path} -> {after.get('label') or after_path}")
+    print(f"{'endpoint':<10} {'conc':>4} {'req/s':>16} {'p50':>16} {'p95':>16} {'p99':>16} {'rss MB':>16}")
+    for row in after["results"]:
+        old = levels.get((row["endpoint"], row["concurrency"]))
+        if old is None:
+            continue
+        cells = []
+        for key in ("throughput", "p50", "p95", "p99", "rss_mb_peak"):
+            if old.get(key) and row.get(key) is not None:
+                cells.append(f"{row[key]:>8} {100 * (row[key] / old[key] - 1):+6.1f}%")
+            else:
+                cells.append(f"{'-':>16}")
+        print(f"{row['endpoint']:<10} {row['concurrency']:>4} " + " ".join(cells))
+
+
+def main() -> None:
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description="Load test the API against local stand-ins for its upstream APIs.")
+    parser.add_argument("--endpoints", default="research,formatter", help="Endpoints to drive: research, formatter.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--query", default=DEFAULT_QUERY,
+                        help="Research query template; {index} is replaced with the request number.")
+    parser.add_argument("--prompt-bytes", type=int, default=4000, help="Size of the formatter prompts.")
+    parser.add_argument("--timeout", type=float, default=600, help="Client timeout per request in seconds.")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra environment variable for the API, e.g. AGENT_POOL_SIZE=8. Repeatable.")
+    parser.add_argument("--label", default="", help="Name of the run, saved with its results.")
+    parser.add_argument("--output", default=RESULTS_DIR, help="Directory the results are saved in.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two saved runs and exit.")
+    for name in STUB_OPTIONS:
+        parser.add_argument(f"--{name.replace('_', '-')}", default=None, help="Passed to the stub server.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    stub_port, api_port = _free_port(), _free_port()
+    stub_url, api_url = f"http://127.0.0.1:{stub_port}", f"http://127.0.0.1:{api_port}"
+    processes: List[subprocess.Popen] = []
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        try:
+            processes.append(start_stub(stub_port, args))
+            api = start_api(api_port, stub_url, data_dir, args.env)
+            processes.append(api)
+            offset = 0
+            for endpoint in endpoints:
+                for level in levels:
+                    calls_before = httpx.get(f"{stub_url}/stats").json()
+                    row = asyncio.run(run_level(
+                        api_url, endpoint, level, args.requests, api.pid, args.prompt_bytes, args.timeout, offset, args.query
+                    ))
+                    calls_after = httpx.get(f"{stub_url}/stats").json()
+                    row["upstream_calls"] = {
+                        name: count - calls_before.get(name, 0) for name, count in calls_after.items()
+                        if count - calls_before.get(name, 0)
+                    }
+                    results.append(row)
+                    offset += args.requests
+                    print_results([row])
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=10)
+
+    run = {
+        "label": args.label,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "settings": {
+            "requests": args.requests,
+            "prompt_bytes": args.prompt_bytes,
+            "query": args.query,
+            "env": args.env,
+            "stub": {name: getattr(args, name) for name in STUB_OPTIONS if getattr(args, name) is not None},
+        },
+        "results": results,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    name = datetime.now().strftime("%Y%m%d-%H%M%S") + (f"-{args.label}" if args.label else "") + ".json"
+    path = os.path.join(args.output, name)
+    with open(path, "w") as output:
+        json.dump(run, output, indent=2)
+
+    print()
+    print_results(results)
+    print(f"\nSaved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Cold start benchmark.
+
+Measures, in fresh interpreters:
+
+* the import time of `main` and of the slowest modules it imports, from `python -X importtime`
+* the import time of the heavy dependencies loaded later by the warm-up (smolagents, LiteLLM,
+  the Gemini SDK)
+* the time from launching the API until `/health` answers and until `/ready` passes, with each
+  warm-up step's duration
+
+The API is pointed at the local upstream stub (`benchmarks.stub_server`), so no network access
+is needed. Results are printed and saved as JSON under `benchmarks/results/`.
+
+Example:
+
+    $ python -m benchmarks.startup --top 15 --label lazy-imports
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.load import RESULTS_DIR, ROOT, STUB_OPTIONS, _free_port, _git_commit, start_api, start_stub
+
+# Dependencies whose import the warm-up pays for instead of the first request
+HEAVY_MODULES = ("smolagents", "litellm", "google.genai")
+
+
+def import_times(module: str) -> List[Dict[str, Any]]:
+    """
+    Import a module in a fresh interpreter and get the import time of every module it loads.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        List[Dict[str, Any]]: Module name, own and cumulative seconds, and nesting depth, in
+            the order `-X importtime` reports them.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "| imported package" in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "own": int(own) / 1e6,
+            "cumulative": int(cumulative) / 1e6,
+        })
+    return rows
+
+
+def time_to_ready(stub_url: str, data_dir: str, timeout: float = 120) -> Dict[str, Any]:
+    """
+    Launch the API and time its probes.
+
+    Returns:
+        Dict[str, Any]: Seconds until `/health` answered and until `/ready` passed, and the
+            warm-up status reported by `/ready`.
+    """
+    port = _free_port()
+    started = time.monotonic()
+    api = start_api(port, stub_url, data_dir, [], probe="/health")
+    healthy = time.monotonic() - started
+    try:
+        deadline = started + timeout
+        while time.monotonic() < deadline:
+            response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=5)
+            if response.status_code == 200 or response.json().get("status") == "failed":
+                return {"health": round(healthy, 3), "ready": round(time.monotonic() - started, 3),
+                        "warmup": response.json()}
+            time.sleep(0.05)
+        raise RuntimeError(f"API not ready within {timeout}s")
+    finally:
+        api.terminate()
+        api.wait(timeout=10)
+
+
+def main() -> None:
+    """Run the startup benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Measure the API's import time and time to readiness.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules reported.")
+    parser.add_argument("--label", default="", help="Name of the run, saved with its results.")
+    parser.add_argument("--output", default=RESULTS_DIR, help="Directory the results are saved in.")
+    args = parser.parse_args()
+
+    rows = import_times("main")
+    main_row = next(row for row in rows if row["module"] == "main")
+    slowest = sorted((row for row in rows if row["module"] != "main"), key=lambda row: -row["cumulative"])
+    heavy = {}
+    for module in HEAVY_MODULES:
+        loaded = next((row for row in rows if row["module"] == module), None)
+        heavy[module] = {
+            "loaded_by_main": loaded is not None,
+            "seconds": round(next(row for row in import_times(module) if row["module"] == module)["cumulative"], 3),
+        }
+
+    stub_args = argparse.Namespace(**{name: None for name in STUB_OPTIONS})
+    stub_port = _free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        stub = start_stub(stub_port, stub_args)
+        try:
+            probes = time_to_ready(f"http://127.0.0.1:{stub_port}", data_dir)
+        finally:
+            stub.terminate()
+            stub.wait(timeout=10)
+
+    run = {
+        "label": args.label,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "import_main_seconds": round(main_row["cumulative"], 3),
+        "slowest_imports": [
+            {"module": row["module"], "seconds": round(row["cumulative"], 3)} for row in slowest[:args.top]
+        ],
+        "heavy_modules": heavy,
+        "probes": probes,
+    }
+
+    print(f"import main: {run['import_main_seconds']:.3f}s")
+    for row in run["slowest_imports"]:
+        print(f"  {row['seconds']:>7.3f}s  {row['module']}")
+    print("heavy dependencies:")
+    for module, values in heavy.items():
+        where = "at import" if values["loaded_by_main"] else "deferred"
+        print(f"  {values['seconds']:>7.3f}s  {module} ({where})")
+    print(f"/health after {probes['health']:.3f}s, /ready after {probes['ready']:.3f}s")
+    for step, values in probes["warmup"].get("steps", {}).items():
+        print(f"  {values['seconds']:>7.3f}s  {step}" + (f" (failed: {values['error']})" if "error" in values else ""))
+
+    os.makedirs(args.output, exist_ok=True)
+    name = datetime.now().strftime("%Y%m%d-%H%M%S") + "-startup" + (f"-{args.label}" if args.label else "") + ".json"
+    path = os.path.join(args.output, name)
+    with open(path, "w") as output:
+        json.dump(run, output, indent=2)
+    print(f"\nSaved to {path}")
+
+
+if __name__ == "__main__":
+    main()
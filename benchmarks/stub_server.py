@@ -0,0 +1,348 @@
+"""
+Local stand-in for the upstream APIs, for offline benchmarks.
+
+The stub serves the endpoints the service calls, with latencies drawn from configurable
+distributions and payloads of configurable size:
+
+* Serper.dev search (`POST /search`), news (`POST /news`) and scrape (`POST /scrape`)
+* an OpenAI-compatible chat completion endpoint (`POST /v1/chat/completions`) playing the
+  research agent's model through LiteLLM; it answers with a scripted sequence of code steps
+  (search, news, crawl) and then a `final_answer` built from the links it has seen. When the
+  task already carries prefetched search results, it skips the two search steps, and when the
+  agent is told it has enough sources, it answers at once, as a real model is told to
+* Gemini's `POST /v1beta/models/{model}:generateContent`, used by the formatter
+
+Pages and results are generated deterministically from the query or URL, so repeated runs send
+the service the same data. `GET /stats` reports the number of calls per endpoint.
+
+A latency is given as `fixed:SECONDS`, `uniform:LOW,HIGH` or `lognormal:MEDIAN,SIGMA`; a bare
+number is a fixed latency.
+
+Example:
+
+    $ python -m benchmarks.stub_server --port 8900 --search-latency lognormal:0.4,0.5
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from fastapi import FastAPI, Request
+
+# Words the generated titles, snippets and pages are made of
+WORDS = (
+    "research energy solar market growth policy report analysis data study battery grid storage "
+    "demand supply price cost efficiency technology industry global regional forecast trend "
+    "investment capacity network model result survey sector emission carbon panel wind hydrogen"
+).split()
+
+# Research steps the stub model takes before answering, by step number
+STEP_CODE = (
+    'results = web_search(query="{query}")\nprint(results)',
+    'news = news_search(query="{query}")\nprint(news)',
+    'page = web_crawler(url="{url}", query="{query}")\nprint(page)',
+)
+
+# Heading of the prefetched search results in the agent's task
+PREFETCH_MARKER = "PREFETCHED SEARCH RESULTS"
+# Text of the early-exit nudge appended to an observation
+ANSWER_MARKER = "gathered enough sources"
+
+_URL = re.compile(r"https://stub\.example/[\w/-]+")
+
+
+class Latency:
+    """
+    A latency distribution.
+
+    Attributes:
+        spec (str): The distribution as given, e.g. "lognormal:0.4,0.5".
+    """
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        kind, _, args = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        try:
+            values = [float(value) for value in args.split(",")] if args else []
+        except ValueError:
+            raise ValueError(f"Invalid latency '{spec}'") from None
+        self._sample = self._sampler(kind, values)
+
+    def _sampler(self, kind: str, values: List[float]) -> Callable[[], float]:
+        """Get a function drawing latencies of a distribution."""
+        if kind == "fixed" and len(values) == 1:
+            return lambda: values[0]
+        if kind == "uniform" and len(values) == 2:
+            return lambda: random.uniform(values[0], values[1])
+        if kind == "lognormal" and len(values) == 2:
+            return lambda: random.lognormvariate(math.log(values[0]), values[1])
+        raise ValueError(f"Invalid latency '{self.spec}', expected fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+
+    def sample(self) -> float:
+        """
+        Draw a latency.
+
+        Returns:
+            float: Seconds, never negative.
+        """
+        return max(0.0, self._sample())
+
+
+@dataclass
+class StubSettings:
+    """
+    Latencies and payload sizes of the stub.
+
+    Attributes:
+        search_latency (Latency): Latency of the search endpoint.
+        news_latency (Latency): Latency of the news endpoint.
+        scrape_latency (Latency): Latency of the scrape endpoint.
+        llm_latency (Latency): Latency of a chat completion.
+        gemini_latency (Latency): Latency of a Gemini call.
+        results (int): Results per search or news response.
+        snippet_words (int): Words per result snippet.
+        page_bytes (int): Approximate size of a scraped page.
+        llm_steps (int): Code steps the model takes before its final answer.
+        answer_words (int): Words in the final research answer.
+    """
+    search_latency: Latency = field(default_factory=lambda: Latency("lognormal:0.4,0.4"))
+    news_latency: Latency = field(default_factory=lambda: Latency("lognormal:0.4,0.4"))
+    scrape_latency: Latency = field(default_factory=lambda: Latency("lognormal:1.0,0.6"))
+    llm_latency: Latency = field(default_factory=lambda: Latency("lognormal:1.5,0.4"))
+    gemini_latency: Latency = field(default_factory=lambda: Latency("lognormal:2.0,0.4"))
+    results: int = 10
+    snippet_words: int = 30
+    page_bytes: int = 20000
+    llm_steps: int = 3
+    answer_words: int = 300
+
+
+def _words(seed: str, count: int) -> str:
+    """Generate a deterministic run of words from a seed."""
+    rng = random.Random(hashlib.sha256(seed.encode("utf-8")).digest())
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _slug(text: str) -> str:
+    """Make a URL path segment from a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def search_results(query: str, settings: StubSettings, kind: str = "search") -> List[Dict[str, Any]]:
+    """
+    Generate search or news results for a query.
+
+    Args:
+        query (str): The search query.
+        settings (StubSettings): The payload sizes.
+        kind (str): "search" or "news"; news results link to different pages.
+
+    Returns:
+        List[Dict[str, Any]]: Results in Serper's format.
+    """
+    slug = _slug(f"{kind}:{query}")
+    return [
+        {
+            "title": _words(f"{slug}:{index}:title", 8).title(),
+            "link": f"https://stub.example/{kind}/{slug}/{index}",
+            "snippet": _words(f"{slug}:{index}:snippet", settings.snippet_words),
+            "date": "2 days ago",
+            "source": "Stub News" if kind == "news" else None,
+            "position": index + 1,
+        }
+        for index in range(settings.results)
+    ]
+
+
+def page_text(url: str, settings: StubSettings) -> str:
+    """
+    Generate the text of a page.
+
+    Args:
+        url (str): The page URL.
+        settings (StubSettings): The payload sizes.
+
+    Returns:
+        str: Paragraphs totalling about `settings.page_bytes` bytes.
+    """
+    paragraphs, size, index = [], 0, 0
+    while size < settings.page_bytes:
+        paragraph = _words(f"{url}:{index}", 60).capitalize() + "."
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+        index += 1
+    return "\n\n".join(paragraphs)
+
+
+def model_reply(messages: List[Dict[str, Any]], settings: StubSettings) -> str:
+    """
+    Script the research agent model's next step.
+
+    The number of assistant messages tells how many steps were taken. The first steps call the
+    tools, the last one answers with the links found in the observations. Prefetched search
+    results in the task stand in for the search and news steps, and an early-exit nudge in an
+    observation skips to the answer.
+
+    Args:
+        messages (List[Dict[str, Any]]): The chat messages sent to the model.
+        settings (StubSettings): The number of steps and the answer size.
+
+    Returns:
+        str: A thought and a code block, in the format the CodeAgent parses.
+    """
+    text = "\n".join(_content(message) for message in messages)
+    step = sum(1 for message in messages if message.get("role") == "assistant")
+    if len(messages) > 1 and PREFETCH_MARKER in _content(messages[1]):
+        step += 2
+    query = f"stub query {_slug(_content(messages[1]) if len(messages) > 1 else text)}"
+    links = list(dict.fromkeys(_URL.findall(text)))
+
+    if step < settings.llm_steps and ANSWER_MARKER not in text:
+        code = STEP_CODE[step % len(STEP_CODE)].format(
+            query=query, url=links[0] if links else "https://stub.example/page/0"
+        )
+        return f"Thought: Step {step + 1}, gathering sources.\nCode:\n```py\n{code}\n```<end_code>"
+
+    answer = {
+        "research_data": _words(f"{query}:answer", settings.answer_words),
+        "resource_links": links[:5],
+    }
+    return f"Thought: I have enough sources.\nCode:\n```py\nfinal_answer({json.dumps(answer)})\n```<end_code>"
+
+
+def _content(message: Dict[str, Any]) -> str:
+    """Get the text of a chat message, whose content may be a list of parts."""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return max(1, len(text) // 4)
+
+
+def create_app(settings: StubSettings) -> FastAPI:
+    """
+    Create the stub application.
+
+    Args:
+        settings (StubSettings): Latencies and payload sizes.
+
+    Returns:
+        FastAPI: The application.
+    """
+    app = FastAPI(title="Upstream API stub")
+    calls: Counter = Counter()
+
+    async def delay(endpoint: str, latency: Latency) -> None:
+        calls[endpoint] += 1
+        await asyncio.sleep(latency.sample())
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        await delay("search", settings.search_latency)
+        return {"searchParameters": {"q": body.get("q")}, "organic": search_results(body.get("q", ""), settings)}
+
+    @app.post("/news")
+    async def news(request: Request):
+        body = await request.json()
+        await delay("news", settings.news_latency)
+        return {"searchParameters": {"q": body.get("q")}, "news": search_results(body.get("q", ""), settings, "news")}
+
+    @app.post("/scrape")
+    async def scrape(request: Request):
+        body = await request.json()
+        await delay("scrape", settings.scrape_latency)
+        url = body.get("url", "")
+        return {"text": page_text(url, settings), "metadata": {"title": _words(f"{url}:title", 6).title()}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await delay("llm", settings.llm_latency)
+        messages = body.get("messages") or []
+        reply = model_reply(messages, settings)
+        prompt_tokens = _tokens("".join(_content(message) for message in messages))
+        return {
+            "id": f"chatcmpl-{calls['llm']}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": _tokens(reply),
+                "total_tokens": prompt_tokens + _tokens(reply),
+            },
+        }
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        body = await request.json()
+        await delay("gemini", settings.gemini_latency)
+        prompt = json.dumps(body.get("contents"))
+        formatted = {
+            "Summary": _words(f"{_slug(prompt)}:summary", settings.answer_words // 2),
+            "Reference": list(dict.fromkeys(_URL.findall(prompt)))[:5],
+        }
+        text = json.dumps(formatted)
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": _tokens(prompt),
+                "candidatesTokenCount": _tokens(text),
+                "totalTokenCount": _tokens(prompt) + _tokens(text),
+            },
+            "modelVersion": model,
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return dict(calls)
+
+    return app
+
+
+def main() -> None:
+    """Run the stub server from the command line."""
+    defaults = StubSettings()
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for Serper.dev, the research model and Gemini.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    for name in ("search", "news", "scrape", "llm", "gemini"):
+        parser.add_argument(f"--{name}-latency", default=getattr(defaults, f"{name}_latency").spec,
+                            help=f"Latency of {name} calls (default %(default)s).")
+    for name in ("results", "snippet_words", "page_bytes", "llm_steps", "answer_words"):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=getattr(defaults, name))
+    args = parser.parse_args()
+
+    settings = StubSettings(
+        **{f"{name}_latency": Latency(getattr(args, f"{name}_latency"))
+           for name in ("search", "news", "scrape", "llm", "gemini")},
+        **{name: getattr(args, name) for name in ("results", "snippet_words", "page_bytes", "llm_steps", "answer_words")},
+    )
+
+    import uvicorn
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,19 +10,71 @@ The API is organized into the following endpoints:
 
 - `/api/research/run`: Run the research agent to investigate the provided query.
 - `/api/formater/generate`: Generate formatted text with summary and references from provided content.
+- `/metrics`: Process metrics in the Prometheus text format.
+- `/health` and `/ready`: Liveness and readiness probes.
 
 The API is designed to be easily extensible and maintainable.  The code is written to be readable and well-commented.
 """
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers.research import router
-from app.routers import formater
+from app.routers import formater, health, metrics
+from app.services.agent_service import get_research_agent_service
+from app.services.job_queue import JobWorkerPool, get_job_store
+from app.services.warmup import Warmup
+from app.utils import config, http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manage application-wide resources.
+
+    Starts the warm-up on a background thread, so the server accepts connections at once and
+    `/ready` passes once the research agents, the Gemini client and the HTTP client are built.
+    The in-process research job workers, if enabled, start after the agents. On shutdown, the
+    job workers are stopped, then the research worker processes, if any, and the shared HTTP
+    connection pool closed.
+    """
+    job_workers = []
+
+    def start_job_workers() -> None:
+        workers = JobWorkerPool(
+            store=get_job_store(),
+            service=get_research_agent_service(),
+            workers=config.JOB_WORKERS,
+            poll_interval=config.JOB_POLL_INTERVAL
+        )
+        workers.start()
+        job_workers.append(workers)
+
+    steps = []
+    if config.WARMUP_ENABLED:
+        steps += [
+            ("research_agents", get_research_agent_service),
+            ("formatter_client", formater.get_genai_client),
+            ("http_clients", http_client.get_client),
+        ]
+    if config.JOB_WORKERS > 0:
+        steps.append(("job_workers", start_job_workers))
+    app.state.warmup = Warmup(steps)
+    app.state.warmup.start()
+    yield
+    for workers in job_workers:
+        workers.stop(timeout=5)
+    if get_research_agent_service.cache_info().currsize:
+        get_research_agent_service().shutdown()
+    http_client.close()
+
 
 app = FastAPI(
     title="Research Agent API",
     description="API for performing research using LLM agents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -37,6 +89,8 @@ app.add_middleware(
 # Include routers
 app.include_router(router)
 app.include_router(formater.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
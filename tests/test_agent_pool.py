@@ -0,0 +1,42 @@
+import threading
+import unittest
+
+from app.services.agent_pool import AgentPool, PoolSaturatedError
+
+
+class TestAgentPool(unittest.TestCase):
+    def test_runs_use_distinct_agents(self):
+        """Concurrent runs never share an agent"""
+        counter = iter(range(100))
+        pool = AgentPool(factory=lambda: next(counter), size=3, max_queue=0)
+        barrier = threading.Barrier(3)
+
+        def work(agent):
+            barrier.wait(timeout=5)
+            return agent
+
+        futures = [pool.submit(work) for _ in range(3)]
+        agents = {future.result(timeout=5) for future in futures}
+        self.assertEqual(agents, {0, 1, 2})
+        pool.shutdown()
+
+    def test_rejects_when_queue_is_full(self):
+        """Submitting beyond pool size plus queue depth raises PoolSaturatedError"""
+        pool = AgentPool(factory=object, size=1, max_queue=1)
+        release = threading.Event()
+
+        running = pool.submit(lambda agent: release.wait(timeout=5))
+        waiting = pool.submit(lambda agent: True)
+        with self.assertRaises(PoolSaturatedError):
+            pool.submit(lambda agent: True)
+
+        release.set()
+        self.assertTrue(running.result(timeout=5))
+        self.assertTrue(waiting.result(timeout=5))
+        # Slots are released once runs finish
+        self.assertTrue(pool.submit(lambda agent: True).result(timeout=5))
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
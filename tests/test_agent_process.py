@@ -0,0 +1,148 @@
+import os
+import pickle
+import signal
+import threading
+import unittest
+from unittest import mock
+
+from app.services.agent_process import WorkerExitedError, WorkerProcess, _picklable
+from app.services.agent_service import ResearchAgentService
+from app.utils.run_context import RunCancelledError
+from test_agent_service import ANSWER, ScriptedAgent
+
+
+class StubAgent(ScriptedAgent):
+    """Agent answering right away, or stepping until stopped or out of memory as its query says"""
+
+    def run(self, task, stream=True, max_steps=None):
+        if "oom" in task:
+            raise MemoryError()
+        self.endless = "forever" in task
+        self.delay = 0.05 if self.endless else 0.0
+        return super().run(task, stream, max_steps)
+
+
+def stub_agent():
+    """Agent factory of the worker processes, imported by reference in the spawned worker"""
+    return StubAgent()
+
+
+class Unpicklable(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.callback = lambda: None
+
+
+class TestWorkerProcess(unittest.TestCase):
+    def setUp(self):
+        # Workers read the cache backend when they start; keep them from creating a cache file
+        environment = mock.patch.dict(os.environ, {"RESEARCH_CACHE_BACKEND": "memory"})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def worker(self, **kwargs):
+        worker = WorkerProcess(start_timeout=60, agent_factory=stub_agent, **kwargs)
+        self.addCleanup(worker.close)
+        return worker
+
+    def test_run_returns_the_answer(self):
+        """A run executes in the worker and returns the agent's answer"""
+        worker = self.worker()
+
+        self.assertEqual(worker.run("solar panels"), ANSWER)
+        self.assertNotEqual(worker.stats()["pid"], os.getpid())
+        self.assertEqual(worker.stats()["runs"], 1)
+
+    def test_progress_events_are_relayed(self):
+        """The worker's progress events reach the caller in order, before the answer"""
+        worker = self.worker()
+        events = []
+
+        self.assertEqual(worker.run("solar panels", on_event=events.append), ANSWER)
+        self.assertEqual(
+            [item["event"] for item in events],
+            ["started", "tool_call", "observation", "step"],
+        )
+
+    def test_cancelled_run_stops_and_the_worker_is_kept(self):
+        """Setting the caller's cancel event stops the run in the worker, which takes the next run"""
+        worker = self.worker()
+        cancel = threading.Event()
+        threading.Timer(0.5, cancel.set).start()
+
+        with self.assertRaises(RunCancelledError):
+            worker.run("solar panels forever", cancel=cancel)
+        self.assertEqual(worker.run("solar panels"), ANSWER)
+        self.assertEqual(worker.stats()["restarts"], 0)
+
+    def test_worker_is_recycled_after_max_runs(self):
+        """The process is replaced after `max_runs` runs, and the new one takes the next run"""
+        worker = self.worker(max_runs=2)
+        first_pid = worker.stats()["pid"]
+
+        worker.run("solar panels")
+        self.assertEqual(worker.stats(), {"pid": first_pid, "runs": 1, "restarts": 0})
+        worker.run("solar panels")
+        self.assertEqual(worker.stats()["restarts"], 1)
+        self.assertNotEqual(worker.stats()["pid"], first_pid)
+        self.assertEqual(worker.run("solar panels"), ANSWER)
+        self.assertEqual(worker.stats()["runs"], 1)
+
+    def test_worker_is_restarted_after_dying(self):
+        """A worker killed during a run fails that run and is replaced for the next one"""
+        worker = self.worker()
+        worker.wait_ready()
+        first_pid = worker.stats()["pid"]
+        threading.Timer(0.5, os.kill, (first_pid, signal.SIGKILL)).start()
+
+        result = worker.run("solar panels forever")
+        self.assertTrue(result["research_data"].startswith("Error running research agent"))
+        self.assertEqual(worker.stats()["restarts"], 1)
+        self.assertNotEqual(worker.stats()["pid"], first_pid)
+        self.assertEqual(worker.run("solar panels"), ANSWER)
+        with self.assertRaises(WorkerExitedError):
+            threading.Timer(0.5, os.kill, (worker.stats()["pid"], signal.SIGKILL)).start()
+            worker.run("solar panels forever", raise_errors=True)
+
+    def test_worker_out_of_memory_is_replaced(self):
+        """A worker running out of memory fails the run and exits, and is replaced"""
+        worker = self.worker()
+        worker.wait_ready()
+        first_pid = worker.stats()["pid"]
+
+        result = worker.run("solar panels oom")
+        self.assertIn("out of memory", result["research_data"])
+        self.assertEqual(worker.stats()["restarts"], 1)
+        self.assertNotEqual(worker.stats()["pid"], first_pid)
+        self.assertEqual(worker.run("solar panels"), ANSWER)
+
+
+class TestAgentProcess(unittest.TestCase):
+    def test_unknown_execution_mode(self):
+        """The service refuses an execution mode other than thread or process"""
+        with self.assertRaises(ValueError):
+            ResearchAgentService(execution_mode="fibers")
+
+    def test_errors_sent_to_the_server_are_picklable(self):
+        """A run's exception is sent as is, or as its message when it cannot be pickled"""
+        error = ValueError("bad query")
+        self.assertIs(_picklable(error), error)
+        sent = pickle.loads(pickle.dumps(_picklable(Unpicklable("no answer"))))
+        self.assertEqual(str(sent), "Unpicklable: no answer")
+
+    def test_worker_failing_to_start(self):
+        """A worker that cannot build its agent is reported, and a run returns an error response"""
+        worker = WorkerProcess(memory_mb=20, start_timeout=60)
+        try:
+            with self.assertRaises(WorkerExitedError):
+                worker.wait_ready()
+            result = worker.run("solar panel efficiency")
+            self.assertTrue(result["research_data"].startswith("Error running research agent"))
+            self.assertEqual(result["resource_links"], [])
+            self.assertEqual(worker.stats()["restarts"], 1)
+        finally:
+            worker.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from smolagents.memory import ActionStep, FinalAnswerStep, ToolCall
+
+from app.agents.query_router import QueryTier
+from app.services.agent_pool import PoolSaturatedError
+from app.services.agent_service import ResearchAgentService
+from app.utils.cache import MemoryCache
+from app.utils.run_context import current_run, run_scope
+
+ANSWER = {"research_data": "Findings", "resource_links": ["https://a.example/1"]}
+
+
+def action_step(number):
+    return ActionStep(
+        step_number=number,
+        tool_calls=[ToolCall(name="python_interpreter", arguments="web_search(query='solar')", id=str(number))],
+        observations=f"results of step {number}",
+        duration=0.01,
+    )
+
+
+class ScriptedAgent:
+    """Agent yielding a fixed sequence of memory steps, optionally waiting before each one"""
+
+    def __init__(self, script=None, delay=0.0, endless=False):
+        self.script = script
+        self.delay = delay
+        self.endless = endless
+        self.tools = {"web_search": None, "final_answer": None}
+        self.model = object()
+        self.memory = SimpleNamespace(steps=[])
+        self.final_answer_calls = 0
+
+    def run(self, task, stream=True, max_steps=None):
+        if self.endless:
+            for number in itertools.count(1):
+                time.sleep(self.delay)
+                yield action_step(number)
+        time.sleep(self.delay)
+        yield from self.script() if self.script else (action_step(1), FinalAnswerStep(json.dumps(ANSWER)))
+
+    def provide_final_answer(self, task):
+        self.final_answer_calls += 1
+        return json.dumps(ANSWER)
+
+
+class ScriptedService(ResearchAgentService):
+    """Service whose pool holds the agents given to it, in place of research agents"""
+
+    def __init__(self, agent, **kwargs):
+        self.scripted_agent = agent
+        with mock.patch("app.services.agent_service.get_research_cache", return_value=None):
+            super().__init__(execution_mode="thread", pool_size=1, max_queue=0, **kwargs)
+
+    def _create_agent(self):
+        return self.scripted_agent
+
+
+class FakeService(ResearchAgentService):
+    """Service whose pool holds placeholder agents, for tests not running any agent"""
+
+    def __init__(self, **kwargs):
+        # The default SQLite cache would leave a file under data/
+        with mock.patch("app.services.agent_service.get_research_cache", MemoryCache):
+            super().__init__(**kwargs)
+
+    def _create_agent(self):
+        return object()
+
+
+class SlowCache(MemoryCache):
+    """Memory cache whose lookups block like a slow disk"""
+
+    def get(self, key):
+        time.sleep(0.3)
+        return super().get(key)
+
+
+async def ticks_during(coroutine, interval=0.02):
+    """Await the coroutine and count how often the event loop ran a ticker meanwhile"""
+    count = 0
+
+    async def ticker():
+        nonlocal count
+        while True:
+            await asyncio.sleep(interval)
+            count += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        result = await coroutine
+    finally:
+        task.cancel()
+    return result, count
+
+
+async def collect(stream, stop_at=None):
+    events = []
+    async for item in stream:
+        events.append(item)
+        if item["event"] == stop_at:
+            break
+    await stream.aclose()
+    return events
+
+
+class TestResearchCache(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeService(execution_mode="thread", pool_size=1, max_queue=0)
+
+    def test_distinct_questions_get_distinct_entries(self):
+        """Questions about the same terms do not share a cached response"""
+        _, why = self.service._lookup_cache("why did Apple IPO", None)
+        _, when = self.service._lookup_cache("When did Apple IPO?", None)
+        _, when_again = self.service._lookup_cache("when did apple IPO", None)
+        self.assertNotEqual(why, when)
+        self.assertEqual(when, when_again)
+
+    def test_query_without_words_is_not_cached(self):
+        """A query with no words is neither looked up nor stored"""
+        self.assertEqual(self.service._lookup_cache("?!", None), (None, None))
+
+    def test_lookup_does_not_block_the_event_loop(self):
+        """The event loop keeps running while the cache lookup of an async caller waits on disk"""
+        self.service.cache = SlowCache()
+        _, key = self.service._lookup_cache("solar panels", "no-cache")
+        self.service.cache.set(key, ANSWER, 60)
+
+        async def scenario():
+            result, run_ticks = await ticks_during(self.service.run_research_async("solar panels"))
+            stream, stream_ticks = await ticks_during(self.service.open_stream("solar panels"))
+            return result, run_ticks, await collect(stream), stream_ticks
+
+        result, run_ticks, events, stream_ticks = asyncio.run(scenario())
+
+        self.assertEqual(result, ANSWER)
+        self.assertEqual(events[-1]["data"], {"cached": True, **ANSWER})
+        self.assertGreater(run_ticks, 5)
+        self.assertGreater(stream_ticks, 5)
+
+
+class TestRunAgent(unittest.TestCase):
+    def test_step_repeated_after_max_steps_is_handled_once(self):
+        """The last step yielded again after the step budget runs out emits no duplicate events"""
+        def script():
+            yield action_step(1)
+            # The last step finds the sources the tier requires
+            current_run().mark_seen("https://a.example/1")
+            last = action_step(2)
+            yield last
+            yield last
+            yield FinalAnswerStep(json.dumps(ANSWER))
+
+        agent = ScriptedAgent(script)
+        service = ScriptedService(agent)
+        tier = QueryTier(name="simple", model="m", max_steps=2, max_tokens=100, prompt_variant="brief", min_sources=1)
+        events = []
+        try:
+            with run_scope("solar"):
+                result, forced = service._run_agent(agent, "task", events.append, tier=tier)
+        finally:
+            service.shutdown()
+
+        self.assertEqual(json.loads(result), ANSWER)
+        self.assertFalse(forced)
+        self.assertEqual([item["data"]["step"] for item in events if item["event"] == "step"], [1, 2])
+        self.assertEqual(len([item for item in events if item["event"] == "early_exit"]), 1)
+        self.assertEqual(agent.final_answer_calls, 0)
+
+
+class TestResearchStream(unittest.TestCase):
+    def test_events_in_order_with_result(self):
+        """A stream reports the run's progress in order and ends with the result"""
+        service = ScriptedService(ScriptedAgent())
+        try:
+            events = asyncio.run(self._stream(service, heartbeat_interval=5))
+        finally:
+            service.shutdown()
+
+        self.assertEqual(
+            [item["event"] for item in events],
+            ["queued", "started", "tool_call", "observation", "step", "result"],
+        )
+        self.assertEqual(events[2]["data"]["tools"], ["web_search"])
+        self.assertEqual(events[-1]["data"], {"cached": False, **ANSWER})
+
+    def test_heartbeat_while_waiting(self):
+        """A heartbeat is sent while the run has no progress to report"""
+        service = ScriptedService(ScriptedAgent(delay=0.3))
+        try:
+            events = asyncio.run(self._stream(service, heartbeat_interval=0.05))
+        finally:
+            service.shutdown()
+
+        names = [item["event"] for item in events]
+        self.assertIn("heartbeat", names)
+        self.assertEqual(names[-1], "result")
+
+    def test_closing_the_stream_cancels_the_run(self):
+        """Closing a stream early stops the run and returns its agent to the pool"""
+        agent = ScriptedAgent(delay=0.02, endless=True)
+        service = ScriptedService(agent)
+        try:
+            events = asyncio.run(self._stream(service, heartbeat_interval=5, stop_at="step"))
+            self.assertEqual(events[-1]["event"], "step")
+
+            returned = threading.Event()
+            deadline = time.monotonic() + 5
+            while not returned.is_set() and time.monotonic() < deadline:
+                try:
+                    self.assertIs(service.pool.submit(lambda checked_out: checked_out).result(timeout=5), agent)
+                    returned.set()
+                except PoolSaturatedError:
+                    time.sleep(0.02)
+            self.assertTrue(returned.is_set())
+        finally:
+            service.shutdown()
+
+    @staticmethod
+    async def _stream(service, heartbeat_interval, stop_at=None):
+        stream = await service.open_stream("solar panels", heartbeat_interval=heartbeat_interval, deadline_seconds=0)
+        return await collect(stream, stop_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import re
+import unittest
+
+from fastapi.testclient import TestClient
+
+import httpx
+
+from benchmarks.load import classify, percentile
+from benchmarks.stub_server import Latency, StubSettings, create_app, model_reply
+
+
+def _settings(**kwargs):
+    latencies = {f"{name}_latency": Latency("0") for name in ("search", "news", "scrape", "llm", "gemini")}
+    return StubSettings(**{**latencies, **kwargs})
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_latency_specs(self):
+        """Latencies are parsed from fixed, uniform and lognormal specs"""
+        self.assertEqual(Latency("0.2").sample(), 0.2)
+        self.assertEqual(Latency("fixed:0.5").sample(), 0.5)
+        self.assertTrue(0.1 <= Latency("uniform:0.1,0.3").sample() <= 0.3)
+        self.assertGreater(Latency("lognormal:0.4,0.5").sample(), 0)
+        for spec in ("uniform:1", "gamma:1,2", "fixed:fast"):
+            with self.assertRaises(ValueError):
+                Latency(spec)
+
+    def test_model_script(self):
+        """The stub model calls tools for its configured steps, then answers with the links it saw"""
+        settings = _settings(llm_steps=3)
+        messages = [{"role": "system", "content": "system"}, {"role": "user", "content": "task"}]
+        self.assertIn("web_search(", model_reply(messages, settings))
+
+        messages += [
+            {"role": "assistant", "content": "step 1"},
+            {"role": "user", "content": [{"type": "text", "text": "Observation: https://stub.example/search/a/0"}]},
+        ]
+        self.assertIn("news_search(", model_reply(messages, settings))
+
+        messages.append({"role": "assistant", "content": "step 2"})
+        self.assertIn('web_crawler(url="https://stub.example/search/a/0"', model_reply(messages, settings))
+
+        messages.append({"role": "assistant", "content": "step 3"})
+        code = re.search(r"final_answer\((.*)\)", model_reply(messages, settings)).group(1)
+        self.assertEqual(json.loads(code)["resource_links"], ["https://stub.example/search/a/0"])
+
+    def test_stub_payloads(self):
+        """The stub serves Serper-shaped results and pages of the configured size"""
+        client = TestClient(create_app(_settings(results=3, page_bytes=5000)))
+        organic = client.post("/search", json={"q": "solar"}).json()["organic"]
+        self.assertEqual(len(organic), 3)
+        self.assertEqual(organic, client.post("/search", json={"q": "solar"}).json()["organic"])
+        self.assertGreaterEqual(len(client.post("/scrape", json={"url": organic[0]["link"]}).json()["text"]), 5000)
+
+        reply = client.post("/v1beta/models/gemini-2.0-flash:generateContent", json={"contents": "x"}).json()
+        formatted = json.loads(reply["candidates"][0]["content"]["parts"][0]["text"])
+        self.assertEqual(set(formatted), {"Summary", "Reference"})
+        self.assertEqual(client.get("/stats").json(), {"search": 2, "scrape": 1, "gemini": 1})
+
+    def test_failed_research_runs_are_errors(self):
+        """A research run that failed counts as an error even though it returned status 200"""
+        failed = httpx.Response(200, json={"research_data": "Error running research agent: boom", "resource_links": []})
+        answered = httpx.Response(200, json={"research_data": "Findings", "resource_links": []})
+        self.assertEqual(classify("research", failed), "agent_error")
+        self.assertEqual(classify("research", answered), "200")
+        self.assertEqual(classify("research", httpx.Response(503)), "503")
+        self.assertEqual(classify("formatter", httpx.Response(200, json={"Summary": "s"})), "200")
+
+    def test_percentile(self):
+        """Percentiles use the nearest rank"""
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 50), percentile(values, 95), percentile(values, 99)), (50, 95, 99))
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app.utils.cache import MemoryCache, SQLiteCache, cache_key, canonical_query
+
+
+class TestResultCache(unittest.TestCase):
+    def test_key_normalizes_query(self):
+        """Queries differing only in case, spacing or trailing punctuation share a key"""
+        self.assertEqual(cache_key("news", "  AI   Jobs 2025? "), cache_key("news", "ai jobs 2025"))
+        self.assertNotEqual(cache_key("news", "ai jobs"), cache_key("search", "ai jobs"))
+
+    def test_canonical_query_ignores_case_and_punctuation(self):
+        """Research queries differing in case, spacing or punctuation match"""
+        self.assertEqual(canonical_query("What is the future of AI?"), canonical_query("what is the  future of ai"))
+        self.assertNotEqual(canonical_query("AI future"), canonical_query("AI past"))
+
+    def test_canonical_query_keeps_question_words_and_order(self):
+        """Different questions about the same terms get distinct keys"""
+        self.assertNotEqual(canonical_query("why did Apple IPO"), canonical_query("when did Apple IPO"))
+        self.assertNotEqual(canonical_query("dog bites man"), canonical_query("man bites dog"))
+        self.assertNotEqual(canonical_query("is coffee healthy"), canonical_query("is coffee not healthy"))
+        self.assertEqual(canonical_query("what is it"), "what is it")
+        self.assertEqual(canonical_query("?!"), "")
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        """The memory cache keeps at most max_entries and counts hits and misses"""
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", "1", ttl=60)
+        cache.set("b", "2", ttl=60)
+        self.assertEqual(cache.get("a"), "1")
+        cache.set("c", "3", ttl=60)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "3")
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_expired_entries_are_not_returned(self):
+        """Entries past their TTL are treated as misses"""
+        cache = MemoryCache()
+        cache.set("a", "1", ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+    def test_sqlite_cache_persists_and_bounds_size(self):
+        """The SQLite cache survives reopening and evicts beyond max_entries"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite3")
+            cache = SQLiteCache(path, max_entries=2)
+            cache.set("a", {"value": 1}, ttl=60)
+            cache.set("b", {"value": 2}, ttl=60)
+            cache.set("c", {"value": 3}, ttl=60)
+            self.assertEqual(len(cache), 2)
+
+            reopened = SQLiteCache(path, max_entries=2)
+            self.assertEqual(reopened.get("c"), {"value": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from concurrent.futures import Future
+
+from app.services.coalescer import create_single_flight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_identical_queries_share_one_execution(self):
+        """Normalized-identical queries join the execution already in flight"""
+        flight = create_single_flight("normalized")
+        started = []
+
+        def start():
+            future = Future()
+            started.append(future)
+            return future
+
+        first = flight.submit("AI News", start)
+        second = flight.submit("  ai news? ", start)
+        other = flight.submit("sports", start)
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(started), 2)
+        self.assertEqual(flight.stats()["followers"], 1)
+
+        # A finished execution is not reused by later calls
+        first.set_result("done")
+        self.assertIsNot(flight.submit("ai news", start), first)
+
+    def test_leave_reports_the_last_waiter(self):
+        """An execution may be cancelled only once every caller has left it"""
+        flight = create_single_flight("normalized")
+        first = flight.submit("ai news", Future)
+        second = flight.submit("AI news", Future)
+        self.assertIs(first, second)
+
+        self.assertFalse(flight.leave("ai news", first))
+        self.assertTrue(flight.leave("ai news", second))
+        # Later calls start a fresh execution instead of joining the abandoned one
+        self.assertIsNot(flight.submit("ai news", Future), first)
+        self.assertFalse(flight.leave("ai news", first))
+
+    def test_exact_rule_and_disabled_mode(self):
+        """The exact rule compares raw queries and disabled coalescing always starts a run"""
+        exact = create_single_flight("exact")
+        self.assertIsNot(exact.submit("AI", Future), exact.submit("ai", Future))
+
+        disabled = create_single_flight("normalized", enabled=False)
+        self.assertIsNot(disabled.submit("ai", Future), disabled.submit("ai", Future))
+
+
+if __name__ == "__main__":
+    unittest.main()
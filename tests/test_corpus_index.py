@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from app.utils.corpus_index import PAGE, SNIPPET, CorpusIndex
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = CorpusIndex(os.path.join(self.tmp.name, "corpus.sqlite3"), max_sources=3, passage_tokens=20)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_ranks_relevant_passages(self):
+        """Pages are indexed as passages and searched with stemmed BM25"""
+        page = "\n\n".join([
+            "Gardening tips for growing tomatoes in small spaces during the summer months.",
+            "Solar panels convert sunlight into electricity; modern panel efficiency exceeds 22 percent.",
+        ])
+        self.assertTrue(self.index.index_page("https://example.com/solar", page, title="Energy"))
+        self.index.index_snippet("https://example.org/wind", "Wind power", "Turbines and wind farms")
+
+        results = self.index.search("solar panel efficiency")
+        self.assertEqual(results[0]["url"], "https://example.com/solar")
+        self.assertIn("Solar panels", results[0]["text"])
+        self.assertEqual(results[0]["kind"], PAGE)
+        self.assertEqual(self.index.search("wind turbine")[0]["kind"], SNIPPET)
+        self.assertEqual(self.index.search("the and of"), [])
+
+    def test_incremental_updates_and_eviction(self):
+        """Re-indexing replaces a URL's passages; snippets never replace pages; old sources are evicted"""
+        url = "https://example.com/a"
+        self.index.index_page(url, "Old article about hydrogen fuel cells.")
+        self.assertFalse(self.index.index_page(url, "Old article about hydrogen fuel cells."))
+        self.assertFalse(self.index.index_snippet(url, "A", "Snippet about hydrogen"))
+        self.index.index_page(url, "New article about geothermal heat pumps.")
+        self.assertEqual(self.index.search("hydrogen"), [])
+        self.assertEqual(len(self.index.search("geothermal")), 1)
+
+        for name in ("b", "c", "d"):
+            self.index.index_snippet(f"https://example.com/{name}", name, f"Snippet {name} about tidal energy")
+        self.assertEqual(self.index.stats()["pages"] + self.index.stats()["snippets"], 3)
+        self.assertEqual(self.index.search("geothermal"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from app.utils.fingerprint import hamming, simhash
+from app.utils.page_store import PageStore
+from app.utils.run_context import run_scope
+
+ARTICLE = " ".join(
+    f"Paragraph {i}: the central bank kept its benchmark rate unchanged at {i} percent, officials "
+    f"said, pointing to inflation that stayed above target in sector {i * 7} of the economy."
+    for i in range(40)
+)
+COPY = "By Wire Staff. Updated 10:42 GMT. " + ARTICLE + " Reporting by A. Writer; editing by B. Editor."
+OTHER = " ".join(
+    f"Section {i}: the football club signed striker number {i} for the season after "
+    f"a long transfer saga involving {i * 3} clubs across Europe."
+    for i in range(40)
+)
+
+
+class TestNearDuplicates(unittest.TestCase):
+    def test_simhash_separates_copies_from_other_pages(self):
+        """Syndicated copies are within the page distance; unrelated pages are far apart"""
+        self.assertLessEqual(hamming(simhash(ARTICLE), simhash(COPY)), 3)
+        self.assertGreater(hamming(simhash(ARTICLE), simhash(OTHER)), 10)
+
+    def test_run_collapses_pages_and_snippets(self):
+        """Within a run, later copies point at the first copy"""
+        with run_scope("interest rates") as run:
+            self.assertIsNone(run.match_page("https://wire.example/a", simhash(ARTICLE), 3))
+            self.assertIsNone(run.match_page("https://wire.example/a", simhash(ARTICLE), 3))
+            self.assertEqual(run.match_page("https://mirror.example/a", simhash(COPY), 3), "https://wire.example/a")
+            self.assertIsNone(run.match_page("https://sports.example/b", simhash(OTHER), 3))
+
+            first = {"central", "bank", "kept", "rate", "unchanged", "inflation"}
+            self.assertIsNone(run.match_snippet("https://wire.example/s", first, 0.7))
+            self.assertEqual(run.match_snippet("https://amp.example/s", first | {"amp"}, 0.7), "https://wire.example/s")
+            self.assertIsNone(run.duplicate_of("https://amp.example/s", crawled_only=True))
+            self.assertEqual(run.duplicate_of("https://mirror.example/a", crawled_only=True), "https://wire.example/a")
+
+    def test_page_store_stores_near_duplicates_as_pointers(self):
+        """A near-duplicate page reuses the first copy's body"""
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PageStore(os.path.join(tmp, "pages.sqlite3"), max_bytes=10 ** 7, max_age=60, duplicate_distance=3)
+            first = store.put("https://wire.example/a", ARTICLE)
+            self.assertEqual(store.put("https://mirror.example/a", COPY), first)
+            self.assertNotEqual(store.put("https://sports.example/b", OTHER), first)
+            self.assertEqual(store.lookup("https://mirror.example/a").text, ARTICLE)
+
+
+if __name__ == "__main__":
+    unittest.main()
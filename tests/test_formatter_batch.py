@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.scheema import Format
+from app.routers import formater
+from app.utils import config
+
+
+class FakeGenaiClient:
+    """Gemini client formatting a prompt into its own summary, tracking concurrent calls"""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.active = 0
+        self.peak = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self.generate_content))
+
+    async def generate_content(self, model, contents, config):
+        prompt = contents.rsplit(" - ", 1)[-1]
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(prompt, 0.01))
+            if prompt in self.failing:
+                raise RuntimeError("quota exceeded")
+            return SimpleNamespace(parsed=Format(Summary=prompt, Reference=[]))
+        finally:
+            self.active -= 1
+
+
+class TestFormatterBatch(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(formater.router)
+        self.client = TestClient(app)
+
+    def _generate(self, genai_client, prompts):
+        with mock.patch.object(formater, "get_genai_client", return_value=genai_client):
+            return self.client.post(
+                "/api/formater/generate_batch", json={"requests": [{"prompt": prompt} for prompt in prompts]}
+            )
+
+    def test_results_in_request_order(self):
+        """Results follow the order of the prompts, not the order the calls finish in"""
+        client = FakeGenaiClient(delays={"first": 0.1, "second": 0.05})
+        response = self._generate(client, ["first", "second", "third"])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual([result["result"]["Summary"] for result in results], ["first", "second", "third"])
+
+    def test_too_many_items(self):
+        """A batch over FORMATTER_BATCH_MAX_ITEMS is rejected with 413"""
+        client = FakeGenaiClient()
+        with mock.patch.object(config, "FORMATTER_BATCH_MAX_ITEMS", 2):
+            response = self._generate(client, ["a", "b", "c"])
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(client.peak, 0)
+
+    def test_failing_item_does_not_fail_the_batch(self):
+        """An item whose call fails reports its error next to the other results"""
+        response = self._generate(FakeGenaiClient(failing=["b"]), ["a", "b", "c"])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertIsNone(results[1]["result"])
+        self.assertIn("quota exceeded", results[1]["error"])
+        self.assertEqual([results[0]["result"]["Summary"], results[2]["result"]["Summary"]], ["a", "c"])
+
+    def test_concurrency_is_bounded(self):
+        """At most FORMATTER_BATCH_CONCURRENCY calls run at the same time"""
+        client = FakeGenaiClient(delays={str(index): 0.05 for index in range(8)})
+        with mock.patch.object(config, "FORMATTER_BATCH_CONCURRENCY", 3):
+            response = self._generate(client, [str(index) for index in range(8)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.peak, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
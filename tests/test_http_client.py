@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+from app.utils import config, http_client
+from app.utils.run_context import run_scope
+
+
+class TestHttpClient(unittest.TestCase):
+    def test_timeout_uses_config_and_overrides(self):
+        """Timeouts come from the configuration, with the read timeout overridable"""
+        timeout = http_client._timeout()
+        self.assertEqual(timeout.read, config.HTTP_READ_TIMEOUT)
+        self.assertEqual(timeout.connect, config.HTTP_CONNECT_TIMEOUT)
+        self.assertEqual(timeout.pool, config.HTTP_CONNECT_TIMEOUT)
+        self.assertEqual(http_client._timeout(read=3).read, 3)
+        self.assertEqual(http_client._timeout(read=3).write, 3)
+
+    def test_timeout_capped_by_the_time_left(self):
+        """Every timeout is capped to the time left before the run's deadline"""
+        timeout = http_client._timeout(read=30, remaining=0.5)
+        self.assertEqual((timeout.connect, timeout.read, timeout.write, timeout.pool), (0.5, 0.5, 0.5, 0.5))
+
+    def test_per_host_cap_under_concurrency(self):
+        """At most HTTP_MAX_CONNECTIONS_PER_HOST requests to one host run at the same time"""
+        active = {}
+        peak = {}
+        lock = threading.Lock()
+
+        def handler(request):
+            host = request.url.host
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+            return httpx.Response(200, json={})
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        with mock.patch.object(config, "HTTP_MAX_CONNECTIONS_PER_HOST", 2), \
+                mock.patch.dict(http_client._host_semaphores, clear=True), \
+                mock.patch.object(http_client, "get_client", return_value=client):
+            threads = [
+                threading.Thread(target=http_client.post, args=(f"https://{host}.example/api", {}, {}))
+                for host in ("a", "b") for _ in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        client.close()
+        self.assertEqual(peak, {"a.example": 2, "b.example": 2})
+
+    def test_post_after_the_deadline_is_not_sent(self):
+        """No request is started once the research run's deadline has passed"""
+        handler = mock.Mock(return_value=httpx.Response(200))
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        with mock.patch.object(http_client, "get_client", return_value=client):
+            with run_scope("solar", deadline=time.monotonic() - 1):
+                with self.assertRaises(TimeoutError):
+                    http_client.post("https://a.example/api", {}, {})
+        client.close()
+        handler.assert_not_called()
+
+    def test_close(self):
+        """Closing releases the shared client, and the next use creates a new one"""
+        client = http_client.get_client()
+        http_client.close()
+        self.assertTrue(client.is_closed)
+        self.assertEqual(http_client.get_client.cache_info().currsize, 0)
+        http_client.close()
+        replacement = http_client.get_client()
+        self.assertIsNot(replacement, client)
+        self.assertFalse(replacement.is_closed)
+        http_client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
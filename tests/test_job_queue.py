@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app.services.job_queue import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = JobStore(
+            os.path.join(self.directory.name, "jobs.sqlite3"),
+            visibility_timeout=0.05,
+            max_attempts=2,
+            retry_backoff=0,
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_claim_and_complete(self):
+        """A claimed job is leased to one worker and stores its result"""
+        job = self.store.enqueue("ai news")
+        self.assertEqual(job["status"], QUEUED)
+
+        claimed = self.store.claim()
+        self.assertEqual(claimed["id"], job["id"])
+        self.assertEqual(claimed["status"], RUNNING)
+        self.assertIsNone(self.store.claim())
+
+        self.assertTrue(self.store.complete(job["id"], claimed["lease_id"], {"research_data": "x"}))
+        self.assertEqual(self.store.get(job["id"])["status"], SUCCEEDED)
+        self.assertEqual(self.store.get(job["id"])["result"], {"research_data": "x"})
+
+    def test_expired_lease_is_redelivered_then_failed(self):
+        """A job whose worker stops heartbeating is retried until attempts run out"""
+        job = self.store.enqueue("ai news")
+        first = self.store.claim()
+        time.sleep(0.06)
+        second = self.store.claim()
+        self.assertEqual(second["id"], job["id"])
+        self.assertFalse(self.store.complete(job["id"], first["lease_id"], {}))
+
+        time.sleep(0.06)
+        self.assertIsNone(self.store.claim())
+        self.assertEqual(self.store.get(job["id"])["status"], FAILED)
+
+    def test_failed_attempts_are_retried(self):
+        """Failures are retried while attempts remain"""
+        job = self.store.enqueue("ai news")
+        self.store.fail(job["id"], self.store.claim()["lease_id"], "boom")
+        self.assertEqual(self.store.get(job["id"])["status"], QUEUED)
+        self.store.fail(job["id"], self.store.claim()["lease_id"], "boom")
+        self.assertEqual(self.store.get(job["id"])["status"], FAILED)
+
+    def test_cancel_revokes_the_lease(self):
+        """Cancelling a running job makes its heartbeat and result fail"""
+        job = self.store.enqueue("ai news")
+        claimed = self.store.claim()
+        self.assertEqual(self.store.cancel(job["id"])["status"], CANCELLED)
+        self.assertFalse(self.store.heartbeat(job["id"], claimed["lease_id"]))
+        self.assertFalse(self.store.complete(job["id"], claimed["lease_id"], {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from types import SimpleNamespace
+
+from smolagents.memory import ActionStep, TaskStep
+
+from app.agents.memory_compaction import COMPACTED_PREFIX, MemoryCompactor
+from app.utils.run_context import run_scope
+
+
+def _observation(topic: str) -> str:
+    paragraphs = [f"Filler paragraph {i} about unrelated gardening topics and weather." for i in range(30)]
+    paragraphs[10] = f"Key finding about {topic} from https://example.com/{topic}."
+    return "\n\n".join(paragraphs)
+
+
+class TestMemoryCompactor(unittest.TestCase):
+    def test_old_observations_are_compacted_over_budget(self):
+        """Older observations become extracts with their URLs; the task and recent steps stay verbatim"""
+        steps = [TaskStep(task="Research solar")]
+        steps += [ActionStep(step_number=i, observations=_observation(f"solar{i}"), duration=1.0) for i in range(1, 5)]
+        agent = SimpleNamespace(memory=SimpleNamespace(steps=steps), model=SimpleNamespace())
+        originals = [step.observations for step in steps[1:]]
+
+        compactor = MemoryCompactor(max_tokens=1000, keep_recent=2, summary_tokens=40)
+        with run_scope("solar1 solar2"):
+            compactor(steps[-1], agent=agent)
+
+        self.assertEqual(steps[0].task, "Research solar")
+        for step in steps[1:3]:
+            self.assertTrue(step.observations.startswith(COMPACTED_PREFIX))
+            self.assertIn(f"https://example.com/solar{step.step_number}", step.observations)
+        self.assertIn("Key finding about solar1", steps[1].observations)
+        self.assertEqual([step.observations for step in steps[3:]], originals[2:])
+        self.assertLess(MemoryCompactor.memory_tokens(agent), sum(len(text) // 4 for text in originals))
+
+    def test_memory_under_budget_is_untouched(self):
+        """Nothing is compacted while memory is within the budget"""
+        step = ActionStep(step_number=1, observations=_observation("solar"), duration=1.0)
+        agent = SimpleNamespace(memory=SimpleNamespace(steps=[step, ActionStep(step_number=2)]), model=SimpleNamespace())
+        MemoryCompactor(max_tokens=100000, keep_recent=1)(step, agent=agent)
+        self.assertFalse(step.observations.startswith(COMPACTED_PREFIX))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from app.utils import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_percentiles(self):
+        """Percentiles are estimated by bucket upper bounds"""
+        histogram = metrics.Histogram(buckets=(0.1, 0.5, 1.0))
+        self.assertIsNone(histogram.percentile(50))
+        for seconds in [0.05] * 90 + [0.4] * 9 + [2.0]:
+            histogram.observe(seconds)
+        self.assertEqual(histogram.percentile(50), 0.1)
+        self.assertEqual(histogram.percentile(95), 0.5)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["buckets"], {"0.1": 90, "0.5": 99, "1.0": 99, "+Inf": 100})
+        self.assertEqual(snapshot["count"], 100)
+
+    def test_render_text_format(self):
+        """Families and collectors are rendered in the Prometheus text format"""
+        calls = metrics.counter("test_calls_total", "Test calls.", ["tool"])
+        calls.labels(tool='say "hi"').inc(2)
+        latency = metrics.histogram("test_latency_seconds", "Test latency.", buckets=(0.1, 1.0))
+        latency.observe(0.5)
+        metrics.register_collector(lambda: [("test_collected", "gauge", "Collected.", [({}, 3)])])
+
+        text = metrics.render()
+        self.assertIn("# TYPE test_calls_total counter\n", text)
+        self.assertIn('test_calls_total{tool="say \\"hi\\""} 2.0\n', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 0\n', text)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 1\n', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("test_latency_seconds_count 1\n", text)
+        self.assertIn("test_collected 3.0\n", text)
+        self.assertIs(metrics.counter("test_calls_total", "Test calls.", ["tool"]), calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
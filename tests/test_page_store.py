@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app.utils.page_store import PageStore, normalize_url
+
+
+class TestPageStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "pages.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_normalize_url(self):
+        """Equivalent URL spellings normalize to the same key"""
+        self.assertEqual(
+            normalize_url("HTTPS://Example.com:443/docs/?b=2&a=1&utm_source=x#intro"),
+            normalize_url("https://example.com/docs?a=1&b=2"),
+        )
+
+    def test_identical_bodies_are_stored_once(self):
+        """Two URLs with the same content share one compressed body"""
+        store = PageStore(self.path, max_bytes=10 ** 6, max_age=60)
+        first = store.put("https://a.example/story", "same text " * 100)
+        second = store.put("https://b.example/story", "same text " * 100)
+        self.assertEqual(first, second)
+        self.assertEqual(store.lookup("https://b.example/story").text, "same text " * 100)
+        self.assertLess(store.total_bytes(), 1000)
+
+    def test_stale_pages_are_served_and_refreshed(self):
+        """Stale pages are served while a background refresh stores a new copy"""
+        store = PageStore(self.path, max_bytes=10 ** 6, max_age=0, stale_while_revalidate=60)
+        store.put("https://a.example", "old")
+        page = store.lookup("https://a.example")
+        self.assertFalse(page.fresh)
+
+        store.refresh_in_background("https://a.example", lambda url: "new")
+        store._refresh_executor.shutdown(wait=True)
+        self.assertEqual(store.lookup("https://a.example").text, "new")
+
+    def test_evicts_least_recently_used_pages(self):
+        """Stored bodies are kept under the byte budget"""
+        store = PageStore(self.path, max_bytes=1000, max_age=60)
+        store.put("https://a.example", os.urandom(600).hex())
+        time.sleep(0.01)
+        store.put("https://b.example", os.urandom(600).hex())
+        self.assertIsNone(store.lookup("https://a.example"))
+        self.assertIsNotNone(store.lookup("https://b.example"))
+        self.assertLessEqual(store.total_bytes(), 1000)
+
+    def test_replaced_body_is_deleted_unless_shared(self):
+        """A page's previous body is deleted once no other page refers to it"""
+        store = PageStore(self.path, max_bytes=10 ** 6, max_age=60)
+        shared = store.put("https://a.example", "first " * 100)
+        store.put("https://b.example", "first " * 100)
+        store.put("https://a.example", "second " * 100)
+        store.put("https://c.example", "third " * 100)
+        store.put("https://c.example", "fourth " * 100)
+
+        hashes = {row[0] for row in store._conn.execute("SELECT content_hash FROM blobs")}
+        self.assertIn(shared, hashes)
+        self.assertEqual(len(hashes), 3)
+
+    def test_running_total_matches_stored_bodies(self):
+        """The byte total kept across puts and evictions equals the size of the stored bodies"""
+        store = PageStore(self.path, max_bytes=5000, max_age=60)
+        for number in range(40):
+            store.put(f"https://example.com/{number % 25}", os.urandom(200).hex())
+        store.put("https://example.com/large", os.urandom(2000).hex())
+
+        self.assertLessEqual(store.total_bytes(), 5000)
+        self.assertEqual(store.total_bytes(), store._sum_bytes())
+        self.assertIsNotNone(store.lookup("https://example.com/large"))
+        self.assertEqual(PageStore(self.path, max_bytes=5000, max_age=60).total_bytes(), store.total_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.prompts.agent_prompt import AgentPrompt
+from app.services.agent_pool import PoolSaturatedError
+from app.services.agent_service import ResearchAgentService
+from app.services.prefetch import Prefetcher
+from app.utils.cache import MemoryCache
+from app.utils.run_context import current_run, run_scope
+from app.utils.search_results import format_results
+
+
+class FakeSearch:
+    """Search tool returning a Serper response with one result per URL"""
+
+    def __init__(self, field, urls, delay=0.0):
+        self.field = field
+        self.urls = urls
+        self.delay = delay
+        self.queries = []
+
+    def fetch(self, query):
+        self.queries.append(query)
+        time.sleep(self.delay)
+        return json.dumps({self.field: [{"title": url, "link": url, "snippet": query} for url in self.urls]})
+
+    def render(self, text):
+        return format_results(text, self.field, 8, current_run())
+
+
+class PlaceholderService(ResearchAgentService):
+    """Service whose pool holds placeholder agents"""
+
+    def __init__(self, **kwargs):
+        # The default SQLite cache would leave a file under data/
+        with mock.patch("app.services.agent_service.get_research_cache", MemoryCache):
+            super().__init__(**kwargs)
+
+    def _create_agent(self):
+        return object()
+
+
+class FakeCrawler:
+    def __init__(self):
+        self.crawled = []
+        self.done = threading.Event()
+
+    def crawl(self, url):
+        self.crawled.append(url)
+        if len(self.crawled) == 2:
+            self.done.set()
+        return "text"
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_results_rendered_in_the_run(self):
+        """Prefetched results are compacted in the run, which then treats their URLs as seen"""
+        web = FakeSearch("organic", ["https://a.example/1", "https://a.example/2"])
+        news = FakeSearch("news", ["https://a.example/1", "https://n.example/1"])
+        prefetcher = Prefetcher(web, news, timeout=5)
+        prefetch = prefetcher.start("solar panels")
+        with run_scope("solar panels") as run:
+            found = json.loads(prefetch.results())
+            self.assertFalse(run.mark_seen("https://a.example/2"))
+        self.assertEqual(web.queries, ["solar panels"])
+        self.assertEqual([record["url"] for record in found["web_search"]], ["https://a.example/1", "https://a.example/2"])
+        # The news copy of a web result is left out, as a later search in the run would do
+        self.assertEqual([record["url"] for record in found["news_search"]], ["https://n.example/1"])
+        prefetcher.shutdown()
+
+    def test_slow_search_is_left_out(self):
+        """A run does not wait past the timeout for a slow search"""
+        prefetcher = Prefetcher(
+            FakeSearch("organic", ["https://a.example/1"]),
+            FakeSearch("news", ["https://n.example/1"], delay=1.0),
+            timeout=0.2
+        )
+        prefetch = prefetcher.start("solar panels")
+        with run_scope("solar panels"):
+            found = json.loads(prefetch.results())
+        self.assertEqual(list(found), ["web_search"])
+        prefetcher.shutdown()
+
+    def test_top_results_crawled(self):
+        """The top web results are crawled once the web search returns"""
+        crawler = FakeCrawler()
+        web = FakeSearch("organic", ["https://a.example/1", "https://a.example/2", "https://a.example/3"])
+        prefetcher = Prefetcher(web, FakeSearch("news", []), crawler=crawler, crawl_top_k=2)
+        prefetcher.start("solar panels")
+        self.assertTrue(crawler.done.wait(timeout=5))
+        self.assertEqual(sorted(crawler.crawled), ["https://a.example/1", "https://a.example/2"])
+        prefetcher.shutdown()
+
+    def test_prompt_includes_prefetched_results(self):
+        """Prefetched results are appended to the agent's task, and only when there are some"""
+        self.assertNotIn("PREFETCHED SEARCH RESULTS", AgentPrompt("solar").get_prompt())
+        prompt = AgentPrompt("solar", prefetched='{"web_search": []}').get_prompt()
+        self.assertIn("PREFETCHED SEARCH RESULTS", prompt)
+        self.assertIn('{"web_search": []}', prompt)
+
+    def test_saturated_submit_makes_no_searches(self):
+        """A run rejected by a saturated pool does not start its searches"""
+        service = PlaceholderService(execution_mode="thread", pool_size=1, max_queue=0)
+        web = FakeSearch("organic", ["https://a.example/1"])
+        news = FakeSearch("news", ["https://n.example/1"])
+        service.prefetcher = Prefetcher(web, news, timeout=5)
+        release = threading.Event()
+        busy = service.pool.submit(lambda agent: release.wait())
+        try:
+            with self.assertRaises(PoolSaturatedError):
+                service._start("solar panels", None, None, None)
+            self.assertEqual(web.queries, [])
+            self.assertEqual(news.queries, [])
+        finally:
+            release.set()
+            busy.result()
+            service.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
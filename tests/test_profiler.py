@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.utils import config
+from app.utils.profiler import Profile, attach, current_profile, profile_request
+
+
+def _parse_payload(profile):
+    with attach(profile):
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            json.loads('{"research_data": "x", "resource_links": []}')
+
+
+class TestProfiler(unittest.TestCase):
+    def test_samples_attached_thread(self):
+        """Only attached threads are sampled, and samples are attributed to stages"""
+        profile = Profile("research", interval=0.002).start()
+        worker = threading.Thread(target=_parse_payload, args=(profile,))
+        idle = threading.Thread(target=time.sleep, args=(0.2,))
+        worker.start(), idle.start()
+        worker.join(), idle.join()
+        profile.stop()
+
+        breakdown = profile.breakdown()
+        self.assertGreater(breakdown["samples"], 10)
+        self.assertIn("json", breakdown["stages"])
+        self.assertAlmostEqual(breakdown["sampled_seconds"], 0.2, delta=0.1)
+
+        speedscope = profile.speedscope()
+        self.assertEqual(len(speedscope["profiles"]), 1)
+        frames = speedscope["shared"]["frames"]
+        sampled = speedscope["profiles"][0]
+        self.assertEqual(len(sampled["samples"]), len(sampled["weights"]))
+        self.assertTrue(all(index < len(frames) for stack in sampled["samples"] for index in stack))
+        self.assertIn("_parse_payload", {frames[index]["name"] for stack in sampled["samples"] for index in stack})
+
+    def test_save_writes_speedscope_and_breakdown(self):
+        """Saving writes a speedscope file and a breakdown named after the profile"""
+        profile = Profile("formatter", interval=0.002).start()
+        profile.watch()
+        time.sleep(0.02)
+        profile.stop()
+        with tempfile.TemporaryDirectory() as directory:
+            path = profile.save(directory)
+            self.assertTrue(path.endswith(f"{profile.id}.speedscope.json"))
+            with open(os.path.join(directory, f"{profile.id}.breakdown.json")) as file:
+                self.assertEqual(json.load(file)["endpoint"], "formatter")
+
+    def test_request_profile_saved_in_the_background(self):
+        """A profiled request returns without waiting for its profile to be written"""
+        save = Profile.save
+
+        def slow_save(profile, directory):
+            time.sleep(0.5)
+            return save(profile, directory)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(config, "PROFILE_TOKEN", "secret"), \
+                mock.patch.object(config, "PROFILE_DIR", directory), \
+                mock.patch.object(Profile, "save", slow_save):
+            started = time.monotonic()
+            with profile_request("formatter", "secret", watch_current=True) as profile:
+                time.sleep(0.02)
+            self.assertLess(time.monotonic() - started, 0.3)
+            self.assertTrue(profile.saved.wait(5))
+            self.assertTrue(os.path.exists(os.path.join(directory, f"{profile.id}.breakdown.json")))
+
+    def test_not_profiled_by_default(self):
+        """Without a token or sampling rate, requests are not profiled"""
+        with profile_request("research", "anything") as profile:
+            self.assertIsNone(profile)
+            self.assertIsNone(current_profile())
+        with attach(None):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
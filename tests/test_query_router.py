@@ -0,0 +1,105 @@
+import unittest
+
+from app.agents.query_router import QueryRouter, QueryTier
+from app.prompts.agent_prompt import AgentPrompt
+
+
+def tiers():
+    return [
+        QueryTier(name="simple", model="small", max_steps=4, max_tokens=1024, prompt_variant="brief", min_sources=3),
+        QueryTier(name="standard", model="medium", max_steps=6, max_tokens=4096, prompt_variant="focused",
+                  min_sources=5, min_pages=2),
+        QueryTier(name="deep", model="large", max_steps=10, max_tokens=8000, prompt_variant="comprehensive"),
+    ]
+
+
+class TestQueryRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = QueryRouter(tiers())
+
+    def test_routes_queries_by_complexity(self):
+        """Single facts go to simple, other questions to standard, analyses to deep"""
+        cases = {
+            "capital of France": "simple",
+            "What is the capital of France?": "simple",
+            "Who is the CEO of Tesla?": "simple",
+            "How many moons does Jupiter have?": "simple",
+            "define entropy": "standard",
+            "How do heat pumps work in cold climates?": "standard",
+            "Is coffee bad for your heart?": "standard",
+            "Compare the EV market in China and Europe": "deep",
+            "What are the trends in solar panel efficiency?": "deep",
+            "History of the printing press, its inventors, and its effect on literacy": "deep",
+            "renewable energy": "deep",
+        }
+        for query, tier in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(self.router.route(query).name, tier)
+
+    def test_explanatory_questions_are_not_factoid(self):
+        """Causal and "what is <concept>" questions get at least the standard tier"""
+        for query in (
+                "What caused the fall of the Roman Empire?",
+                "What is quantum computing?",
+                "Why did Apple IPO in 1980?",
+                "What is the cause of the fall of Rome?",
+                "causes of World War I",
+        ):
+            with self.subTest(query=query):
+                self.assertNotEqual(self.router.route(query).name, "simple")
+
+    def test_added_rule_takes_precedence(self):
+        """A rule added to the router is applied before the default rules"""
+        self.router.add_rule(lambda features: "deep" if "france" in features.words else None)
+
+        self.assertEqual(self.router.route("capital of France").name, "deep")
+        self.assertEqual(self.router.route("capital of Spain").name, "simple")
+
+    def test_unknown_tier_is_ignored(self):
+        """A rule naming a tier the router does not have is skipped"""
+        self.router.add_rule(lambda features: "premium")
+
+        self.assertEqual(self.router.route("capital of France").name, "simple")
+
+    def test_unknown_default_is_rejected(self):
+        """The default tier must be one of the router's tiers"""
+        with self.assertRaises(ValueError):
+            QueryRouter(tiers(), default="premium")
+
+    def test_tier_satisfied(self):
+        """A tier is satisfied once both thresholds are met, and never without an early exit"""
+        simple, standard, deep = tiers()
+
+        self.assertFalse(simple.satisfied(2, 0))
+        self.assertTrue(simple.satisfied(3, 0))
+        self.assertFalse(standard.satisfied(8, 1))
+        self.assertTrue(standard.satisfied(5, 2))
+        self.assertFalse(deep.satisfied(100, 100))
+
+
+class TestPromptVariants(unittest.TestCase):
+    def test_variants_set_answer_length(self):
+        """The brief and focused prompts are shorter than the comprehensive one"""
+        comprehensive = AgentPrompt("solar panels").get_prompt()
+        brief = AgentPrompt("solar panels", variant="brief").get_prompt()
+        focused = AgentPrompt("solar panels", variant="focused").get_prompt()
+
+        self.assertIn("solar panels", brief)
+        self.assertLess(len(brief), len(comprehensive))
+        self.assertLess(len(focused), len(comprehensive))
+        self.assertNotEqual(brief, focused)
+
+    def test_short_variants_keep_prefetched_results(self):
+        """Prefetched search results are included in the short prompts too"""
+        prompt = AgentPrompt("solar panels", prefetched='{"web_search": []}', variant="brief").get_prompt()
+
+        self.assertIn('{"web_search": []}', prompt)
+
+    def test_unknown_variant_is_rejected(self):
+        """An unknown prompt variant raises ValueError"""
+        with self.assertRaises(ValueError):
+            AgentPrompt("solar panels", variant="verbose")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+
+import httpx
+
+from app.utils.http_client import classify_response
+from app.utils.rate_limit import RateLimiter, RetryPolicy, TokenBucket, call_with_retries, parse_retry_after
+from app.utils.run_context import DeadlineExceededError, RunCancelledError, run_scope
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket_schedules_calls_at_the_rate(self):
+        """A burst is admitted at once; later calls are spaced at 1/rate"""
+        bucket = TokenBucket(rate=10, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, places=2)
+        self.assertAlmostEqual(waits[3], 0.2, places=2)
+
+        bucket.pause(0.5)
+        self.assertGreaterEqual(bucket.reserve(), 0.45)
+
+    def test_retries_honour_retry_after_and_stop_on_success(self):
+        """429 and 5xx are retried, Retry-After pauses the limiter, other errors are not retried"""
+        limiter = RateLimiter("test", qps=0, burst=1, max_concurrency=2,
+                              policy=RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=1))
+        responses = iter([
+            httpx.Response(429, headers={"Retry-After": "0.05"}),
+            httpx.Response(503),
+            httpx.Response(200),
+        ])
+        started = time.monotonic()
+        response = call_with_retries(lambda: next(responses), limiter, classify_response)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(limiter.stats()["retries"], 2)
+        self.assertEqual(limiter.stats()["rate_limited"], 1)
+
+        calls = []
+        result = call_with_retries(lambda: calls.append(1) or httpx.Response(404), limiter, classify_response)
+        self.assertEqual((result.status_code, len(calls)), (404, 1))
+
+        def _unreachable():
+            calls.append(1)
+            raise httpx.ConnectError("down")
+        calls.clear()
+        with self.assertRaises(httpx.ConnectError):
+            call_with_retries(_unreachable, limiter, classify_response)
+        self.assertEqual(len(calls), 4)
+
+    def test_concurrency_cap(self):
+        """No more than max_concurrency calls run at once"""
+        limiter = RateLimiter("test", qps=0, burst=1, max_concurrency=2)
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def _call():
+            with limiter.slot():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=_call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak[0], 2)
+
+    def test_research_deadline_caps_waits_and_retries(self):
+        """Inside a run, no call waits for quota or retries past the run's deadline"""
+        limiter = RateLimiter("test", qps=1, burst=1, max_concurrency=0,
+                              policy=RetryPolicy(max_attempts=4, base_delay=5, max_delay=5))
+        calls = []
+        with run_scope("query", deadline=time.monotonic() + 0.5) as run:
+            self.assertLessEqual(run.timeout(30), 0.5)
+            # The requested retry comes after the deadline, whatever the jitter
+            unavailable = httpx.Response(503, headers={"Retry-After": "1"})
+            response = call_with_retries(lambda: calls.append(1) or unavailable, limiter, classify_response)
+            self.assertEqual((response.status_code, len(calls)), (503, 1))
+            with self.assertRaises(DeadlineExceededError):
+                with limiter.slot():
+                    pass
+
+        with run_scope("query", deadline=time.monotonic() - 1) as run:
+            with self.assertRaises(DeadlineExceededError):
+                run.check()
+        cancel = threading.Event()
+        cancel.set()
+        with run_scope("query", cancel=cancel) as run:
+            self.assertIsNone(run.remaining())
+            with self.assertRaises(RunCancelledError):
+                run.timeout(30)
+
+    def test_call_refused_at_the_deadline_keeps_its_token(self):
+        """A call refused for lack of quota before the deadline leaves the quota to later calls"""
+        limiter = RateLimiter("test", qps=0.5, burst=1, max_concurrency=0)
+        with limiter.slot():
+            pass
+        for deadline in (0.5, -1):
+            with run_scope("query", deadline=time.monotonic() + deadline):
+                with self.assertRaises(DeadlineExceededError):
+                    with limiter.slot():
+                        pass
+        # Only the first call's token is used up, so the next one is due within two seconds
+        self.assertLessEqual(limiter.bucket.reserve(), 2.0)
+
+    def test_parse_retry_after(self):
+        """Retry-After is accepted in seconds or as an HTTP date"""
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
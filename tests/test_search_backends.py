@@ -0,0 +1,63 @@
+import time
+import unittest
+
+from app.utils.run_context import DeadlineExceededError, run_scope
+from app.utils.search_backends import HedgedSearch, SearchBackend
+
+
+class _Backend(SearchBackend):
+    def __init__(self, name, delay=0.0, error=None):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.error = error
+
+    def _search(self, query):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [{"title": query, "link": f"https://{self.name}.example/", "snippet": None, "date": None, "source": None}]
+
+
+class TestSearchBackends(unittest.TestCase):
+    def test_fast_primary_is_not_hedged(self):
+        """A primary answering within the hedge delay is used alone"""
+        search = HedgedSearch(_Backend("primary"), _Backend("secondary"), initial_delay=0.5)
+        self.assertEqual(search.search("q")["backend"], "primary")
+        self.assertEqual((search.hedged, search.secondary.latency.count), (0, 0))
+
+    def test_slow_or_failing_primary_is_hedged(self):
+        """The secondary answers when the primary is slow or fails"""
+        search = HedgedSearch(_Backend("primary", delay=1.0), _Backend("secondary"), initial_delay=0.05)
+        started = time.monotonic()
+        self.assertEqual(search.search("q")["backend"], "secondary")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual((search.hedged, search.secondary_wins), (1, 1))
+
+        failing = HedgedSearch(_Backend("primary", error=RuntimeError("down")), _Backend("secondary", delay=0.05))
+        self.assertEqual(failing.search("q")["backend"], "secondary")
+
+        both = HedgedSearch(_Backend("primary", error=RuntimeError("down")), _Backend("secondary", error=ValueError()))
+        with self.assertRaisesRegex(RuntimeError, "down"):
+            both.search("q")
+        self.assertEqual(both.stats()["backends"]["secondary"]["errors"], 1)
+
+    def test_losing_call_is_counted_as_abandoned(self):
+        """The slow primary still running after the secondary answered is counted"""
+        search = HedgedSearch(_Backend("primary", delay=0.5), _Backend("secondary"), initial_delay=0.05)
+        search.search("q")
+        self.assertEqual(search.stats()["abandoned"], 1)
+
+    def test_wait_ends_at_the_run_deadline(self):
+        """Inside a research run, a search with no answer gives up at the run's deadline"""
+        search = HedgedSearch(_Backend("primary", delay=1.0), _Backend("secondary", delay=1.0), initial_delay=0.05)
+        started = time.monotonic()
+        with run_scope("q", deadline=time.monotonic() + 0.2):
+            with self.assertRaises(DeadlineExceededError):
+                search.search("q")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(search.abandoned, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
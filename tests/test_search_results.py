@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from app.utils.run_context import current_run, run_scope
+from app.utils.search_results import compact_results, format_results
+
+RESPONSE = {
+    "knowledgeGraph": {"title": "Solar power", "description": "..."},
+    "organic": [
+        {"title": "Solar basics", "link": "https://www.example.com/solar", "snippet": "How it works",
+         "sitelinks": [{"title": "More", "link": "https://www.example.com/more"}], "position": 1},
+        {"title": "Solar news", "link": "https://news.example.org/a", "snippet": "Latest", "date": "1 day ago"},
+        {"title": "No link"},
+        {"title": "Storage", "link": "https://example.net/storage", "snippet": "Batteries"},
+    ],
+    "peopleAlsoAsk": [{"question": "Is solar worth it?"}],
+}
+
+
+class TestSearchResults(unittest.TestCase):
+    def test_compact_records_and_cap(self):
+        """Responses are reduced to capped title/url/snippet/date/source records"""
+        records = compact_results(RESPONSE, "organic", max_results=2)
+        self.assertEqual(records, [
+            {"title": "Solar basics", "url": "https://www.example.com/solar", "snippet": "How it works",
+             "date": None, "source": "example.com"},
+            {"title": "Solar news", "url": "https://news.example.org/a", "snippet": "Latest",
+             "date": "1 day ago", "source": "news.example.org"},
+        ])
+
+    def test_urls_seen_earlier_in_the_run_are_dropped(self):
+        """A run never gets the same URL twice, and runs do not share seen URLs"""
+        text = json.dumps(RESPONSE)
+        with run_scope("solar") as run:
+            self.assertIs(current_run(), run)
+            first = json.loads(format_results(text, "organic", 2, current_run()))
+            second = json.loads(format_results(text, "organic", 2, current_run()))
+        self.assertIsNone(current_run())
+        self.assertEqual([r["url"] for r in second], ["https://example.net/storage"])
+        self.assertNotIn(second[0]["url"], [r["url"] for r in first])
+
+        with run_scope("solar") as run:
+            self.assertEqual(len(compact_results(RESPONSE, "organic", 10, run)), 3)
+
+    def test_near_duplicate_results_are_collapsed(self):
+        """A syndicated copy of an earlier result keeps only a pointer to it"""
+        response = {"news": [
+            {"title": "Fed holds rates steady", "link": "https://wire.example/fed",
+             "snippet": "The Federal Reserve held interest rates steady on Wednesday, citing inflation."},
+            {"title": "Fed holds rates steady - Reuters", "link": "https://mirror.example/fed",
+             "snippet": "The Federal Reserve held interest rates steady Wednesday, citing inflation."},
+        ]}
+        with run_scope("fed") as run:
+            records = compact_results(response, "news", 10, run, min_similarity=0.7)
+        self.assertIn("snippet", records[0])
+        self.assertEqual(records[1], {"title": "Fed holds rates steady - Reuters",
+                                      "url": "https://mirror.example/fed",
+                                      "duplicate_of": "https://wire.example/fed"})
+
+
+if __name__ == "__main__":
+    unittest.main()
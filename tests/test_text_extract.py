@@ -0,0 +1,52 @@
+import unittest
+
+from app.utils.text_extract import OMISSION, count_tokens, extract_relevant, strip_boilerplate
+
+
+class TestTextExtract(unittest.TestCase):
+    def test_strip_boilerplate_drops_menus_and_banners(self):
+        """Menus, cookie banners and repeated lines are removed while prose is kept"""
+        page = "\n".join([
+            "Home", "News", "Sports", "Contact",
+            "",
+            "We use cookies to improve your experience. Accept all",
+            "",
+            "Solar panels convert sunlight into electricity using photovoltaic cells.",
+            "",
+            "Solar panels convert sunlight into electricity using photovoltaic cells.",
+            "© 2024 Example Inc. All rights reserved",
+        ])
+        cleaned = strip_boilerplate(page)
+        self.assertEqual(cleaned, "Solar panels convert sunlight into electricity using photovoltaic cells.")
+
+    def test_strip_boilerplate_keeps_prose_mentioning_boilerplate_words(self):
+        """Prose containing a boilerplate keyword, or a word containing one, is not dropped"""
+        paragraphs = [
+            "Bake the cookie dough for ten minutes until the edges turn golden.",
+            "The login server rejected requests after the certificate expired last week.",
+            "Readers who subscribe to the journal receive the full dataset with each issue.",
+            "The sensor board has four analog inputs and two digital outputs.",
+        ]
+        for paragraph in paragraphs:
+            with self.subTest(paragraph=paragraph):
+                self.assertEqual(strip_boilerplate(paragraph), paragraph)
+
+        self.assertEqual(strip_boilerplate("\n\n".join(paragraphs)), "\n\n".join(paragraphs))
+        self.assertEqual(strip_boilerplate("Subscribe to our newsletter\n\nLog in to comment"), "")
+
+    def test_extract_relevant_keeps_matching_chunks_within_budget(self):
+        """Chunks matching the query are kept in page order and the budget is respected"""
+        filler = [f"Paragraph {i} talks about gardening, soil and watering plants in spring." for i in range(40)]
+        filler[25] = "Battery storage lets households keep solar energy for use at night."
+        text = "\n\n".join(filler)
+
+        extracted = extract_relevant(text, "solar battery storage", max_tokens=60)
+        self.assertIn("Battery storage", extracted)
+        self.assertLessEqual(count_tokens(extracted.replace(OMISSION, "")), 60)
+
+        self.assertEqual(extract_relevant(text, "solar", max_tokens=0), text)
+        self.assertTrue(extract_relevant(text, None, max_tokens=60).startswith("Paragraph 0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import unittest
+
+from app.services.warmup import Warmup
+
+
+class TestWarmup(unittest.TestCase):
+    def test_ready_after_every_step(self):
+        """The warm-up is ready once every step has run"""
+        calls = []
+        warmup = Warmup([("first", lambda: calls.append(1)), ("second", lambda: calls.append(2))])
+        self.assertEqual(warmup.status()["status"], "warming")
+        warmup.start()
+        self.assertTrue(warmup.wait(timeout=5))
+        self.assertEqual(calls, [1, 2])
+        status = warmup.status()
+        self.assertEqual(status["status"], "ready")
+        self.assertEqual(list(status["steps"]), ["first", "second"])
+
+    def test_failed_step_is_never_ready(self):
+        """A failing step stops the warm-up and keeps the process not ready"""
+        def fail():
+            raise RuntimeError("no API key")
+
+        calls = []
+        warmup = Warmup([("clients", fail), ("workers", lambda: calls.append(1))])
+        warmup.start()
+        self.assertFalse(warmup.wait(timeout=5))
+        status = warmup.status()
+        self.assertEqual((status["status"], status["steps"]["clients"]["error"]), ("failed", "no API key"))
+        self.assertEqual(calls, [])
+
+    def test_importing_main_defers_heavy_dependencies(self):
+        """Importing the application does not load smolagents, LiteLLM or the Gemini SDK"""
+        code = (
+            "import sys, main; "
+            "print(','.join(m for m in ('smolagents', 'litellm', 'google.genai') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
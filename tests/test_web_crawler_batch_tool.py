@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+import unittest
+
+from app.tools.web_crawler_batch_tool import WebCrawlerBatchTool
+from app.utils.run_context import current_run
+
+
+class FakeCrawler:
+    """Crawler returning the URL as page text, with per-URL delays and failures"""
+
+    def __init__(self, delays=None, failures=(), retrying=(), blocking=()):
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.retrying = set(retrying)
+        self.blocking = set(blocking)
+        self.released = threading.Event()
+        self.crawled = []
+
+    def duplicate_of(self, url, text=None, pending=None):
+        return None
+
+    def crawl(self, url, timeout=None):
+        self.crawled.append(url)
+        time.sleep(self.delays.get(url, 0))
+        if url in self.failures:
+            raise RuntimeError("502 Bad Gateway")
+        if url in self.retrying:
+            # Retries with backoff stop at the run's deadline
+            while True:
+                current_run().check()
+                time.sleep(0.02)
+        if url in self.blocking:
+            self.released.wait(10)
+        return f"text of {url}"
+
+    def extract(self, text, query, max_tokens):
+        return text
+
+
+class TestWebCrawlerBatchTool(unittest.TestCase):
+    def _crawl(self, crawler, urls, **settings):
+        tool = WebCrawlerBatchTool(crawler=crawler)
+        for name, value in settings.items():
+            setattr(tool, name, value)
+        return json.loads(tool.forward(urls))
+
+    def test_results_keep_the_requested_order(self):
+        """Results follow the order of the URLs, not the order the crawls finish in"""
+        urls = ["https://a.example/1", "https://a.example/2", "https://a.example/3"]
+        crawler = FakeCrawler(delays={urls[0]: 0.1, urls[1]: 0.05})
+        results = self._crawl(crawler, urls)
+        self.assertEqual([result["url"] for result in results], urls)
+        self.assertEqual([result["content"] for result in results], [f"text of {url}" for url in urls])
+
+    def test_failing_url_does_not_fail_the_batch(self):
+        """A URL that fails is reported as an error next to the pages crawled"""
+        urls = ["https://a.example/1", "https://a.example/2"]
+        results = self._crawl(FakeCrawler(failures=[urls[1]]), urls)
+        self.assertEqual([result["status"] for result in results], ["ok", "error"])
+        self.assertIn("502", results[1]["error"])
+
+    def test_urls_over_the_limit_are_skipped(self):
+        """URLs beyond max_urls are reported as skipped without being crawled"""
+        urls = ["https://a.example/1", "https://a.example/2", "https://a.example/3"]
+        crawler = FakeCrawler()
+        results = self._crawl(crawler, urls, max_urls=2)
+        self.assertEqual(sorted(crawler.crawled), urls[:2])
+        self.assertEqual(results[2]["status"], "error")
+        self.assertTrue(results[2]["error"].startswith("Skipped"))
+
+    def test_duplicate_urls_are_crawled_once(self):
+        """URLs that normalize to the same address are crawled once"""
+        crawler = FakeCrawler()
+        results = self._crawl(crawler, ["https://a.example/1", "https://A.example/1/", "https://a.example/1"])
+        self.assertEqual(len(crawler.crawled), 1)
+        self.assertEqual(len(results), 1)
+
+    def test_slow_urls_time_out(self):
+        """A URL retrying or stuck past its time limit is reported without holding the batch"""
+        urls = ["https://a.example/1", "https://a.example/retrying", "https://a.example/stuck"]
+        crawler = FakeCrawler(retrying=[urls[1]], blocking=[urls[2]])
+        started = time.monotonic()
+        try:
+            results = self._crawl(crawler, urls, timeout=0.2)
+        finally:
+            crawler.released.set()
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual([result["status"] for result in results], ["ok", "error", "error"])
+        self.assertEqual(results[1]["error"], "Timed out after 0.2s")
+        self.assertEqual(results[2]["error"], "Timed out after 0.2s")
+
+
+if __name__ == "__main__":
+    unittest.main()